@@ -1,23 +1,32 @@
 """
 FastAPI 主应用程序
 """
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, Header, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response
 from sqlalchemy.orm import Session
+import asyncio
 import logging
-from typing import List
+import secrets
+from typing import List, Optional
 
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from backend.models.case import UserProfile, SchoolPlanningResponse, AnalysisReport
+from backend.models.case import UserProfile, SchoolPlanningResponse, AnalysisReport, ProgramPositioningRequest
 from backend.services.matching_service import MatchingService
 from backend.services.llm_service import LLMService
-from backend.utils.database import get_db, create_tables
-from config.settings import DEBUG
+from backend.services.case_store import get_case_snapshot
+from backend.services.program_stats import normalize_language_type
+from backend.utils.database import get_db, get_read_db, get_pool_diagnostics, create_tables
+from backend.utils.response_cache import response_cache
+from backend.utils.metrics import CONTENT_TYPE, REGISTRY
+from backend.utils.profiling import AllocationSampler, StackSampler, profile_lock
+from backend.utils.request_timing import RequestTimingMiddleware, slow_request_log, timed
+from config.settings import DEBUG, ETL_CONFIG, METRICS_CONFIG, PROFILING_CONFIG, RESPONSE_CACHE_CONFIG
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
@@ -40,20 +49,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 接口请求的阶段计时（Server-Timing 响应头、耗时日志与慢请求日志）
+app.add_middleware(RequestTimingMiddleware, slow_log=slow_request_log, paths=["/api/"])
+
 # 挂载静态文件
 app.mount("/static", StaticFiles(directory="frontend"), name="static")
 
 # 创建数据库表
 create_tables()
 
-@app.get("/", response_class=HTMLResponse)
-async def read_root():
-    """返回主页"""
+INDEX_HTML_PATH = "frontend/index.html"
+
+def load_index_html():
+    """读取主页HTML"""
     try:
-        with open("frontend/index.html", "r", encoding="utf-8") as f:
-            return HTMLResponse(content=f.read())
+        with open(INDEX_HTML_PATH, "r", encoding="utf-8") as f:
+            content = f.read()
     except FileNotFoundError:
-        return HTMLResponse(content="""
+        content = """
         <html>
             <head><title>智能留学选校规划系统</title></head>
             <body>
@@ -62,17 +75,84 @@ async def read_root():
                 <p>请访问 <a href="/docs">/docs</a> 查看API文档</p>
             </body>
         </html>
-        """)
+        """
+    return content.encode("utf-8"), "text/html; charset=utf-8"
+
+@app.get("/", response_class=HTMLResponse)
+async def read_root(request: Request):
+    """返回主页（内存缓存，调试模式下按文件修改时间失效）"""
+    version = os.path.getmtime(INDEX_HTML_PATH) if DEBUG and os.path.exists(INDEX_HTML_PATH) else 0
+    return response_cache.respond(request, "index_html", version, load_index_html)
 
 @app.get("/health")
 async def health_check():
     """健康检查接口"""
     return {"status": "healthy", "message": "智能留学选校规划系统运行正常"}
 
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """校验管理令牌（未配置 ADMIN_TOKEN 时调试、诊断与指标接口不可用）"""
+    admin_token = PROFILING_CONFIG['admin_token']
+    if not admin_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token.encode(), admin_token.encode()):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="管理令牌无效")
+
+def require_metrics_access(x_admin_token: Optional[str] = Header(None)):
+    """指标接口默认需要管理令牌，METRICS_PUBLIC 开启时不校验"""
+    if not METRICS_CONFIG['public']:
+        require_admin(x_admin_token)
+
+@app.get("/metrics", dependencies=[Depends(require_metrics_access)])
+def metrics():
+    """Prometheus 指标（本进程的接口/匹配/LLM/缓存/连接池指标，以及最近一次ETL运行写入的指标文件）"""
+    body = REGISTRY.render()
+    etl_metrics_file = ETL_CONFIG['metrics_file']
+    if etl_metrics_file and os.path.exists(etl_metrics_file):
+        with open(etl_metrics_file, encoding="utf-8") as f:
+            body += f.read()
+    return Response(content=body, media_type=CONTENT_TYPE)
+
+@app.get("/debug/profile", dependencies=[Depends(require_admin)])
+async def debug_profile(seconds: float = 10, mode: str = "cpu", format: str = "collapsed", top: int = 20):
+    """
+    对本进程按需剖析 seconds 秒（期间照常处理请求）
+    mode: cpu（采样事件循环与线程池线程的调用栈）/ memory（tracemalloc 内存分配）
+    format: collapsed（折叠栈，可直接绘制火焰图；memory 模式按存活分配的字节数加权）/ json（热点函数或分配位置排行）
+    """
+    if mode not in ("cpu", "memory") or format not in ("collapsed", "json"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="mode 须为 cpu 或 memory，format 须为 collapsed 或 json"
+        )
+    seconds = min(max(seconds, 0.1), PROFILING_CONFIG['max_seconds'])
+    if not profile_lock.acquire(blocking=False):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="已有剖析正在进行")
+    try:
+        if mode == "cpu":
+            sampler = StackSampler(PROFILING_CONFIG['sample_interval_ms'] / 1000)
+        else:
+            sampler = AllocationSampler()
+        # 开始/结束时的快照可能较慢，放到线程池中执行，不阻塞事件循环
+        await run_in_threadpool(sampler.start)
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            await run_in_threadpool(sampler.stop)
+    finally:
+        profile_lock.release()
+
+    if format == "collapsed":
+        return Response(content=sampler.collapsed(), media_type="text/plain; charset=utf-8")
+    if mode == "cpu":
+        return {"mode": mode, "seconds": seconds, "samples": sampler.samples,
+                "hot_functions": sampler.hot_functions(top)}
+    return {"mode": mode, "seconds": seconds, "peak_kb": round(sampler.peak_bytes / 1024, 1),
+            "top_allocations": sampler.top_allocations(top)}
+
 @app.post("/api/v1/school-planning", response_model=SchoolPlanningResponse)
 async def school_planning(
     user_profile: UserProfile,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     智能选校规划主接口
@@ -99,10 +179,12 @@ async def school_planning(
         analysis_report = llm_service.generate_analysis_report(user_profile, matched_cases)
         
         # 4. 构建响应
-        response = SchoolPlanningResponse(
-            analysis_report=analysis_report,
-            matched_cases=matched_cases
-        )
+        with timed("response"):
+            response = SchoolPlanningResponse(
+                analysis_report=analysis_report,
+                matched_cases=matched_cases,
+                target_filter=matching_service.applied_target_filter
+            )
         
         logger.info("选校规划请求处理完成")
         return response
@@ -117,12 +199,15 @@ async def school_planning(
         )
 
 @app.get("/api/v1/cases/count")
-async def get_cases_count(db: Session = Depends(get_db)):
-    """获取案例总数"""
+async def get_cases_count(request: Request, db: Session = Depends(get_read_db)):
+    """获取案例总数（取自案例快照，按快照版本缓存）"""
     try:
-        from backend.models.case import Case
-        count = db.query(Case).count()
-        return {"total_cases": count}
+        snapshot = get_case_snapshot(db)
+        return response_cache.respond_json(
+            request, "cases_count", snapshot.version,
+            lambda: {"total_cases": snapshot.total_cases},
+            f"public, max-age={RESPONSE_CACHE_CONFIG['snapshot_max_age']}"
+        )
     except Exception as e:
         logger.error(f"获取案例数量失败: {e}")
         raise HTTPException(
@@ -130,6 +215,94 @@ async def get_cases_count(db: Session = Depends(get_db)):
             detail="获取案例数量失败"
         )
 
+@app.get("/api/v1/diagnostics/case-store", dependencies=[Depends(require_admin)])
+async def get_case_store_diagnostics(db: Session = Depends(get_db)):
+    """获取案例快照诊断信息（版本、各分区案例数）"""
+    try:
+        snapshot = get_case_snapshot(db)
+        return snapshot.get_diagnostics()
+    except Exception as e:
+        logger.error(f"获取案例快照诊断信息失败: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="获取案例快照诊断信息失败"
+        )
+
+@app.get("/api/v1/diagnostics/db-pool", dependencies=[Depends(require_admin)])
+async def get_db_pool_diagnostics():
+    """获取主库与只读副本的连接池状态及副本健康状态"""
+    return get_pool_diagnostics()
+
+@app.get("/api/v1/diagnostics/slow-requests", dependencies=[Depends(require_admin)])
+async def get_slow_requests():
+    """获取慢请求统计及最近记录的阶段耗时明细"""
+    return slow_request_log.get_diagnostics()
+
+@app.get("/api/v1/programs")
+async def list_programs(university: Optional[str] = None, db: Session = Depends(get_db)):
+    """列出录取项目（可按院校筛选）"""
+    try:
+        snapshot = get_case_snapshot(db)
+        return snapshot.program_stats.list_programs(university)
+    except Exception as e:
+        logger.error(f"获取项目列表失败: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="获取项目列表失败"
+        )
+
+@app.post("/api/v1/programs/positioning")
+async def get_programs_positioning(request: ProgramPositioningRequest, db: Session = Depends(get_db)):
+    """计算用户GPA/语言/GRE成绩在各目标项目录取者中的百分位位置"""
+    try:
+        snapshot = get_case_snapshot(db)
+        user_profile = request.user_profile
+        gpa_4, _ = MatchingService(db).parse_user_gpa(user_profile.gpa)
+        language_type = normalize_language_type(user_profile.language_test)
+        
+        positions = []
+        not_found = []
+        for program_id in request.program_ids:
+            position = snapshot.program_stats.get_positioning(
+                program_id,
+                gpa_4 or None,
+                language_type,
+                user_profile.language_score,
+                user_profile.gre_score
+            )
+            if position is None:
+                not_found.append(program_id)
+            else:
+                positions.append(position)
+        
+        return {"programs": positions, "not_found": not_found}
+    except Exception as e:
+        logger.error(f"计算项目成绩定位失败: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="计算项目成绩定位失败"
+        )
+
+@app.get("/api/v1/programs/{program_id}/stats")
+async def get_program_stats(program_id: int, db: Session = Depends(get_db)):
+    """获取项目录取统计（预计算的GPA/语言成绩分位数、直方图及院校层次分布）"""
+    try:
+        snapshot = get_case_snapshot(db)
+        stats = snapshot.program_stats.get_program_stats(program_id)
+    except Exception as e:
+        logger.error(f"获取项目统计失败: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="获取项目统计失败"
+        )
+    
+    if stats is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="未找到该项目"
+        )
+    return stats
+
 @app.get("/api/v1/cases/sample")
 async def get_sample_cases(limit: int = 10, db: Session = Depends(get_db)):
     """获取样例案例"""
@@ -145,8 +318,15 @@ async def get_sample_cases(limit: int = 10, db: Session = Depends(get_db)):
         )
 
 @app.get("/api/v1/config/options")
-async def get_config_options():
-    """获取配置选项（用于前端下拉框）"""
+async def get_config_options(request: Request):
+    """获取配置选项（用于前端下拉框，静态内容常驻缓存）"""
+    return response_cache.respond_json(
+        request, "config_options", 0, build_config_options,
+        f"public, max-age={RESPONSE_CACHE_CONFIG['static_max_age']}"
+    )
+
+def build_config_options():
+    """构建配置选项"""
     return {
         "school_tiers": ["985", "211", "双一流", "普通一本", "普通二本", "海外院校", "其他"],
         "language_tests": ["雅思", "托福", "多邻国", "暂无"],
@@ -171,38 +351,28 @@ async def get_config_options():
     }
 
 @app.get("/api/v1/autocomplete-options")
-async def get_autocomplete_options(db: Session = Depends(get_db)):
-    """获取自动补全选项（从数据库中提取院校和专业列表）"""
+async def get_autocomplete_options(request: Request, db: Session = Depends(get_read_db)):
+    """获取自动补全选项（从案例快照索引中提取院校和专业列表，按快照版本缓存）"""
     try:
-        from backend.models.case import Case
-        from sqlalchemy import distinct
-        
-        # 查询所有不重复的本科院校
-        universities_query = db.query(distinct(Case.undergrad_school)).filter(
-            Case.undergrad_school.isnot(None),
-            Case.undergrad_school != ''
-        ).all()
-        universities = [row[0] for row in universities_query if row[0]]
-        
-        # 查询所有不重复的本科专业
-        majors_query = db.query(distinct(Case.undergrad_major)).filter(
-            Case.undergrad_major.isnot(None),
-            Case.undergrad_major != ''
-        ).all()
-        majors = [row[0] for row in majors_query if row[0]]
-        
-        # 按字母顺序排序
-        universities.sort()
-        majors.sort()
+        snapshot = get_case_snapshot(db)
         
-        logger.info(f"返回自动补全选项: {len(universities)} 所院校, {len(majors)} 个专业")
+        def build_autocomplete_options():
+            universities = snapshot.autocomplete.all_values('universities')
+            majors = snapshot.autocomplete.all_values('majors')
+            
+            logger.info(f"生成自动补全选项: {len(universities)} 所院校, {len(majors)} 个专业")
+            
+            return {
+                "universities": universities,
+                "majors": majors,
+                "total_universities": len(universities),
+                "total_majors": len(majors)
+            }
         
-        return {
-            "universities": universities,
-            "majors": majors,
-            "total_universities": len(universities),
-            "total_majors": len(majors)
-        }
+        return response_cache.respond_json(
+            request, "autocomplete_options", snapshot.version, build_autocomplete_options,
+            f"public, max-age={RESPONSE_CACHE_CONFIG['snapshot_max_age']}"
+        )
         
     except Exception as e:
         logger.error(f"获取自动补全选项失败: {e}")
@@ -220,6 +390,26 @@ async def get_autocomplete_options(db: Session = Depends(get_db)):
             "total_majors": 10
         }
 
+@app.get("/api/v1/autocomplete")
+async def autocomplete(field: str, q: str, limit: int = 8, db: Session = Depends(get_read_db)):
+    """服务端自动补全（前缀/别名/拼音检索，按案例频次返回Top N）"""
+    if field not in ('universities', 'majors'):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="field 参数仅支持 universities 或 majors"
+        )
+    
+    try:
+        snapshot = get_case_snapshot(db)
+        suggestions = snapshot.autocomplete.search(field, q, min(max(limit, 1), 50))
+        return {"field": field, "query": q, "suggestions": suggestions}
+    except Exception as e:
+        logger.error(f"自动补全检索失败: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="自动补全检索失败"
+        )
+
 if __name__ == "__main__":
     import uvicorn
     from config.settings import APP_HOST, APP_PORT
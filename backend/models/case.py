@@ -92,6 +92,11 @@ class UserProfile(BaseModel):
     major_ranking: Optional[str] = None  # 专业排名，如："Top 5%" 或 "5/120"
     budget: Optional[str] = None  # 留学总预算
 
+class ProgramPositioningRequest(BaseModel):
+    """项目成绩定位请求模型"""
+    user_profile: UserProfile
+    program_ids: List[int]  # 目标项目ID列表（来自 /api/v1/programs）
+
 class SchoolRecommendation(BaseModel):
     """学校推荐模型"""
     university: str
@@ -109,4 +114,5 @@ class AnalysisReport(BaseModel):
 class SchoolPlanningResponse(BaseModel):
     """选校规划响应模型"""
     analysis_report: AnalysisReport
-    matched_cases: List[CaseResponse]
\ No newline at end of file
+    matched_cases: List[CaseResponse]
+    target_filter: Optional[str] = None  # 匹配时实际使用的意向筛选：country+major / country / major / none / disabled
@@ -0,0 +1,135 @@
+"""
+自动补全索引服务
+随案例快照重建的内存有序索引，支持名称/英文/拼音别名前缀检索及子串模糊匹配（n-gram 倒排索引），按案例频次返回Top N
+"""
+import bisect
+from typing import Dict, List, Optional
+import logging
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.models.case import Case
+from config.autocomplete_aliases import UNIVERSITY_ALIASES, MAJOR_ALIASES
+
+try:
+    from pypinyin import lazy_pinyin
+except ImportError:  # 未安装 pypinyin 时仅使用维护的别名表
+    lazy_pinyin = None
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_key(text: str) -> str:
+    """检索键归一化：小写并去除空白"""
+    return ''.join(text.lower().split())
+
+
+def build_pinyin_keys(name: str) -> List[str]:
+    """生成名称的全拼与首字母检索键（需安装 pypinyin）"""
+    if lazy_pinyin is None:
+        return []
+    syllables = [syllable for syllable in lazy_pinyin(name) if syllable.isalpha()]
+    if not syllables:
+        return []
+    return [''.join(syllables), ''.join(syllable[0] for syllable in syllables)]
+
+
+class PrefixIndex:
+    """单个字段的有序前缀索引"""
+
+    def __init__(self, frequencies: Dict[str, int], aliases: Dict[str, List[str]]):
+        # 按频次降序、名称升序排列，序号即为排名
+        self.values: List[str] = sorted(frequencies, key=lambda value: (-frequencies[value], value))
+        self.counts: List[int] = [frequencies[value] for value in self.values]
+        self.normalized: List[str] = [normalize_key(value) for value in self.values]
+
+        entries = set()
+        for rank, value in enumerate(self.values):
+            keys = [value] + aliases.get(value, []) + build_pinyin_keys(value)
+            for key in keys:
+                entries.add((normalize_key(key), rank))
+
+        # 有序 (检索键, 排名) 数组，前缀检索即二分定位后顺序扫描
+        self.keys: List[str] = []
+        self.ranks: List[int] = []
+        for key, rank in sorted(entries):
+            self.keys.append(key)
+            self.ranks.append(rank)
+
+        # 子串检索的倒排索引：单字符与相邻二字符 -> 包含它的取值排名（升序）
+        self.grams: Dict[str, List[int]] = {}
+        for rank, value in enumerate(self.normalized):
+            for gram in set(value) | {value[i:i + 2] for i in range(len(value) - 1)}:
+                self.grams.setdefault(gram, []).append(rank)
+
+    def substring_candidates(self, query: str) -> List[int]:
+        """可能包含 query 的取值排名：查询中各二字符（单字符查询为该字符）倒排列表中最短的一个"""
+        grams = {query} if len(query) == 1 else {query[i:i + 2] for i in range(len(query) - 1)}
+        postings = [self.grams.get(gram, []) for gram in grams]
+        return min(postings, key=len)
+
+    def search(self, query: str, limit: int = 8) -> List[Dict]:
+        """
+        前缀检索（含别名），结果不足时补充子串匹配，均按频次排序
+        """
+        prefix = normalize_key(query)
+        if not prefix or limit <= 0:
+            return []
+
+        matched = set()
+        position = bisect.bisect_left(self.keys, prefix)
+        while position < len(self.keys) and self.keys[position].startswith(prefix):
+            matched.add(self.ranks[position])
+            position += 1
+
+        ranks = sorted(matched)[:limit]
+
+        # 子串模糊匹配（如输入"交通"匹配"上海交通大学"）：只核对倒排列表中的候选，按排名顺序即为频次顺序
+        if len(ranks) < limit:
+            for rank in self.substring_candidates(prefix):
+                if rank not in matched and prefix in self.normalized[rank]:
+                    ranks.append(rank)
+                    if len(ranks) >= limit:
+                        break
+
+        return [{"value": self.values[rank], "count": self.counts[rank]} for rank in ranks]
+
+    def all_values(self) -> List[str]:
+        """返回全部取值（按字母顺序）"""
+        return sorted(self.values)
+
+
+class AutocompleteIndex:
+    """院校与专业自动补全索引（只读，随快照重建）"""
+
+    FIELDS = ('universities', 'majors')
+
+    def __init__(self, cases: List[Case]):
+        university_counts: Dict[str, int] = {}
+        major_counts: Dict[str, int] = {}
+
+        for case in cases:
+            if case.undergrad_school:
+                university_counts[case.undergrad_school] = university_counts.get(case.undergrad_school, 0) + 1
+            if case.undergrad_major:
+                major_counts[case.undergrad_major] = major_counts.get(case.undergrad_major, 0) + 1
+
+        self.indexes: Dict[str, PrefixIndex] = {
+            'universities': PrefixIndex(university_counts, UNIVERSITY_ALIASES),
+            'majors': PrefixIndex(major_counts, MAJOR_ALIASES)
+        }
+
+        logger.info(f"自动补全索引已构建: {len(university_counts)} 所院校, {len(major_counts)} 个专业")
+
+    def search(self, field: str, query: str, limit: int = 8) -> Optional[List[Dict]]:
+        """检索指定字段，字段不存在时返回 None"""
+        index = self.indexes.get(field)
+        if index is None:
+            return None
+        return index.search(query, limit)
+
+    def all_values(self, field: str) -> List[str]:
+        """返回指定字段的全部取值"""
+        return self.indexes[field].all_values()
@@ -0,0 +1,222 @@
+"""
+进程内案例快照服务
+将 cases 表加载到内存，并按 (学位层次, 院校层次等级) 物理分区，供匹配服务直接扫描；
+按意向国家/地区与专业大类建立位图索引，扫描前先筛选候选案例
+"""
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+import logging
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.models.case import Case
+from backend.services.program_stats import ProgramStatsCube
+from backend.services.autocomplete_index import AutocompleteIndex
+from backend.services.target_index import TargetIndex
+from backend.utils.metrics import CallbackMetric
+from config.settings import CASE_STORE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# 院校层次等级映射（与 MatchingService.calculate_school_tier_score 保持一致）
+TIER_LEVELS = {
+    '985院校': 4,
+    '211院校': 3,
+    '双非院校': 2,
+    '海外院校': 3,  # 海外院校等同于211
+    '其他': 1
+}
+
+# 无院校层次信息的案例单独成区，院校层次得分恒为0
+UNKNOWN_TIER_LEVEL = 0
+
+
+def get_tier_level(tier: Optional[str]) -> int:
+    """
+    获取案例院校层次对应的分区等级
+    """
+    if not tier:
+        return UNKNOWN_TIER_LEVEL
+    return TIER_LEVELS.get(tier, 1)
+
+
+class CaseSnapshot:
+    """案例快照（只读）"""
+
+    def __init__(self, cases: List[Case], version: int = 1, fingerprint: Optional[Tuple] = None):
+        self.version = version
+        self.loaded_at = time.time()
+        # 最近一次确认与数据库一致的时间（数据未变化时只更新该时间，不重建快照）
+        self.checked_at = self.loaded_at
+        self.fingerprint = fingerprint
+        self.total_cases = len(cases)
+
+        # 学位层次 -> 按原始顺序排列的全部案例
+        self.buckets: Dict[str, List[Case]] = {}
+        # (学位层次, 院校层次等级) -> [(桶内序号, 案例)]
+        self.partitions: Dict[Tuple[str, int], List[Tuple[int, Case]]] = {}
+
+        for case in cases:
+            bucket = self.buckets.setdefault(case.degree_level, [])
+            key = (case.degree_level, get_tier_level(case.undergrad_school_tier))
+            self.partitions.setdefault(key, []).append((len(bucket), case))
+            bucket.append(case)
+
+        # 院校/项目录取统计随快照一起构建
+        self.program_stats = ProgramStatsCube(cases)
+        # 院校/专业自动补全索引随快照一起重建
+        self.autocomplete = AutocompleteIndex(cases)
+        # 意向国家/地区与专业大类位图索引
+        self.target_index = TargetIndex(self.buckets, self.partitions)
+
+    def get_tier_levels(self, degree_level: str) -> List[int]:
+        """获取某学位层次下存在的院校层次等级"""
+        return sorted(level for degree, level in self.partitions if degree == degree_level)
+
+    def get_partitions(self, degree_level: str, tier_levels, positions=None) -> List[Tuple[int, Case]]:
+        """
+        获取某学位层次下指定院校层次等级分区的案例（带桶内序号）
+        positions 为意向筛选得到的桶内序号时只返回其中的案例
+        """
+        if positions is not None:
+            bucket = self.buckets[degree_level]
+            selected = self.target_index.degrees[degree_level].in_tier_levels(positions, tier_levels)
+            return [(position, bucket[position]) for position in selected]
+        candidates = []
+        for level in tier_levels:
+            candidates.extend(self.partitions.get((degree_level, level), []))
+        return candidates
+
+    def get_partition_counts(self) -> Dict[str, Dict[str, int]]:
+        """获取各分区案例数（用于诊断）"""
+        counts = {}
+        for (degree_level, level), cases in sorted(self.partitions.items()):
+            counts.setdefault(degree_level, {})[str(level)] = len(cases)
+        return counts
+
+    def get_diagnostics(self) -> Dict:
+        """获取快照诊断信息"""
+        return {
+            "version": self.version,
+            "loaded_at": self.loaded_at,
+            "age_seconds": round(time.time() - self.loaded_at, 1),
+            "checked_at": self.checked_at,
+            "total_cases": self.total_cases,
+            "buckets": {degree: len(cases) for degree, cases in self.buckets.items()},
+            "partitions": self.get_partition_counts(),
+            "programs": len(self.program_stats.program_stats),
+            "targets": self.target_index.get_diagnostics()
+        }
+
+
+_snapshot: Optional[CaseSnapshot] = None
+_snapshot_lock = threading.Lock()
+# 同一时刻只有一个调用方从数据库重新加载快照
+_reload_lock = threading.Lock()
+
+
+def get_data_fingerprint(db: Session) -> Tuple:
+    """
+    案例数据指纹：行数、最大 id、最近的创建与更新时间（任一变化即视为数据已变化）
+    """
+    return tuple(db.query(
+        func.count(Case.id), func.max(Case.id), func.max(Case.created_at), func.max(Case.updated_at)
+    ).one())
+
+
+def load_case_snapshot(db: Session) -> CaseSnapshot:
+    """
+    从数据库重新加载案例快照；数据未变化时沿用当前快照（版本号不变）
+    db 为只读副本会话（info 中记录了主库 primary_bind）时以主库的数据指纹为准，
+    副本数据与主库不一致（复制延迟）时改从主库加载，不用落后的数据替换快照
+    """
+    primary_bind = db.info.get('primary_bind')
+    on_replica = primary_bind is not None and db.get_bind() is not primary_bind
+    if on_replica:
+        with Session(bind=primary_bind) as primary_db:
+            fingerprint = get_data_fingerprint(primary_db)
+    else:
+        fingerprint = get_data_fingerprint(db)
+    current = _snapshot
+    if current is not None and current.fingerprint == fingerprint:
+        current.checked_at = time.time()
+        return current
+
+    if on_replica and get_data_fingerprint(db) != fingerprint:
+        logger.warning("只读副本数据落后于主库，从主库加载案例快照")
+        with Session(bind=primary_bind) as primary_db:
+            cases = primary_db.query(Case).order_by(Case.id).all()
+    else:
+        cases = db.query(Case).order_by(Case.id).all()
+    snapshot = install_case_snapshot(cases, fingerprint)
+    logger.info(f"案例快照已加载: 版本 {snapshot.version}, 共 {snapshot.total_cases} 个案例")
+    return snapshot
+
+
+def install_case_snapshot(cases: List[Case], fingerprint: Optional[Tuple] = None) -> CaseSnapshot:
+    """
+    用给定案例列表替换当前快照（版本号递增）
+    """
+    global _snapshot
+
+    with _snapshot_lock:
+        version = _snapshot.version + 1 if _snapshot else 1
+        _snapshot = CaseSnapshot(cases, version=version, fingerprint=fingerprint)
+        return _snapshot
+
+
+def is_expired(snapshot: CaseSnapshot) -> bool:
+    """快照是否超过刷新间隔未与数据库核对"""
+    return time.time() - snapshot.checked_at > CASE_STORE_CONFIG['refresh_interval']
+
+
+def _refresh_in_background(session_class, bind, info):
+    """后台刷新快照（调用方已持有 _reload_lock；使用与请求会话同类型、同绑定的新会话）"""
+    try:
+        snapshot = _snapshot
+        if snapshot is not None and not is_expired(snapshot):
+            return
+        with session_class(bind=bind, info=dict(info)) as db:
+            load_case_snapshot(db)
+    except Exception as e:
+        logger.error(f"刷新案例快照失败，继续使用当前快照: {e}")
+        if _snapshot is not None:
+            # 下一个刷新间隔后再重试
+            _snapshot.checked_at = time.time()
+    finally:
+        _reload_lock.release()
+
+
+def get_case_snapshot(db: Session) -> CaseSnapshot:
+    """
+    获取当前案例快照
+    尚未加载时同步加载（并发调用只加载一次）；已过期时由一个后台线程刷新，刷新完成前继续返回当前快照，
+    不在请求中（事件循环上）执行全量加载
+    """
+    snapshot = _snapshot
+    if snapshot is None:
+        with _reload_lock:
+            if _snapshot is None:
+                load_case_snapshot(db)
+        return _snapshot
+
+    if is_expired(snapshot) and db is not None and _reload_lock.acquire(blocking=False):
+        threading.Thread(target=_refresh_in_background, args=(type(db), db.get_bind(), db.info),
+                         name='case-snapshot-refresh', daemon=True).start()
+    return snapshot
+
+
+def get_loaded_snapshot() -> Optional[CaseSnapshot]:
+    """获取已加载的案例快照（不触发加载）"""
+    return _snapshot
+
+
+# 快照未加载时不输出
+CallbackMetric('case_snapshot_age_seconds', '当前案例快照的加载时长（秒）',
+               lambda: time.time() - _snapshot.loaded_at if _snapshot else None)
+CallbackMetric('case_snapshot_cases', '当前案例快照中的案例数', lambda: _snapshot.total_cases if _snapshot else None)
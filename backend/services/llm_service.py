@@ -5,16 +5,26 @@
 from openai import OpenAI
 import json
 import logging
+import time
 from typing import List, Dict
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from backend.models.case import UserProfile, CaseResponse, AnalysisReport
+from backend.utils.metrics import Counter, Histogram
+from backend.utils.request_timing import timed
 from config.settings import OPENAI_API_KEY, OPENAI_BASE_URL, LLM_MODEL
 
 logger = logging.getLogger(__name__)
 
+LLM_REQUEST_DURATION = Histogram('llm_request_duration_seconds', 'LLM API 调用耗时（秒）', ('outcome',))
+LLM_TOKENS = Histogram(
+    'llm_tokens', '每次 LLM API 调用的 token 数', ('type',),
+    buckets=(100, 250, 500, 1000, 2000, 4000, 8000, 16000)
+)
+LLM_FALLBACK_REPORTS = Counter('llm_fallback_reports_total', '使用备用分析报告的次数', ('reason',))
+
 class LLMService:
     """LLM服务类"""
     
@@ -157,30 +167,42 @@ class LLMService:
         """
         try:
             # 构建提示词
-            prompt = self.build_prompt(user_profile, matched_cases)
+            with timed("prompt"):
+                prompt = self.build_prompt(user_profile, matched_cases)
             
             # 调用LLM API (新版本API)
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": "你是一名专业的留学申请顾问，擅长根据学生背景和成功案例提供精准的选校建议。"
-                    },
-                    {
-                        "role": "user", 
-                        "content": prompt
-                    }
-                ],
-                temperature=0.7,
-                max_tokens=2000
-            )
+            llm_started = time.perf_counter()
+            try:
+                with timed("llm"):
+                    response = self.client.chat.completions.create(
+                        model=self.model,
+                        messages=[
+                            {
+                                "role": "system", 
+                                "content": "你是一名专业的留学申请顾问，擅长根据学生背景和成功案例提供精准的选校建议。"
+                            },
+                            {
+                                "role": "user", 
+                                "content": prompt
+                            }
+                        ],
+                        temperature=0.7,
+                        max_tokens=2000
+                    )
+            except Exception:
+                LLM_REQUEST_DURATION.observe(time.perf_counter() - llm_started, ('error',))
+                raise
+            LLM_REQUEST_DURATION.observe(time.perf_counter() - llm_started, ('success',))
+            if response.usage:
+                LLM_TOKENS.observe(response.usage.prompt_tokens, ('prompt',))
+                LLM_TOKENS.observe(response.usage.completion_tokens, ('completion',))
             
             # 提取回复内容
             analysis_text = response.choices[0].message.content
             
             # 解析分析报告
-            report = self.parse_analysis_report(analysis_text, matched_cases)
+            with timed("parse"):
+                report = self.parse_analysis_report(analysis_text, matched_cases)
             
             logger.info("成功生成LLM分析报告")
             return report
@@ -188,7 +210,9 @@ class LLMService:
         except Exception as e:
             logger.error(f"LLM分析报告生成失败: {e}")
             # 返回默认报告
-            return self.generate_fallback_report(user_profile, matched_cases)
+            LLM_FALLBACK_REPORTS.inc(labels=('llm_error',))
+            with timed("fallback"):
+                return self.generate_fallback_report(user_profile, matched_cases)
     
     def parse_analysis_report(self, analysis_text: str, matched_cases: List[CaseResponse]) -> AnalysisReport:
         """
@@ -230,6 +254,7 @@ class LLMService:
             
         except Exception as e:
             logger.error(f"解析LLM报告失败: {e}")
+            LLM_FALLBACK_REPORTS.inc(labels=('parse_error',))
             return self.generate_fallback_report(None, matched_cases)
     
     def extract_recommendations_from_cases(self, matched_cases: List[CaseResponse]) -> Dict:
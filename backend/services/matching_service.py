@@ -3,20 +3,86 @@
 实现多维度相似度计算和案例推荐算法
 """
 import math
-from typing import List, Dict, Tuple
+import re
+import time
+from operator import attrgetter
+from typing import List, Dict, Optional, Tuple
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_
+from sqlalchemy.exc import SQLAlchemyError
 import logging
+import numpy as np
 
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from backend.models.case import Case, UserProfile, CaseResponse
+from backend.services.case_store import get_case_snapshot, TIER_LEVELS, UNKNOWN_TIER_LEVEL
+from backend.utils.metrics import Counter, Histogram
+from backend.utils.parse_cache import memoized
+from backend.utils.request_timing import timed
 from config.settings import MATCHING_CONFIG
 
 logger = logging.getLogger(__name__)
 
+# 匹配 x.x/4.0 或 xx/100 格式
+GPA_FRACTION_PATTERN = re.compile(r'(\d+\.?\d*)/(\d+\.?\d*)')
+GPA_VALUE_PATTERN = re.compile(r'(\d+\.?\d*)')
+
+MATCHING_SCAN_SIZE = Histogram(
+    'matching_scan_size', '每次匹配扫描的候选案例数',
+    buckets=(100, 500, 1000, 5000, 10000, 50000, 100000, 500000, 1000000)
+)
+MATCHING_SCORING_DURATION = Histogram('matching_scoring_duration_seconds', '每次匹配中候选案例打分与排序的耗时（秒）')
+MATCHING_TARGET_FILTER = Counter('matching_target_filter_total', '匹配时实际使用的意向筛选（country+major / country / major / none / disabled）', ('filter',))
+
+# 作为冲刺目标的顶尖院校（院校名称包含其中之一即可）
+PRESTIGIOUS_UNIVERSITIES = (
+    "牛津大学", "剑桥大学", "帝国理工学院", "伦敦政治经济学院",
+    "香港大学", "香港科技大学", "香港中文大学",
+    "新加坡国立大学", "南洋理工大学"
+)
+
+
+@memoized('parse_user_gpa')
+def parse_user_gpa(gpa_str: str) -> Tuple[float, float]:
+    """
+    解析用户输入的GPA（带缓存，常见输入如 3.5/4.0 重复出现）
+    返回 (gpa_4, gpa_100)
+    """
+    if not gpa_str:
+        return 0.0, 0.0
+    
+    match = GPA_FRACTION_PATTERN.search(gpa_str)
+    
+    if match:
+        numerator = float(match.group(1))
+        denominator = float(match.group(2))
+        
+        if denominator == 4.0 or denominator == 4:
+            return numerator, numerator * 25
+        elif denominator == 100:
+            return numerator / 25, numerator
+    
+    # 如果没有分母，尝试推断
+    value_match = GPA_VALUE_PATTERN.search(gpa_str)
+    if value_match:
+        value = float(value_match.group(1))
+        if value <= 4:
+            return value, value * 25
+        else:
+            return value / 25, value
+    
+    return 0.0, 0.0
+
+
+@memoized('is_prestigious_university')
+def is_prestigious_university(university: str) -> bool:
+    """院校是否为顶尖院校（带缓存，每所院校只做一次子串匹配）"""
+    return any(name in university for name in PRESTIGIOUS_UNIVERSITIES)
+
+
 class MatchingService:
     """案例匹配服务"""
     
@@ -24,40 +90,16 @@ class MatchingService:
         self.db = db
         self.weights = MATCHING_CONFIG['weights']
         self.max_cases = MATCHING_CONFIG['max_cases']
+        self.target_filter = MATCHING_CONFIG['target_filter']
+        # 最近一次 find_similar_cases 实际使用的意向筛选（关闭筛选时为 disabled），随选校规划响应返回
+        self.applied_target_filter: Optional[str] = None
     
     def parse_user_gpa(self, gpa_str: str) -> Tuple[float, float]:
         """
         解析用户输入的GPA
         返回 (gpa_4, gpa_100)
         """
-        import re
-        
-        if not gpa_str:
-            return 0.0, 0.0
-        
-        # 匹配 x.x/4.0 或 xx/100 格式
-        pattern = r'(\d+\.?\d*)/(\d+\.?\d*)'
-        match = re.search(pattern, gpa_str)
-        
-        if match:
-            numerator = float(match.group(1))
-            denominator = float(match.group(2))
-            
-            if denominator == 4.0 or denominator == 4:
-                return numerator, numerator * 25
-            elif denominator == 100:
-                return numerator / 25, numerator
-        
-        # 如果没有分母，尝试推断
-        value_match = re.search(r'(\d+\.?\d*)', gpa_str)
-        if value_match:
-            value = float(value_match.group(1))
-            if value <= 4:
-                return value, value * 25
-            else:
-                return value / 25, value
-        
-        return 0.0, 0.0
+        return parse_user_gpa(gpa_str)
     
     def calculate_school_tier_score(self, user_tier: str, case_tier: str) -> float:
         """
@@ -66,17 +108,9 @@ class MatchingService:
         if not case_tier:
             return 0.0
         
-        # 院校层次等级映射
-        tier_levels = {
-            '985院校': 4,
-            '211院校': 3,
-            '双非院校': 2,
-            '海外院校': 3,  # 海外院校等同于211
-            '其他': 1
-        }
-        
-        user_level = tier_levels.get(user_tier, 1)
-        case_level = tier_levels.get(case_tier, 1)
+        # 院校层次等级映射（与案例快照分区共用）
+        user_level = TIER_LEVELS.get(user_tier, 1)
+        case_level = TIER_LEVELS.get(case_tier, 1)
         
         if user_level == case_level:
             return self.weights['school_tier']  # 完全匹配
@@ -234,36 +268,91 @@ class MatchingService:
         
         return total_score
     
+    def get_far_tier_upper_bound(self, user_profile: UserProfile) -> float:
+        """
+        计算非相邻院校层次分区中案例可能获得的最高得分（院校层次得分为0）
+        """
+        upper_bound = self.weights['gpa'] + self.weights['major']
+        if user_profile.language_score:
+            upper_bound += self.weights['language']
+        if user_profile.gre_score:
+            upper_bound += self.weights['gre']
+        return upper_bound
+    
+    def score_candidates(self, user_profile: UserProfile, candidates: List[Tuple[int, Case]]) -> List[Tuple[float, int, Case]]:
+        """
+        为候选案例打分，返回 (得分, 桶内序号, 案例) 列表，只保留有得分的案例
+        """
+        scored = []
+        for position, case in candidates:
+            similarity_score = self.calculate_similarity_score(user_profile, case)
+            if similarity_score > 0:
+                scored.append((similarity_score, position, case))
+        return scored
+    
     def find_similar_cases(self, user_profile: UserProfile) -> List[CaseResponse]:
         """
         查找相似案例
         """
         try:
-            # Step 1: 硬性筛选 - 相同学位层次
-            base_query = self.db.query(Case).filter(
-                Case.degree_level == user_profile.target_degree
-            )
+            # Step 1: 硬性筛选 - 相同学位层次（直接读取快照中的分区）
+            with timed("snapshot"):
+                snapshot = get_case_snapshot(self.db)
+            degree_level = user_profile.target_degree
+            
+            # Step 2: 按意向国家/地区与意向专业筛选候选案例（位图求交；筛选后为空时逐步放宽）
+            target_positions, target_filter = None, 'disabled'
+            if self.target_filter:
+                with timed("target_filter"):
+                    target_positions, target_filter = snapshot.target_index.select(
+                        degree_level, user_profile.target_countries,
+                        user_profile.target_majors or [user_profile.target_major]
+                    )
+            MATCHING_TARGET_FILTER.inc(labels=(target_filter,))
+            self.applied_target_filter = target_filter
+            
+            # Step 3: 优先扫描本层次及相邻层次分区（院校层次得分只在这些分区中非零）
+            user_level = TIER_LEVELS.get(user_profile.school_tier, 1)
+            near_levels = [level for level in (user_level - 1, user_level, user_level + 1) if level != UNKNOWN_TIER_LEVEL]
+            far_levels = [level for level in snapshot.get_tier_levels(degree_level) if level not in near_levels]
             
-            # 获取所有候选案例
-            candidate_cases = base_query.all()
-            logger.info(f"找到 {len(candidate_cases)} 个候选案例")
+            scoring_started = time.perf_counter()
+            with timed("scoring"):
+                near_candidates = snapshot.get_partitions(degree_level, near_levels, target_positions)
+                scored_cases = self.score_candidates(user_profile, near_candidates)
+                scored_cases.sort(key=lambda x: (-x[0], x[1]))
+                scanned_count = len(near_candidates)
             
-            # Step 2: 计算相似度得分
-            scored_cases = []
-            for case in candidate_cases:
-                similarity_score = self.calculate_similarity_score(user_profile, case)
-                if similarity_score > 0:  # 只保留有得分的案例
+            # 若Top N未填满，或其他分区的得分上限可能挤进Top N，则回退扫描整个学位层次
+            if far_levels and (
+                len(scored_cases) < self.max_cases
+                or scored_cases[self.max_cases - 1][0] <= self.get_far_tier_upper_bound(user_profile)
+            ):
+                with timed("scoring"):
+                    far_candidates = snapshot.get_partitions(degree_level, far_levels, target_positions)
+                    scored_cases.extend(self.score_candidates(user_profile, far_candidates))
+                    scored_cases.sort(key=lambda x: (-x[0], x[1]))
+                    scanned_count += len(far_candidates)
+            
+            MATCHING_SCORING_DURATION.observe(time.perf_counter() - scoring_started)
+            MATCHING_SCAN_SIZE.observe(scanned_count)
+            logger.info(f"扫描 {scanned_count} 个候选案例（学位层次共 {len(snapshot.buckets.get(degree_level, []))} 个，意向筛选: {target_filter}）")
+            
+            # Step 4: 按得分排序并返回Top N
+            top_cases = []
+            with timed("case_response"):
+                for similarity_score, _, case in scored_cases[:self.max_cases]:
                     case_response = CaseResponse.from_orm(case)
                     case_response.similarity_score = similarity_score
-                    scored_cases.append(case_response)
-            
-            # Step 3: 按得分排序并返回Top N
-            scored_cases.sort(key=lambda x: x.similarity_score, reverse=True)
-            top_cases = scored_cases[:self.max_cases]
+                    top_cases.append(case_response)
             
             logger.info(f"返回 {len(top_cases)} 个匹配案例")
             return top_cases
             
+        except SQLAlchemyError as e:
+            # 数据库错误不能当作"没有匹配案例"返回
+            logger.error(f"查找相似案例时数据库出错: {e}")
+            raise
         except Exception as e:
             logger.error(f"查找相似案例时出错: {e}")
             return []
@@ -271,6 +360,8 @@ class MatchingService:
     def categorize_recommendations(self, cases: List[CaseResponse], user_profile: UserProfile) -> Dict[str, List[Dict]]:
         """
         将案例分类为冲刺、核心、保底三个梯度
+        按院校分组取最高分案例与划分梯度都在数组上完成，只为最终输出的推荐构建结果，
+        参与分类的案例数扩大（如 Top 500）时耗时基本不变
         """
         if not cases:
             return {"reach": [], "target": [], "safety": []}
@@ -279,64 +370,55 @@ class MatchingService:
         high_score_threshold = 60  # 高分阈值
         medium_score_threshold = 40  # 中等分数阈值
         
-        reach_schools = []
-        target_schools = []
-        safety_schools = []
+        # 院校编号按首次出现的顺序分配（即逐个院校处理的顺序）
+        universities = list(map(attrgetter('university'), cases))
+        university_ids = {university: index for index, university in enumerate(dict.fromkeys(universities))}
+        ids = np.fromiter(map(university_ids.__getitem__, universities), dtype=np.intp, count=len(cases))
+        scores = np.fromiter(map(attrgetter('similarity_score'), cases), dtype=np.float64, count=len(cases))
+        
+        # 为每个大学选择最佳案例作为推荐：按 (院校, 得分降序, 位置) 排序后取各组第一个（同分取靠前的案例）
+        order = np.lexsort((np.arange(len(cases)), -scores, ids))
+        sorted_ids = ids[order]
+        group_starts = np.empty(len(cases), dtype=bool)
+        group_starts[0] = True
+        np.not_equal(sorted_ids[1:], sorted_ids[:-1], out=group_starts[1:])
+        best = order[group_starts]
+        best_scores = scores[best]
+        
+        # 高分院校进入核心；中等得分院校在此前的核心推荐不足3个时进入核心
+        # （此时此前的高分、中等得分院校必然都已进入核心），其余进入保底
+        high = best_scores >= high_score_threshold
+        candidate = high | (best_scores >= medium_score_threshold)
+        is_target = high | (candidate & (np.cumsum(candidate) - candidate < 3))
+        target_indices = best[is_target].tolist()
+        safety_indices = best[~is_target].tolist()
         
-        # 统计不同大学的案例
-        university_cases = {}
-        for case in cases:
-            if case.university not in university_cases:
-                university_cases[case.university] = []
-            university_cases[case.university].append(case)
-        
-        # 为每个大学选择最佳案例作为推荐
-        for university, uni_cases in university_cases.items():
-            best_case = max(uni_cases, key=lambda x: x.similarity_score)
-            
-            recommendation = {
-                "university": best_case.university,
-                "program": best_case.program,
-                "reason": f"相似度得分: {best_case.similarity_score:.1f}",
-                "evidence_case_id": best_case.id
+        # 如果target_schools太少，从safety中提升一些
+        promoted = max(3 - len(target_indices), 0)
+        target_indices += safety_indices[:promoted]
+        safety_indices = safety_indices[promoted:]
+        
+        def recommendation(case: CaseResponse) -> Dict:
+            return {
+                "university": case.university,
+                "program": case.program,
+                "reason": f"相似度得分: {case.similarity_score:.1f}",
+                "evidence_case_id": case.id
             }
-            
-            if best_case.similarity_score >= high_score_threshold:
-                target_schools.append(recommendation)
-            elif best_case.similarity_score >= medium_score_threshold:
-                if len(target_schools) < 3:
-                    target_schools.append(recommendation)
-                else:
-                    safety_schools.append(recommendation)
-            else:
-                safety_schools.append(recommendation)
         
-        # 如果target_schools太少，从safety中提升一些
-        while len(target_schools) < 3 and safety_schools:
-            target_schools.append(safety_schools.pop(0))
-        
-        # 选择一些高排名学校作为冲刺目标
-        # 这里可以根据实际需求调整逻辑
-        prestigious_universities = [
-            "牛津大学", "剑桥大学", "帝国理工学院", "伦敦政治经济学院",
-            "香港大学", "香港科技大学", "香港中文大学",
-            "新加坡国立大学", "南洋理工大学"
+        # 选择一些高排名学校作为冲刺目标（从前5个案例中选择）
+        reach_schools = [
+            {
+                "university": case.university,
+                "program": case.program,
+                "reason": f"顶尖院校，值得冲刺 (相似度: {case.similarity_score:.1f})",
+                "evidence_case_id": case.id
+            }
+            for case in cases[:5] if is_prestigious_university(case.university)
         ]
         
-        for case in cases[:5]:  # 从前5个案例中选择冲刺目标
-            if any(uni in case.university for uni in prestigious_universities):
-                reach_recommendation = {
-                    "university": case.university,
-                    "program": case.program,
-                    "reason": f"顶尖院校，值得冲刺 (相似度: {case.similarity_score:.1f})",
-                    "evidence_case_id": case.id
-                }
-                reach_schools.append(reach_recommendation)
-                if len(reach_schools) >= 3:
-                    break
-        
         return {
             "reach": reach_schools[:3],
-            "target": target_schools[:4],
-            "safety": safety_schools[:3]
+            "target": [recommendation(cases[index]) for index in target_indices[:4]],
+            "safety": [recommendation(cases[index]) for index in safety_indices[:3]]
         }
\ No newline at end of file
@@ -0,0 +1,253 @@
+"""
+录取统计预计算服务
+随案例快照一起构建按院校/项目聚合的统计立方体（案例数、GPA与语言成绩分位数及直方图、本科院校层次分布）
+"""
+import bisect
+import hashlib
+import math
+from typing import Dict, List, Optional, Tuple
+import logging
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.models.case import Case
+
+logger = logging.getLogger(__name__)
+
+# 统计输出的分位点
+PERCENTILES = [10, 25, 50, 75, 90]
+
+# 直方图分箱宽度
+GPA_BIN_WIDTH = 0.1
+LANGUAGE_BIN_WIDTHS = {
+    '雅思': 0.5,
+    '托福': 5,
+    '多邻国': 5
+}
+
+# 用户输入的语言考试名称 -> 案例中的语言类型
+LANGUAGE_TEST_ALIASES = {
+    'IELTS': '雅思',
+    'TOEFL': '托福',
+    'Duolingo': '多邻国'
+}
+
+
+def normalize_language_type(language_test: Optional[str]) -> Optional[str]:
+    """将用户输入的语言考试名称转换为案例中的语言类型"""
+    if not language_test:
+        return None
+    return LANGUAGE_TEST_ALIASES.get(language_test, language_test)
+
+
+def make_program_id(university: str, program: str) -> int:
+    """
+    由 (院校, 项目) 派生的稳定项目ID（BLAKE2b 摘要的前 48 位，在 JavaScript 安全整数范围内），
+    不随其他项目的增删而变化
+    """
+    digest = hashlib.blake2b(f"{university}\x1f{program}".encode('utf-8'), digest_size=6).digest()
+    return int.from_bytes(digest, 'big')
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """
+    计算已排序数组的分位数（线性插值）
+    """
+    if not sorted_values:
+        return None
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+
+    rank = (len(sorted_values) - 1) * q / 100
+    lower = math.floor(rank)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    value = sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (rank - lower)
+    return round(value, 2)
+
+
+def percentile_rank(sorted_values: List[float], value: Optional[float]) -> Dict:
+    """
+    计算 value 在已排序数组中的百分位位置（不高于 value 的样本占比）
+    """
+    if value is None or not sorted_values:
+        return {"percentile": None, "sample_size": len(sorted_values)}
+
+    rank = bisect.bisect_right(sorted_values, value)
+    return {
+        "percentile": round(rank * 100 / len(sorted_values), 1),
+        "sample_size": len(sorted_values)
+    }
+
+
+def histogram(sorted_values: List[float], bin_width: float) -> Dict[str, int]:
+    """
+    按固定宽度分箱统计，键为分箱下界
+    """
+    bins = {}
+    for value in sorted_values:
+        lower = round(math.floor(round(value / bin_width, 6)) * bin_width, 2)
+        key = f"{lower:g}"
+        bins[key] = bins.get(key, 0) + 1
+    return bins
+
+
+def summarize_scores(sorted_values: List[float], bin_width: float) -> Dict:
+    """
+    汇总一组成绩：样本数、均值、分位数、直方图
+    """
+    if not sorted_values:
+        return {"count": 0}
+
+    return {
+        "count": len(sorted_values),
+        "mean": round(sum(sorted_values) / len(sorted_values), 2),
+        "min": sorted_values[0],
+        "max": sorted_values[-1],
+        "percentiles": {f"p{q}": percentile(sorted_values, q) for q in PERCENTILES},
+        "histogram": histogram(sorted_values, bin_width)
+    }
+
+
+class ProgramAggregate:
+    """单个院校或项目的原始聚合数据"""
+
+    def __init__(self):
+        self.case_count = 0
+        self.degree_levels: Dict[str, int] = {}
+        self.tier_mix: Dict[str, int] = {}
+        self.gpa_values: List[float] = []
+        self.language_values: Dict[str, List[float]] = {}
+        self.gre_values: List[float] = []
+
+    def add(self, case: Case):
+        """累加一个案例"""
+        self.case_count += 1
+        self.degree_levels[case.degree_level] = self.degree_levels.get(case.degree_level, 0) + 1
+
+        tier = case.undergrad_school_tier or '未知'
+        self.tier_mix[tier] = self.tier_mix.get(tier, 0) + 1
+
+        if case.gpa_scale_4:
+            self.gpa_values.append(float(case.gpa_scale_4))
+        if case.language_type and case.language_score:
+            self.language_values.setdefault(case.language_type, []).append(float(case.language_score))
+        if case.gre_score:
+            self.gre_values.append(float(case.gre_score))
+
+    def finalize(self):
+        """排序成绩数组，供分位数计算使用"""
+        self.gpa_values.sort()
+        self.gre_values.sort()
+        for values in self.language_values.values():
+            values.sort()
+
+    def summarize(self) -> Dict:
+        """生成统计摘要"""
+        return {
+            "case_count": self.case_count,
+            "degree_levels": self.degree_levels,
+            "tier_mix": self.tier_mix,
+            "gpa": summarize_scores(self.gpa_values, GPA_BIN_WIDTH),
+            "language": {
+                language_type: summarize_scores(values, LANGUAGE_BIN_WIDTHS.get(language_type, 1))
+                for language_type, values in self.language_values.items()
+            },
+            "gre": summarize_scores(self.gre_values, 5)
+        }
+
+
+class ProgramStatsCube:
+    """院校/项目录取统计立方体（只读，随快照重建）"""
+
+    def __init__(self, cases: List[Case]):
+        program_aggregates: Dict[Tuple[str, str], ProgramAggregate] = {}
+        university_aggregates: Dict[str, ProgramAggregate] = {}
+
+        for case in cases:
+            key = (case.university, case.program)
+            program_aggregates.setdefault(key, ProgramAggregate()).add(case)
+            university_aggregates.setdefault(case.university, ProgramAggregate()).add(case)
+
+        # 项目ID由 (院校, 项目) 派生，快照重建、项目增删后同一项目的ID不变；
+        # 极少数摘要冲突时按 (院校, 项目) 顺序顺延到下一个空闲ID
+        self.program_keys: Dict[int, Tuple[str, str]] = {}
+        self.program_ids: Dict[Tuple[str, str], int] = {}
+        for key in sorted(program_aggregates):
+            program_id = make_program_id(*key)
+            while program_id in self.program_keys:
+                logger.warning(f"项目ID冲突: {key} 与 {self.program_keys[program_id]}，顺延分配")
+                program_id += 1
+            self.program_keys[program_id] = key
+            self.program_ids[key] = program_id
+        self.program_aggregates: Dict[int, ProgramAggregate] = {}
+        self.program_stats: Dict[int, Dict] = {}
+        self.university_stats: Dict[str, Dict] = {}
+
+        for university, aggregate in university_aggregates.items():
+            aggregate.finalize()
+            summary = aggregate.summarize()
+            summary["program_count"] = 0
+            self.university_stats[university] = summary
+
+        for program_id, key in self.program_keys.items():
+            aggregate = program_aggregates[key]
+            aggregate.finalize()
+            self.program_aggregates[program_id] = aggregate
+            self.university_stats[key[0]]["program_count"] += 1
+
+            stats = aggregate.summarize()
+            stats.update({
+                "program_id": program_id,
+                "university": key[0],
+                "program": key[1]
+            })
+            self.program_stats[program_id] = stats
+
+        logger.info(f"录取统计已构建: {len(self.university_stats)} 所院校, {len(self.program_stats)} 个项目")
+
+    def get_program_stats(self, program_id: int) -> Optional[Dict]:
+        """获取项目统计（含所属院校汇总）"""
+        stats = self.program_stats.get(program_id)
+        if stats is None:
+            return None
+        return {**stats, "university_stats": self.university_stats[stats["university"]]}
+
+    def get_positioning(self, program_id: int, gpa_4: Optional[float], language_type: Optional[str],
+                        language_score: Optional[float], gre_score: Optional[float]) -> Optional[Dict]:
+        """
+        计算用户成绩在项目录取者中的百分位位置（基于预排序数组二分查找）
+        """
+        aggregate = self.program_aggregates.get(program_id)
+        if aggregate is None:
+            return None
+
+        university, program = self.program_keys[program_id]
+        return {
+            "program_id": program_id,
+            "university": university,
+            "program": program,
+            "case_count": aggregate.case_count,
+            "gpa": percentile_rank(aggregate.gpa_values, gpa_4),
+            "language": percentile_rank(aggregate.language_values.get(language_type, []), language_score),
+            "gre": percentile_rank(aggregate.gre_values, gre_score)
+        }
+
+    def get_program_id(self, university: str, program: str) -> Optional[int]:
+        """根据院校和项目名称查找项目ID"""
+        return self.program_ids.get((university, program))
+
+    def list_programs(self, university: Optional[str] = None) -> List[Dict]:
+        """列出项目及其案例数"""
+        programs = []
+        for program_id, (program_university, program) in self.program_keys.items():
+            if university and program_university != university:
+                continue
+            programs.append({
+                "program_id": program_id,
+                "university": program_university,
+                "program": program,
+                "case_count": self.program_stats[program_id]["case_count"]
+            })
+        return programs
@@ -0,0 +1,163 @@
+"""
+意向筛选索引服务
+随案例快照重建：为每个学位层次的案例记录院校所在国家/地区编号、项目所属专业大类（位掩码）与院校层次等级，
+并为每个国家/地区、专业大类建立位图（numpy 打包位数组）；匹配前按用户的意向国家/地区、意向专业
+对位图取并集后求交，得到候选案例的桶内序号，只为这些案例打分
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.models.case import Case
+from backend.utils.parse_cache import memoized
+from config.target_taxonomy import COUNTRIES, COUNTRY_KEYWORDS, MAJOR_GROUPS, UNIVERSITY_COUNTRIES
+
+logger = logging.getLogger(__name__)
+
+# 无法判断国家/地区的院校
+UNKNOWN_COUNTRY = -1
+
+COUNTRY_IDS = {country: index for index, country in enumerate(COUNTRIES)}
+MAJOR_GROUP_NAMES = list(MAJOR_GROUPS)
+_MAJOR_GROUP_KEYWORDS = [[keyword.lower() for keyword in keywords] for keywords in MAJOR_GROUPS.values()]
+
+
+@memoized('get_country_id')
+def get_country_id(university: str) -> int:
+    """
+    院校所在国家/地区编号（优先查维护的院校映射，其次按名称关键词判断；无法判断时为 UNKNOWN_COUNTRY）
+    """
+    if not university:
+        return UNKNOWN_COUNTRY
+    country = UNIVERSITY_COUNTRIES.get(university.strip())
+    if country is None:
+        for keyword, candidate in COUNTRY_KEYWORDS:
+            if keyword in university:
+                country = candidate
+                break
+    return COUNTRY_IDS.get(country, UNKNOWN_COUNTRY)
+
+
+@memoized('get_major_group_mask')
+def get_major_group_mask(name: str) -> int:
+    """
+    项目名称或意向专业所属专业大类的位掩码（第 i 位对应 MAJOR_GROUP_NAMES[i]，不属于任何大类时为 0）
+    """
+    if not name:
+        return 0
+    text = name.lower()
+    mask = 0
+    for group_id, keywords in enumerate(_MAJOR_GROUP_KEYWORDS):
+        if any(keyword in text for keyword in keywords):
+            mask |= 1 << group_id
+    return mask
+
+
+class DegreeTargetIndex:
+    """单个学位层次的意向筛选索引（按桶内序号）"""
+
+    def __init__(self, cases: List[Case], tier_levels: np.ndarray):
+        self.size = len(cases)
+        self.tier_levels = tier_levels
+        self.country_ids = np.fromiter(
+            (get_country_id(case.university) for case in cases), dtype=np.int16, count=self.size
+        )
+        self.major_group_masks = np.fromiter(
+            (get_major_group_mask(case.program) for case in cases), dtype=np.uint32, count=self.size
+        )
+
+        # 国家/地区编号、专业大类编号 -> 位图（只为出现过的编号建立）
+        self.country_bitsets: Dict[int, np.ndarray] = {
+            int(country_id): np.packbits(self.country_ids == country_id)
+            for country_id in np.unique(self.country_ids) if country_id != UNKNOWN_COUNTRY
+        }
+        self.major_bitsets: Dict[int, np.ndarray] = {}
+        for group_id in range(len(MAJOR_GROUP_NAMES)):
+            members = (self.major_group_masks & (1 << group_id)) != 0
+            if members.any():
+                self.major_bitsets[group_id] = np.packbits(members)
+
+    def union(self, bitsets: Dict[int, np.ndarray], ids: Iterable[int]) -> np.ndarray:
+        """多个编号位图的并集（编号都不存在时为空位图）"""
+        selected = [bitsets[i] for i in ids if i in bitsets]
+        if not selected:
+            return np.zeros((self.size + 7) // 8, dtype=np.uint8)
+        return np.bitwise_or.reduce(selected)
+
+    def select(self, country_ids: List[int], major_group_ids: List[int]) -> Tuple[Optional[np.ndarray], str]:
+        """
+        按意向筛选候选案例，返回 (桶内序号数组, 实际使用的筛选)；
+        同时按国家/地区与专业大类筛选无结果时只按国家/地区筛选，仍无结果时不筛选（序号数组为 None）
+        """
+        country_bits = self.union(self.country_bitsets, country_ids) if country_ids else None
+        major_bits = self.union(self.major_bitsets, major_group_ids) if major_group_ids else None
+
+        attempts = []
+        if country_bits is not None and major_bits is not None:
+            attempts.append(('country+major', country_bits & major_bits))
+        if country_bits is not None:
+            attempts.append(('country', country_bits))
+        elif major_bits is not None:
+            attempts.append(('major', major_bits))
+
+        for applied, bits in attempts:
+            positions = np.flatnonzero(np.unpackbits(bits, count=self.size))
+            if len(positions):
+                return positions, applied
+        return None, 'none'
+
+    def in_tier_levels(self, positions: np.ndarray, tier_levels) -> List[int]:
+        """筛选后的序号中属于指定院校层次等级的部分（升序）"""
+        return positions[np.isin(self.tier_levels[positions], list(tier_levels))].tolist()
+
+    def get_counts(self) -> Dict[str, Dict[str, int]]:
+        """各国家/地区、专业大类的案例数"""
+        return {
+            "countries": {
+                COUNTRIES[country_id]: int(np.unpackbits(bits, count=self.size).sum())
+                for country_id, bits in sorted(self.country_bitsets.items())
+            },
+            "unknown_country": int((self.country_ids == UNKNOWN_COUNTRY).sum()),
+            "major_groups": {
+                MAJOR_GROUP_NAMES[group_id]: int(np.unpackbits(bits, count=self.size).sum())
+                for group_id, bits in sorted(self.major_bitsets.items())
+            },
+            "no_major_group": int((self.major_group_masks == 0).sum()),
+        }
+
+
+class TargetIndex:
+    """按学位层次的意向筛选索引"""
+
+    def __init__(self, buckets: Dict[str, List[Case]], partitions: Dict[Tuple[str, int], List[Tuple[int, Case]]]):
+        tier_levels = {degree: np.zeros(len(cases), dtype=np.int8) for degree, cases in buckets.items()}
+        for (degree, level), entries in partitions.items():
+            tier_levels[degree][[position for position, _ in entries]] = level
+        self.degrees: Dict[str, DegreeTargetIndex] = {
+            degree: DegreeTargetIndex(cases, tier_levels[degree]) for degree, cases in buckets.items()
+        }
+
+    def select(self, degree_level: str, target_countries: Optional[List[str]],
+               target_majors: Optional[List[str]]) -> Tuple[Optional[np.ndarray], str]:
+        """
+        按用户的意向国家/地区（取并集）与意向专业所属大类（取并集）筛选某学位层次的候选案例，
+        返回 (桶内序号数组, 实际使用的筛选)；无法识别的意向不参与筛选
+        """
+        index = self.degrees.get(degree_level)
+        if index is None:
+            return None, 'none'
+        country_ids = sorted({COUNTRY_IDS[country] for country in target_countries or [] if country in COUNTRY_IDS})
+        major_mask = 0
+        for major in target_majors or []:
+            major_mask |= get_major_group_mask(major)
+        major_group_ids = [group_id for group_id in range(len(MAJOR_GROUP_NAMES)) if major_mask & (1 << group_id)]
+        return index.select(country_ids, major_group_ids)
+
+    def get_diagnostics(self) -> Dict[str, Dict]:
+        """各学位层次的国家/地区、专业大类案例数"""
+        return {degree: index.get_counts() for degree, index in self.degrees.items()}
@@ -1,20 +1,107 @@
 """
 数据库连接工具
+主库引擎用于读写；配置了只读副本时，读多的接口通过 get_read_db 按轮询使用健康的副本，
+副本连接出错后暂停使用一段时间，全部不可用时回退到主库；副本上的查询出错时在主库上重试一次
 """
-from sqlalchemy import create_engine
+import itertools
+import logging
+import threading
+import time
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from typing import Dict, List, Optional
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from config.database import TARGET_DATABASE_URL
+from backend.utils.metrics import CallbackMetric
+from config.database import READ_REPLICA_URLS, TARGET_DATABASE_URL
+from config.settings import DB_POOL_CONFIG
+
+logger = logging.getLogger(__name__)
+
+def create_db_engine(url: str) -> Engine:
+    """按连接池配置创建引擎（SQLite 连接需允许在请求线程池中跨线程使用；内存 SQLite 使用单连接池，不做池配置）"""
+    if url.startswith('sqlite'):
+        if url in ('sqlite://', 'sqlite:///:memory:'):
+            return create_engine(url, connect_args={'check_same_thread': False})
+        connect_args = {'check_same_thread': False}
+    else:
+        connect_args = {}
+    return create_engine(
+        url,
+        connect_args=connect_args,
+        pool_size=DB_POOL_CONFIG['pool_size'],
+        max_overflow=DB_POOL_CONFIG['max_overflow'],
+        pool_timeout=DB_POOL_CONFIG['pool_timeout'],
+        pool_recycle=DB_POOL_CONFIG['pool_recycle'],
+        pool_pre_ping=DB_POOL_CONFIG['pool_pre_ping'],
+    )
+
+class ReplicaRouter:
+    """只读副本选择：在健康的副本间轮询；副本连接出错（断开或无法连接）后暂停使用 retry_interval 秒"""
+
+    def __init__(self, engines: List[Engine], retry_interval: float = 30):
+        self.engines = engines
+        self.retry_interval = retry_interval
+        self._counter = itertools.count()
+        self._unhealthy_until: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        for engine in engines:
+            event.listen(engine, 'handle_error', self._handle_error)
+
+    def _handle_error(self, context):
+        if context.is_disconnect or context.connection is None:
+            self.mark_unhealthy(context.engine)
+
+    def mark_unhealthy(self, engine: Engine):
+        with self._lock:
+            self._unhealthy_until[id(engine)] = time.monotonic() + self.retry_interval
+        logger.warning(f"只读副本不可用，{self.retry_interval:g} 秒内不再使用: {engine.url.render_as_string(hide_password=True)}")
+
+    def is_healthy(self, engine: Engine) -> bool:
+        return self._unhealthy_until.get(id(engine), 0) <= time.monotonic()
+
+    def choose(self) -> Optional[Engine]:
+        """下一个健康的副本（没有时返回 None）"""
+        if not self.engines:
+            return None
+        start = next(self._counter)
+        for offset in range(len(self.engines)):
+            engine = self.engines[(start + offset) % len(self.engines)]
+            if self.is_healthy(engine):
+                return engine
+        return None
+
+class ReadSession(Session):
+    """
+    只读会话：info['primary_bind'] 记录主库引擎；绑定只读副本时，查询出错（断开、无法连接、
+    副本上的冲突取消等）后回滚并改绑主库重试一次，不把副本故障暴露给调用方
+    """
+
+    def execute(self, statement, *args, **kwargs):
+        try:
+            return super().execute(statement, *args, **kwargs)
+        except DBAPIError as e:
+            primary_bind = self.info.get('primary_bind')
+            if primary_bind is None or self.bind is primary_bind:
+                raise
+            logger.warning(f"只读副本查询失败，改在主库重试: {e}")
+            self.rollback()
+            self.bind = primary_bind
+            return super().execute(statement, *args, **kwargs)
 
 # 创建数据库引擎
-engine = create_engine(TARGET_DATABASE_URL)
+engine = create_db_engine(TARGET_DATABASE_URL)
+replica_router = ReplicaRouter([create_db_engine(url) for url in READ_REPLICA_URLS],
+                               DB_POOL_CONFIG['replica_retry_interval'])
 
 # 创建会话工厂
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(class_=ReadSession, autocommit=False, autoflush=False, info={'primary_bind': engine})
 
 # 创建基础模型类
 Base = declarative_base()
@@ -27,7 +114,62 @@ def get_db():
     finally:
         db.close()
 
+def get_read_db():
+    """获取只读数据库会话（轮询健康的只读副本，未配置或全部不可用时使用主库；副本查询出错时在主库重试）"""
+    db = ReadSessionLocal(bind=replica_router.choose() or engine)
+    try:
+        yield db
+    finally:
+        db.close()
+
+def _database_engines() -> Dict[str, Engine]:
+    engines = {'primary': engine}
+    for index, replica in enumerate(replica_router.engines, 1):
+        engines[f'replica_{index}'] = replica
+    return engines
+
+def get_pool_stats() -> Dict[str, Dict[str, int]]:
+    """各连接池状态：池大小、已借出、空闲与溢出连接数（非 QueuePool 的连接池不统计）"""
+    stats = {}
+    for name, db_engine in _database_engines().items():
+        pool = db_engine.pool
+        if not hasattr(pool, 'checkedout'):
+            continue
+        stats[name] = {
+            'size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'checked_in': pool.checkedin(),
+            'overflow': max(pool.overflow(), 0),
+        }
+    return stats
+
+def get_pool_diagnostics() -> Dict[str, Dict]:
+    """连接池诊断信息：数据库类型与库名（不含主机、端口与账号）、副本健康状态与连接池状态"""
+    stats = get_pool_stats()
+    return {
+        name: {
+            'backend': db_engine.url.get_backend_name(),
+            'database': os.path.basename(db_engine.url.database or ''),
+            'healthy': name == 'primary' or replica_router.is_healthy(db_engine),
+            'pool': stats.get(name),
+        }
+        for name, db_engine in _database_engines().items()
+    }
+
+def _pool_connections():
+    return {
+        (database, state): value
+        for database, stats in get_pool_stats().items()
+        for state, value in stats.items()
+    }
+
+CallbackMetric('db_pool_connections', '数据库连接池的连接数', _pool_connections, ('database', 'state'))
+CallbackMetric('db_replica_healthy', '只读副本是否可用（1 可用，0 暂停使用）',
+               lambda: {(f'replica_{index}',): int(replica_router.is_healthy(replica))
+                        for index, replica in enumerate(replica_router.engines, 1)},
+               ('database',))
+
 def create_tables():
     """创建所有表"""
     from backend.models.case import Base
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    Base.metadata.create_all(bind=engine)
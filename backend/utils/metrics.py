@@ -0,0 +1,252 @@
+"""
+Prometheus 兼容指标
+计数器与直方图按线程分片累计：每个线程只写自己的分片（无锁），抓取时再汇总各分片，
+记录指标不会在热路径上引入锁竞争；线程结束后其分片在下次抓取或新线程登记时并入汇总分片，
+分片数不随线程更替增长；仪表盘类指标（连接池占用、快照年龄等）在抓取时通过回调读取。
+输出 Prometheus 文本格式（0.0.4），由 /metrics 接口提供，ETL 运行结束后写入文本文件
+"""
+import bisect
+import math
+import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# 耗时直方图的默认桶（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+class Metric:
+    """指标基类：按线程分片保存 {标签值元组: 数据}"""
+
+    type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 registry: Optional['Registry'] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        # (所属线程的弱引用, 分片)；已结束线程的分片并入 _retired
+        self._shards: List[Tuple[weakref.ref, Dict[Tuple, object]]] = []
+        self._retired: Dict[Tuple, object] = {}
+        self._shards_lock = threading.Lock()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _shard(self) -> Dict[Tuple, object]:
+        """当前线程的分片（每个线程首次写入时登记一次，之后无锁）"""
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._retire_dead_shards()
+                self._shards.append((weakref.ref(threading.current_thread()), shard))
+            return shard
+
+    def _retire_dead_shards(self):
+        """将已结束线程的分片并入汇总分片（需持有 _shards_lock；线程结束后不会再写入其分片）"""
+        live = []
+        for thread_ref, shard in self._shards:
+            thread = thread_ref()
+            if thread is not None and thread.is_alive():
+                live.append((thread_ref, shard))
+            else:
+                self._merge(self._retired, shard)
+        self._shards = live
+
+    def _snapshots(self) -> List[Dict[Tuple, object]]:
+        with self._shards_lock:
+            self._retire_dead_shards()
+            retired = dict(self._retired)
+            shards = [shard for _, shard in self._shards]
+        # 复制分片后再汇总，避免遍历时其他线程新增标签组合
+        return [retired] + [dict(shard) for shard in shards]
+
+    def _merge(self, totals: Dict[Tuple, object], shard: Dict[Tuple, object]):
+        """将分片累加到 totals（生成新值，不修改 totals 中已有的对象）"""
+        raise NotImplementedError
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        """(样本名, 标签串, 值)"""
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(f"{name}{labels} {_format_value(value)}" for name, labels, value in self.samples())
+        return '\n'.join(lines) + '\n'
+
+
+class Counter(Metric):
+    """单调递增的计数器"""
+
+    type = 'counter'
+
+    def inc(self, amount: float = 1.0, labels: Tuple = ()):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0.0) + amount
+
+    def _merge(self, totals, shard):
+        for labels, value in shard.items():
+            totals[labels] = totals.get(labels, 0.0) + value
+
+    def values(self) -> Dict[Tuple, float]:
+        totals: Dict[Tuple, float] = {}
+        for shard in self._snapshots():
+            self._merge(totals, shard)
+        return totals
+
+    def samples(self):
+        for labels, value in sorted(self.values().items()):
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+
+class Histogram(Metric):
+    """直方图：各桶计数（输出时累积）、总和与次数"""
+
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS, registry: Optional['Registry'] = None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value: float, labels: Tuple = ()):
+        shard = self._shard()
+        data = shard.get(labels)
+        if data is None:
+            # [各桶计数（最后一个为 +Inf）..., 总和]
+            data = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        data[bisect.bisect_left(self.buckets, value)] += 1
+        data[-1] += value
+
+    @contextmanager
+    def time(self, labels: Tuple = ()):
+        """记录代码块的耗时（秒）"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, labels)
+
+    def _merge(self, totals, shard):
+        for labels, data in shard.items():
+            data = list(data)
+            total = totals.get(labels)
+            totals[labels] = data if total is None else [a + b for a, b in zip(total, data)]
+
+    def values(self) -> Dict[Tuple, List[float]]:
+        totals: Dict[Tuple, List[float]] = {}
+        for shard in self._snapshots():
+            self._merge(totals, shard)
+        return totals
+
+    def samples(self):
+        bucket_labels = self.labelnames + ('le',)
+        for labels, data in sorted(self.values().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), data[:-1]):
+                cumulative += count
+                yield f"{self.name}_bucket", _format_labels(bucket_labels, labels + (_format_value(bound),)), cumulative
+            yield f"{self.name}_sum", _format_labels(self.labelnames, labels), data[-1]
+            yield f"{self.name}_count", _format_labels(self.labelnames, labels), cumulative
+
+
+class Gauge(Metric):
+    """可设置为任意值的仪表盘（后写入的值覆盖先前的值）"""
+
+    type = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 registry: Optional['Registry'] = None):
+        super().__init__(name, documentation, labelnames, registry)
+        self._values: Dict[Tuple, float] = {}
+
+    def set(self, value: float, labels: Tuple = ()):
+        self._values[labels] = value
+
+    def samples(self):
+        for labels, value in sorted(dict(self._values).items()):
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+
+class CallbackMetric(Metric):
+    """抓取时通过回调读取的指标：回调返回数值，或 {标签值元组: 数值}；回调失败或返回 None 时不输出"""
+
+    def __init__(self, name: str, documentation: str, callback: Callable, labelnames: Sequence[str] = (),
+                 type: str = 'gauge', registry: Optional['Registry'] = None):
+        self.callback = callback
+        self.type = type
+        super().__init__(name, documentation, labelnames, registry)
+
+    def samples(self):
+        try:
+            values = self.callback()
+        except Exception:
+            return
+        if values is None:
+            return
+        if not isinstance(values, dict):
+            values = {(): values}
+        for labels, value in sorted(values.items()):
+            if value is not None:
+                yield self.name, _format_labels(self.labelnames, labels), value
+
+
+class Registry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"指标已注册: {metric.name}")
+            self._metrics[metric.name] = metric
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Prometheus 文本格式"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return ''.join(metric.render() for metric in metrics)
+
+    def write_textfile(self, path: str):
+        """写入文本文件（node_exporter textfile 收集器格式，先写临时文件再替换）"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(temp_path, path)
+
+
+# 全局注册表
+REGISTRY = Registry()
@@ -0,0 +1,95 @@
+"""
+解析结果缓存
+GPA、语言成绩、院校名称等源值在案例中大量重复，对这类纯函数解析使用有界 LRU 缓存；
+ETL 处理器与匹配服务共用，按名称登记后可统计各缓存的命中率
+"""
+import functools
+from typing import Callable, Dict, Iterable, Optional
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.utils.metrics import CallbackMetric
+from config.settings import PARSER_CACHE_CONFIG
+
+# 已登记的缓存：名称 -> lru_cache 包装后的函数
+_caches: Dict[str, Callable] = {}
+
+
+def memoize(func: Callable, name: Optional[str] = None, maxsize: Optional[int] = None) -> Callable:
+    """
+    为纯函数加上有界 LRU 缓存（参数需可哈希，返回值不可变），并按名称登记以便统计命中率
+    maxsize 为 0 时不缓存（仅计数），可用于对比测试；原函数可通过 __wrapped__ 访问
+    """
+    if maxsize is None:
+        maxsize = PARSER_CACHE_CONFIG['maxsize']
+    cached = functools.lru_cache(maxsize=maxsize)(func)
+    _caches[name or func.__qualname__] = cached
+    return cached
+
+
+def memoized(name: Optional[str] = None, maxsize: Optional[int] = None) -> Callable:
+    """memoize 的装饰器形式"""
+    def decorator(func: Callable) -> Callable:
+        return memoize(func, name, maxsize)
+    return decorator
+
+
+def parser_cache_stats() -> Dict[str, Dict[str, int]]:
+    """当前进程中各缓存的累计命中、未命中次数与条目数"""
+    stats = {}
+    for name, cached in _caches.items():
+        info = cached.cache_info()
+        stats[name] = {'hits': info.hits, 'misses': info.misses, 'size': info.currsize}
+    return stats
+
+
+def _parser_cache_requests() -> Dict[tuple, int]:
+    values = {}
+    for name, stats in parser_cache_stats().items():
+        values[(name, 'hit')] = stats['hits']
+        values[(name, 'miss')] = stats['misses']
+    return values
+
+
+CallbackMetric('parser_cache_requests_total', '解析结果缓存的命中/未命中次数', _parser_cache_requests,
+               ('cache', 'result'), type='counter')
+
+
+def clear_parser_caches():
+    """清空所有缓存及其计数"""
+    for cached in _caches.values():
+        cached.cache_clear()
+
+
+def diff_cache_stats(after: Dict[str, Dict[str, int]], before: Dict[str, Dict[str, int]]) -> Dict[str, Dict[str, int]]:
+    """两次统计之间的命中、未命中次数（条目数取 after）"""
+    diff = {}
+    for name, stats in after.items():
+        previous = before.get(name, {'hits': 0, 'misses': 0})
+        diff[name] = {
+            'hits': stats['hits'] - previous['hits'],
+            'misses': stats['misses'] - previous['misses'],
+            'size': stats['size'],
+        }
+    return diff
+
+
+def merge_cache_stats(snapshots: Iterable[Dict[str, Dict[str, int]]]) -> Dict[str, Dict]:
+    """合并多个进程的缓存统计并计算命中率，省略没有查询的缓存"""
+    merged: Dict[str, Dict] = {}
+    for snapshot in snapshots:
+        for name, stats in snapshot.items():
+            total = merged.setdefault(name, {'hits': 0, 'misses': 0, 'size': 0})
+            total['hits'] += stats['hits']
+            total['misses'] += stats['misses']
+            total['size'] += stats['size']
+
+    for name in list(merged):
+        total = merged[name]
+        lookups = total['hits'] + total['misses']
+        if not lookups:
+            del merged[name]
+            continue
+        total['hit_rate'] = round(total['hits'] / lookups, 4)
+    return merged
@@ -0,0 +1,151 @@
+"""
+运行时性能剖析工具
+StackSampler：后台线程按固定间隔采集其他线程（事件循环与线程池线程）的 Python 调用栈，累计为折叠栈；
+AllocationSampler：基于 tracemalloc 记录一段时间内的内存分配，按分配位置统计并输出以字节数加权的折叠栈。
+折叠栈为 py-spy --format raw 格式，可直接用 flamegraph.pl、speedscope 绘制火焰图。
+供 /debug/profile 接口在线上进程中按需剖析，也供 ETL 基准测试的采样分析使用
+"""
+import os
+import sys
+import threading
+import tracemalloc
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+# 热点函数中不计入的空闲等待（锁/条件等待、事件循环的 select）
+IDLE_FUNCTIONS = {"<method 'acquire' of '_thread.lock' objects>", 'wait', 'select'}
+IDLE_MODULES = {'threading.py', 'selectors.py', 'queue.py'}
+
+# 同一时刻只允许一个剖析会话（两个采样器同时运行会相互计入）
+profile_lock = threading.Lock()
+
+
+def is_idle_frame(name: str, filename: str) -> bool:
+    """栈顶是否为空闲等待"""
+    return name in IDLE_FUNCTIONS or os.path.basename(filename) in IDLE_MODULES
+
+
+def _relpath(filename: str) -> str:
+    try:
+        return os.path.relpath(filename)
+    except ValueError:
+        return filename
+
+
+class StackSampler:
+    """
+    采样分析器：后台线程按固定间隔采集其他线程的 Python 调用栈，按折叠栈格式累计
+    （每行 "thread (名称);函数 (文件:行号);... 次数"）
+    """
+
+    def __init__(self, interval: float = 0.005, is_idle: Callable[[str, str], bool] = is_idle_frame,
+                 name: str = 'stack-sampler'):
+        self.interval = interval
+        self.is_idle = is_idle
+        self.stacks: Dict[str, int] = defaultdict(int)
+        # 热点函数：(函数, 文件) -> 位于栈顶的采样次数（空闲等待不计入）
+        self.leaf_samples: Dict[tuple, int] = defaultdict(int)
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                leaf = (frame.f_code.co_name, _relpath(frame.f_code.co_filename))
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({_relpath(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(f"thread ({names.get(thread_id, thread_id)})")
+                self.stacks[';'.join(reversed(stack))] += 1
+                self.samples += 1
+                if not self.is_idle(*leaf):
+                    self.leaf_samples[leaf] += 1
+
+    def collapsed(self) -> str:
+        """折叠栈文本"""
+        return ''.join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+    def save(self, path: str):
+        """保存折叠栈"""
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.collapsed())
+
+    def hot_functions(self, top: int) -> List[Dict]:
+        """按栈顶采样次数排序的热点函数"""
+        busy = sum(self.leaf_samples.values())
+        ranked = sorted(self.leaf_samples.items(), key=lambda item: -item[1])[:top]
+        return [
+            {'function': f"{name} ({filename})", 'samples': count, 'share': round(count / busy, 4)}
+            for (name, filename), count in ranked
+        ]
+
+
+class AllocationSampler:
+    """
+    内存分配剖析：start() 时开始 tracemalloc 跟踪（已在跟踪时沿用）并记录快照，stop() 时再取快照；
+    统计两次快照之间各分配位置的内存增量，以及结束时仍存活的分配的调用栈
+    """
+
+    # 不计入统计的分配（tracemalloc 自身、导入机制）
+    FILTERS = (
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+        tracemalloc.Filter(False, '<unknown>'),
+    )
+
+    def __init__(self, nframes: int = 25):
+        self.nframes = nframes
+        self._started_tracing = False
+        self._before: Optional[tracemalloc.Snapshot] = None
+        self._after: Optional[tracemalloc.Snapshot] = None
+        self.peak_bytes = 0
+
+    def start(self):
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start(self.nframes)
+        tracemalloc.reset_peak()
+        self._before = tracemalloc.take_snapshot().filter_traces(self.FILTERS)
+
+    def stop(self):
+        self._after = tracemalloc.take_snapshot().filter_traces(self.FILTERS)
+        self.peak_bytes = tracemalloc.get_traced_memory()[1]
+        if self._started_tracing:
+            tracemalloc.stop()
+
+    def top_allocations(self, top: int) -> List[Dict]:
+        """按内存增量排序的分配位置"""
+        allocations = []
+        for stat in self._after.compare_to(self._before, 'lineno')[:top]:
+            frame = stat.traceback[0]
+            allocations.append({
+                'location': f"{_relpath(frame.filename)}:{frame.lineno}",
+                'size_kb': round(stat.size / 1024, 1),
+                'size_diff_kb': round(stat.size_diff / 1024, 1),
+                'count_diff': stat.count_diff,
+            })
+        return allocations
+
+    def collapsed(self) -> str:
+        """结束时仍存活的分配的折叠栈（按字节数加权）"""
+        stacks: Dict[str, int] = defaultdict(int)
+        for stat in self._after.statistics('traceback'):
+            # 调用栈按从外到内排列
+            stack = ';'.join(f"{_relpath(frame.filename)}:{frame.lineno}" for frame in stat.traceback)
+            stacks[stack] += stat.size
+        return ''.join(f"{stack} {size}\n" for stack, size in sorted(stacks.items()))
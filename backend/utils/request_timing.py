@@ -0,0 +1,183 @@
+"""
+请求阶段计时工具
+在热路径上用单调时钟记录各阶段耗时（快照、打分、构建响应、提示词、LLM调用、解析等），
+通过 Server-Timing 响应头与结构化日志字段输出；超过阈值的慢请求按采样率写入慢请求日志（含完整阶段明细）
+"""
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.utils.metrics import Histogram
+from config.settings import REQUEST_TIMING_CONFIG
+
+logger = logging.getLogger(__name__)
+
+HTTP_REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', '接口请求耗时（秒）', ('method', 'endpoint', 'status')
+)
+
+
+class RequestTiming:
+    """单个请求的阶段耗时（同名阶段多次出现时累加）"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans: Dict[str, float] = {}
+
+    def add(self, name: str, seconds: float):
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def spans_ms(self) -> Dict[str, float]:
+        return {name: round(seconds * 1000, 2) for name, seconds in self.spans.items()}
+
+    def header_value(self, total_seconds: float) -> str:
+        """Server-Timing 头：各阶段及总耗时（毫秒）"""
+        items = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.spans.items()]
+        items.append(f"total;dur={total_seconds * 1000:.2f}")
+        return ', '.join(items)
+
+
+# 当前请求的计时（由中间件设置；同步接口在线程池中运行时随上下文复制）
+_current_timing: ContextVar[Optional[RequestTiming]] = ContextVar('request_timing', default=None)
+
+
+def get_current_timing() -> Optional[RequestTiming]:
+    """获取当前请求的计时（不在请求中时为 None）"""
+    return _current_timing.get()
+
+
+@contextmanager
+def timed(name: str):
+    """记录一个阶段的耗时；不在请求中（脚本、基准测试）时不做任何事"""
+    timing = _current_timing.get()
+    if timing is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(name, time.perf_counter() - started)
+
+
+class SlowRequestLog:
+    """慢请求日志：按采样率记录超过阈值的请求，追加到 JSON Lines 文件并保留最近若干条"""
+
+    def __init__(self, threshold_ms: float, sample_rate: float = 1.0, path: Optional[str] = None,
+                 max_recent: int = 100):
+        self.threshold_ms = threshold_ms
+        self.sample_rate = sample_rate
+        self.path = path
+        self.recent = deque(maxlen=max_recent)
+        self.slow_count = 0
+        self.logged_count = 0
+        self._lock = threading.Lock()
+
+    def record(self, entry: Dict) -> bool:
+        """记录一个请求，返回是否写入了慢请求日志"""
+        if entry['duration_ms'] < self.threshold_ms:
+            return False
+        with self._lock:
+            self.slow_count += 1
+            if random.random() >= self.sample_rate:
+                return False
+            self.logged_count += 1
+            self.recent.append(entry)
+            if self.path:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        logger.warning(f"慢请求 {entry['method']} {entry['path']} {entry['duration_ms']:.1f}ms: {entry['spans']}")
+        return True
+
+    def get_diagnostics(self) -> Dict:
+        """慢请求统计与最近的记录"""
+        with self._lock:
+            return {
+                "threshold_ms": self.threshold_ms,
+                "sample_rate": self.sample_rate,
+                "slow_count": self.slow_count,
+                "logged_count": self.logged_count,
+                "recent": list(self.recent),
+            }
+
+
+class RequestTimingMiddleware:
+    """
+    ASGI 中间件：为每个 HTTP 请求建立计时上下文，在响应开始时写入 Server-Timing 头，
+    请求结束后以结构化字段（extra['request_timing']）输出日志并交给慢请求日志
+    """
+
+    def __init__(self, app, slow_log: Optional['SlowRequestLog'] = None, paths: Optional[List[str]] = None):
+        self.app = app
+        self.slow_log = slow_log
+        # 只为这些路径前缀计时（None 表示全部）
+        self.paths = tuple(paths) if paths else None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or (self.paths and not scope['path'].startswith(self.paths)):
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming()
+        token = _current_timing.set(timing)
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+                headers = list(message.get('headers', []))
+                headers.append((b'server-timing', timing.header_value(timing.elapsed()).encode('latin-1')))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_timing.reset(token)
+            self.finish(scope, timing, status_code)
+
+    def finish(self, scope, timing: RequestTiming, status_code: int):
+        """记录接口耗时指标，输出结构化耗时日志并记录慢请求"""
+        duration = timing.elapsed()
+        # 指标按路由模板（如 /api/v1/programs/{program_id}/stats）聚合，未匹配路由的请求归为一类
+        route = scope.get('route')
+        endpoint = getattr(route, 'path', None) or 'unmatched'
+        HTTP_REQUEST_DURATION.observe(duration, (scope['method'], endpoint, str(status_code)))
+
+        entry = {
+            "method": scope['method'],
+            "path": scope['path'],
+            "status": status_code,
+            "duration_ms": round(duration * 1000, 2),
+            "spans": timing.spans_ms(),
+            "timestamp": time.time(),
+        }
+        logger.info(f"{entry['method']} {entry['path']} {status_code} {entry['duration_ms']:.1f}ms",
+                    extra={"request_timing": entry})
+        if self.slow_log is not None:
+            self.slow_log.record(entry)
+
+
+# 全局慢请求日志
+slow_request_log = SlowRequestLog(
+    REQUEST_TIMING_CONFIG['slow_threshold_ms'],
+    REQUEST_TIMING_CONFIG['slow_sample_rate'],
+    REQUEST_TIMING_CONFIG['slow_log_file'],
+)
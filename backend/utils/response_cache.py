@@ -0,0 +1,153 @@
+"""
+响应缓存工具
+为只读接口缓存序列化后的响应体（含预压缩的 gzip/br 版本），按数据版本失效，支持强 ETag 与 304 协商；
+ETag 由响应体摘要生成，版本变化但响应体不变时沿用原条目（ETag 不变，不重新压缩）
+"""
+import gzip
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+from fastapi import Request, Response
+
+from backend.utils.metrics import CallbackMetric, Counter, Registry
+
+try:
+    import brotli
+except ImportError:  # 未安装 brotli 时仅提供 gzip 压缩
+    brotli = None
+
+# 小于该长度的响应体不做压缩
+MIN_COMPRESS_SIZE = 512
+
+
+class CachedResponse:
+    """缓存的响应体及其预压缩版本"""
+
+    def __init__(self, body: bytes, media_type: str, version: Any):
+        self.version = version
+        self.media_type = media_type
+        self.digest = hashlib.sha1(body).hexdigest()
+        self.bodies: Dict[str, bytes] = {"identity": body}
+
+        if len(body) >= MIN_COMPRESS_SIZE:
+            self.bodies["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+            if brotli is not None:
+                self.bodies["br"] = brotli.compress(body)
+
+    def get_etag(self, encoding: str = "identity") -> str:
+        """强 ETag：不同内容编码的表示使用不同的 ETag"""
+        if encoding == "identity":
+            return f'"{self.digest}"'
+        return f'"{self.digest}-{encoding}"'
+
+    def choose_encoding(self, accept_encoding: str) -> str:
+        """根据 Accept-Encoding 选择可用的最佳编码"""
+        accepted = set()
+        for item in accept_encoding.split(','):
+            parts = item.strip().split(';')
+            coding = parts[0].strip().lower()
+            if any(param.strip().replace(' ', '') in ('q=0', 'q=0.0') for param in parts[1:]):
+                continue
+            accepted.add(coding)
+
+        for encoding in ("br", "gzip"):
+            if encoding in self.bodies and (encoding in accepted or '*' in accepted):
+                return encoding
+        return "identity"
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """判断 If-None-Match 是否命中当前 ETag"""
+        if not if_none_match:
+            return False
+        etags = {self.get_etag(encoding) for encoding in self.bodies}
+        candidates = [tag.strip() for tag in if_none_match.split(',')]
+        return '*' in candidates or any(tag.removeprefix('W/') in etags for tag in candidates)
+
+
+class ResponseCache:
+    """按 (键, 版本) 缓存的响应集合"""
+
+    def __init__(self):
+        self._entries: Dict[str, CachedResponse] = {}
+        self._lock = threading.Lock()
+        # 命中/未命中计数（按线程分片，命中路径上不加锁）
+        self._requests = Counter('response_cache_requests_total', '响应缓存的命中/未命中次数', ('result',),
+                                 registry=Registry())
+
+    @property
+    def hits(self) -> int:
+        return int(self._requests.values().get(('hit',), 0))
+
+    @property
+    def misses(self) -> int:
+        return int(self._requests.values().get(('miss',), 0))
+
+    def get(self, key: str, version: Any, build: Callable[[], Tuple[bytes, str]]) -> CachedResponse:
+        """
+        获取缓存条目，不存在或版本变化时调用 build() 重新生成
+        build 返回 (响应体, 媒体类型)；重新生成的响应体与原条目相同时沿用原条目，只更新版本
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry.version == version:
+            self._requests.inc(labels=('hit',))
+            return entry
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != version:
+                self._requests.inc(labels=('miss',))
+                body, media_type = build()
+                if entry is not None and entry.media_type == media_type \
+                        and entry.digest == hashlib.sha1(body).hexdigest():
+                    entry.version = version
+                else:
+                    entry = CachedResponse(body, media_type, version)
+                    self._entries[key] = entry
+            else:
+                self._requests.inc(labels=('hit',))
+        return entry
+
+    def respond(self, request: Request, key: str, version: Any, build: Callable[[], Tuple[bytes, str]],
+                cache_control: str = "no-cache") -> Response:
+        """
+        生成缓存响应：命中 If-None-Match 时返回 304，否则返回按 Accept-Encoding 选择的预压缩响应体
+        """
+        entry = self.get(key, version, build)
+        encoding = entry.choose_encoding(request.headers.get("accept-encoding", ""))
+        headers = {
+            "ETag": entry.get_etag(encoding),
+            "Cache-Control": cache_control,
+            "Vary": "Accept-Encoding"
+        }
+
+        if entry.matches(request.headers.get("if-none-match")):
+            return Response(status_code=304, headers=headers)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(content=entry.bodies[encoding], media_type=entry.media_type, headers=headers)
+
+    def respond_json(self, request: Request, key: str, version: Any, build: Callable[[], Any],
+                     cache_control: str = "no-cache") -> Response:
+        """生成 JSON 缓存响应，build() 返回可序列化的数据"""
+        return self.respond(
+            request, key, version,
+            lambda: (json.dumps(build(), ensure_ascii=False).encode("utf-8"), "application/json"),
+            cache_control
+        )
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+
+# 全局响应缓存
+response_cache = ResponseCache()
+
+CallbackMetric(
+    'response_cache_requests_total', '响应缓存的命中/未命中次数',
+    lambda: {('hit',): response_cache.hits, ('miss',): response_cache.misses},
+    ('result',), type='counter'
+)
@@ -0,0 +1,62 @@
+"""
+自动补全别名配置
+维护常见院校、专业的英文名称、缩写及拼音别名，用于服务端前缀检索
+"""
+
+# 院校别名：院校名称 -> 英文名 / 缩写 / 拼音
+# 英文缩写只归属一所院校；拼音首字母可能重名（如 tjdx 同时对应天津大学与同济大学），检索时都会返回、按案例频次排序
+UNIVERSITY_ALIASES = {
+    '清华大学': ['Tsinghua University', 'THU', 'qinghuadaxue', 'qhdx'],
+    '北京大学': ['Peking University', 'PKU', 'beijingdaxue', 'bjdx'],
+    '复旦大学': ['Fudan University', 'FDU', 'fudandaxue', 'fddx'],
+    '上海交通大学': ['Shanghai Jiao Tong University', 'SJTU', 'shanghaijiaotongdaxue', 'shjtdx'],
+    '浙江大学': ['Zhejiang University', 'ZJU', 'zhejiangdaxue', 'zjdx'],
+    '中国科学技术大学': ['University of Science and Technology of China', 'USTC', 'zhongguokexuejishudaxue', 'zgkxjsdx'],
+    '南京大学': ['Nanjing University', 'NJU', 'nanjingdaxue', 'njdx'],
+    '哈尔滨工业大学': ['Harbin Institute of Technology', 'HIT', 'haerbingongyedaxue', 'hebgydx'],
+    '西安交通大学': ["Xi'an Jiaotong University", 'XJTU', 'xianjiaotongdaxue', 'xajtdx'],
+    '中山大学': ['Sun Yat-sen University', 'SYSU', 'zhongshandaxue', 'zsdx'],
+    '华南理工大学': ['South China University of Technology', 'SCUT', 'huananligongdaxue', 'hnlgdx'],
+    '山东大学': ['Shandong University', 'SDU', 'shandongdaxue', 'sddx'],
+    '华中科技大学': ['Huazhong University of Science and Technology', 'HUST', 'huazhongkejidaxue', 'hzkjdx'],
+    '大连理工大学': ['Dalian University of Technology', 'DUT', 'dalianligongdaxue', 'dllgdx'],
+    '北京理工大学': ['Beijing Institute of Technology', 'BIT', 'beijingligongdaxue', 'bjlgdx'],
+    '天津大学': ['Tianjin University', 'TJU', 'tianjindaxue', 'tjdx'],
+    '东南大学': ['Southeast University', 'SEU', 'dongnandaxue', 'dndx'],
+    '华东师范大学': ['East China Normal University', 'ECNU', 'huadongshifandaxue', 'hdsfdx'],
+    '中南大学': ['Central South University', 'CSU', 'zhongnandaxue', 'zndx'],
+    '西北工业大学': ['Northwestern Polytechnical University', 'NWPU', 'xibeigongyedaxue', 'xbgydx'],
+    '同济大学': ['Tongji University', 'tongjidaxue', 'tjdx'],
+    '厦门大学': ['Xiamen University', 'XMU', 'xiamendaxue', 'xmdx'],
+    '北京航空航天大学': ['Beihang University', 'BUAA', 'beijinghangkonghangtiandaxue', 'bjhkhtdx'],
+    '重庆大学': ['Chongqing University', 'CQU', 'chongqingdaxue', 'cqdx'],
+    '四川大学': ['Sichuan University', 'SCU', 'sichuandaxue', 'scdx'],
+    '电子科技大学': ['University of Electronic Science and Technology of China', 'UESTC', 'dianzikejidaxue', 'dzkjdx'],
+    '武汉大学': ['Wuhan University', 'WHU', 'wuhandaxue', 'whdx'],
+    '中国人民大学': ['Renmin University of China', 'RUC', 'zhongguorenmindaxue', 'zgrmdx'],
+    '南开大学': ['Nankai University', 'NKU', 'nankaidaxue', 'nkdx'],
+    '北京邮电大学': ['Beijing University of Posts and Telecommunications', 'BUPT', 'beijingyoudiandaxue', 'bjyddx'],
+    '上海财经大学': ['Shanghai University of Finance and Economics', 'SUFE', 'shanghaicaijingdaxue', 'shcjdx'],
+    '中央财经大学': ['Central University of Finance and Economics', 'CUFE', 'zhongyangcaijingdaxue', 'zycjdx'],
+    '对外经济贸易大学': ['University of International Business and Economics', 'UIBE', 'duiwaijingjimaoyidaxue', 'dwjjmydx'],
+}
+
+# 专业别名：专业名称 -> 英文名 / 缩写 / 拼音
+MAJOR_ALIASES = {
+    '计算机科学与技术': ['Computer Science', 'CS', 'jisuanjikexueyujishu', 'jsjkxyjs'],
+    '软件工程': ['Software Engineering', 'SE', 'ruanjiangongcheng', 'rjgc'],
+    '电子信息工程': ['Electronic Information Engineering', 'EIE', 'dianzixinxigongcheng', 'dzxxgc'],
+    '数据科学与大数据技术': ['Data Science', 'DS', 'shujukexueyudashujujishu', 'sjkxydsjjs'],
+    '人工智能': ['Artificial Intelligence', 'AI', 'rengongzhineng', 'rgzn'],
+    '机械工程': ['Mechanical Engineering', 'ME', 'jixiegongcheng', 'jxgc'],
+    '土木工程': ['Civil Engineering', 'CE', 'tumugongcheng', 'tmgc'],
+    '金融学': ['Finance', 'jinrongxue', 'jrx'],
+    '会计学': ['Accounting', 'kuaijixue', 'kjx'],
+    '经济学': ['Economics', 'jingjixue', 'jjx'],
+    '国际经济与贸易': ['International Economics and Trade', 'guojijingjiyumaoyi', 'gjjjymy'],
+    '工商管理': ['Business Administration', 'gongshangguanli', 'gsgl'],
+    '市场营销': ['Marketing', 'shichangyingxiao', 'scyx'],
+    '数学与应用数学': ['Mathematics', 'shuxueyuyingyongshuxue', 'sxyyysx'],
+    '英语': ['English', 'yingyu', 'yy'],
+    '法学': ['Law', 'faxue', 'fx'],
+}
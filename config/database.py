@@ -27,4 +27,8 @@ TARGET_DB_CONFIG = {
 # SQLAlchemy 连接字符串
 SOURCE_DATABASE_URL = f"postgresql://{SOURCE_DB_CONFIG['user']}:{SOURCE_DB_CONFIG['password']}@{SOURCE_DB_CONFIG['host']}:{SOURCE_DB_CONFIG['port']}/{SOURCE_DB_CONFIG['database']}"
 
-TARGET_DATABASE_URL = f"postgresql://{TARGET_DB_CONFIG['user']}:{TARGET_DB_CONFIG['password']}@{TARGET_DB_CONFIG['host']}:{TARGET_DB_CONFIG['port']}/{TARGET_DB_CONFIG['database']}"
\ No newline at end of file
+# 可通过 TARGET_DATABASE_URL 指向其他数据库（如压测时使用本地 SQLite 文件 sqlite:///data/loadtest.db）
+TARGET_DATABASE_URL = os.getenv('TARGET_DATABASE_URL') or f"postgresql://{TARGET_DB_CONFIG['user']}:{TARGET_DB_CONFIG['password']}@{TARGET_DB_CONFIG['host']}:{TARGET_DB_CONFIG['port']}/{TARGET_DB_CONFIG['database']}"
+
+# 只读副本连接字符串（逗号分隔，可为空）：读多的接口（匹配、自动补全、案例数）轮询使用，全部不可用时回退到主库
+READ_REPLICA_URLS = [url.strip() for url in os.getenv('READ_REPLICA_URLS', '').split(',') if url.strip()]
\ No newline at end of file
@@ -19,6 +19,7 @@ DEBUG = os.getenv('DEBUG', 'True').lower() == 'true'
 # 匹配算法配置
 MATCHING_CONFIG = {
     'max_cases': 20,  # 返回的最大案例数
+    'target_filter': os.getenv('MATCHING_TARGET_FILTER', 'True').lower() == 'true',  # 按意向国家/地区与意向专业筛选候选案例
     'weights': {
         'school_tier': 30,  # 院校层次权重
         'gpa': 25,          # GPA权重
@@ -26,4 +27,68 @@ MATCHING_CONFIG = {
         'language': 15,     # 语言成绩权重
         'gre': 10,          # GRE权重
     }
-}
\ No newline at end of file
+}
+
+# 数据库连接池配置（主库与每个只读副本各自一个连接池）
+DB_POOL_CONFIG = {
+    'pool_size': int(os.getenv('DB_POOL_SIZE', 5)),  # 常驻连接数
+    'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 10)),  # 超出常驻连接数后最多再创建的连接数
+    'pool_timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),  # 连接池耗尽时等待空闲连接的秒数
+    'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),  # 连接使用超过该秒数后重建（-1 表示不重建）
+    'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', 'True').lower() == 'true',  # 借出连接前检测连接是否可用
+    'replica_retry_interval': float(os.getenv('DB_REPLICA_RETRY_INTERVAL', 30)),  # 只读副本出错后暂停使用的秒数
+}
+
+# 案例快照配置（进程内案例存储）
+CASE_STORE_CONFIG = {
+    'refresh_interval': int(os.getenv('CASE_STORE_REFRESH_INTERVAL', 300)),  # 快照刷新间隔（秒）
+}
+
+# 响应缓存配置（Cache-Control max-age，秒）
+RESPONSE_CACHE_CONFIG = {
+    'static_max_age': int(os.getenv('STATIC_CACHE_MAX_AGE', 3600)),  # 静态配置类接口
+    'snapshot_max_age': int(os.getenv('SNAPSHOT_CACHE_MAX_AGE', 60)),  # 随案例快照变化的接口
+}
+
+# 请求阶段计时配置（Server-Timing 响应头与慢请求日志）
+REQUEST_TIMING_CONFIG = {
+    'slow_threshold_ms': float(os.getenv('SLOW_REQUEST_THRESHOLD_MS', 3000)),  # 超过该耗时的请求视为慢请求
+    'slow_sample_rate': float(os.getenv('SLOW_REQUEST_SAMPLE_RATE', 1.0)),  # 慢请求写入日志的采样比例（0 ~ 1）
+    'slow_log_file': os.getenv('SLOW_REQUEST_LOG_FILE', 'logs/slow_requests.jsonl') or None,  # 慢请求日志文件，设为空只保留在内存
+}
+
+# 指标接口配置（/metrics）
+METRICS_CONFIG = {
+    'public': os.getenv('METRICS_PUBLIC', 'False').lower() == 'true',  # 无需管理令牌即可抓取（仅在接口只对内网开放时开启）
+}
+
+# 在线性能剖析配置（/debug/profile 接口）
+PROFILING_CONFIG = {
+    'admin_token': os.getenv('ADMIN_TOKEN') or None,  # 管理令牌（请求头 X-Admin-Token），未设置时管理接口不可用
+    'max_seconds': float(os.getenv('PROFILE_MAX_SECONDS', 60)),  # 单次剖析的最长时间（秒）
+    'sample_interval_ms': float(os.getenv('PROFILE_SAMPLE_INTERVAL_MS', 5)),  # 调用栈采样间隔（毫秒）
+}
+
+# 解析结果缓存配置（GPA、语言成绩、院校名称等重复源值的 LRU 缓存）
+PARSER_CACHE_CONFIG = {
+    'maxsize': int(os.getenv('PARSER_CACHE_SIZE', 10000)),  # 每个解析函数缓存的最大条目数，0 表示不缓存
+}
+
+# 性能基准测试配置
+BENCHMARK_CONFIG = {
+    'regression_threshold': float(os.getenv('BENCHMARK_REGRESSION_THRESHOLD', 0.2)),  # 相对基线变差超过该比例视为回归
+    'matching_baseline': os.getenv('MATCHING_BENCHMARK_BASELINE', 'benchmarks/matching_baseline.json'),  # 匹配基准的基线文件
+}
+
+# ETL配置
+ETL_CONFIG = {
+    'batch_size': int(os.getenv('ETL_BATCH_SIZE', 100)),  # 每批读取/写入的记录数
+    'workers': int(os.getenv('ETL_WORKERS', os.cpu_count() or 1)),  # 解析阶段的进程数
+    'strategy': os.getenv('ETL_STRATEGY', 'basic'),  # 解析策略：basic / improved / optimized
+    'queue_size': int(os.getenv('ETL_QUEUE_SIZE', 4)),  # 流水线阶段之间的队列长度（批），队列满时上游等待
+    'itersize': int(os.getenv('ETL_ITERSIZE', 2000)),  # 源端服务器游标每次从服务器读取的行数
+    'reject_file': os.getenv('ETL_REJECT_FILE', 'logs/etl_rejects.jsonl'),  # 写入被拒绝记录的转存文件（全量运行按运行 id 加后缀，如 etl_rejects.run12.jsonl）
+    'source_updated_column': os.getenv('ETL_SOURCE_UPDATED_COLUMN') or None,  # 源表的更新时间列（可选），用于增量捕获已修改的记录
+    'changeset_file': os.getenv('ETL_CHANGESET_FILE', 'logs/etl_changeset.json'),  # 增量ETL输出的变更集
+    'metrics_file': os.getenv('ETL_METRICS_FILE', 'logs/etl_metrics.prom') or None,  # 运行指标文本文件（/metrics 一并输出），设为空不写入
+}
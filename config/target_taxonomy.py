@@ -0,0 +1,106 @@
+"""
+意向筛选配置
+维护录取院校所在的国家/地区与项目所属的专业大类，用于按用户的意向国家/地区、意向专业筛选候选案例
+"""
+
+# 国家/地区（顺序即编号，新增时追加在末尾）
+COUNTRIES = ['英国', '香港', '新加坡', '美国', '澳大利亚', '加拿大', '德国', '法国', '荷兰', '澳门', '新西兰', '日本']
+
+# 院校所在国家/地区：院校名称（中文名或英文名）-> 国家/地区
+UNIVERSITY_COUNTRIES = {
+    # 英国
+    '牛津大学': '英国', 'University of Oxford': '英国',
+    '剑桥大学': '英国', 'University of Cambridge': '英国',
+    '帝国理工学院': '英国', 'Imperial College London': '英国',
+    '伦敦大学学院': '英国', 'University College London': '英国', 'UCL': '英国',
+    '伦敦政治经济学院': '英国', 'London School of Economics and Political Science': '英国', 'LSE': '英国',
+    '伦敦国王学院': '英国', "King's College London": '英国',
+    '爱丁堡大学': '英国', 'University of Edinburgh': '英国',
+    '曼彻斯特大学': '英国', 'University of Manchester': '英国',
+    '华威大学': '英国', 'University of Warwick': '英国',
+    '布里斯托大学': '英国', 'University of Bristol': '英国',
+    '杜伦大学': '英国', 'Durham University': '英国',
+    '格拉斯哥大学': '英国', 'University of Glasgow': '英国',
+    '南安普顿大学': '英国', 'University of Southampton': '英国',
+    '利兹大学': '英国', 'University of Leeds': '英国',
+    '伯明翰大学': '英国', 'University of Birmingham': '英国',
+    '谢菲尔德大学': '英国', 'University of Sheffield': '英国',
+    '诺丁汉大学': '英国', 'University of Nottingham': '英国',
+    '巴斯大学': '英国', 'University of Bath': '英国',
+    '圣安德鲁斯大学': '英国', 'University of St Andrews': '英国',
+    '约克大学（英国）': '英国', 'University of York': '英国',
+    # 香港
+    '香港大学': '香港', 'The University of Hong Kong': '香港',
+    '香港中文大学': '香港', 'The Chinese University of Hong Kong': '香港',
+    '香港科技大学': '香港', 'The Hong Kong University of Science and Technology': '香港',
+    '香港城市大学': '香港', 'City University of Hong Kong': '香港',
+    '香港理工大学': '香港', 'The Hong Kong Polytechnic University': '香港',
+    '香港浸会大学': '香港', 'Hong Kong Baptist University': '香港',
+    '岭南大学': '香港', 'Lingnan University': '香港',
+    # 澳门
+    '澳门大学': '澳门', 'University of Macau': '澳门',
+    '澳门科技大学': '澳门', 'Macau University of Science and Technology': '澳门',
+    # 新加坡
+    '新加坡国立大学': '新加坡', 'National University of Singapore': '新加坡',
+    '南洋理工大学': '新加坡', 'Nanyang Technological University': '新加坡',
+    '新加坡管理大学': '新加坡', 'Singapore Management University': '新加坡',
+    # 美国
+    '哥伦比亚大学': '美国', 'Columbia University': '美国',
+    '南加州大学': '美国', 'University of Southern California': '美国',
+    '东北大学（美国）': '美国', 'Northeastern University': '美国',
+    '纽约大学': '美国', 'New York University': '美国',
+    '卡内基梅隆大学': '美国', 'Carnegie Mellon University': '美国',
+    '宾夕法尼亚大学': '美国', 'University of Pennsylvania': '美国',
+    '康奈尔大学': '美国', 'Cornell University': '美国',
+    '约翰霍普金斯大学': '美国', 'Johns Hopkins University': '美国',
+    '加州大学洛杉矶分校': '美国', 'University of California, Los Angeles': '美国',
+    '加州大学圣地亚哥分校': '美国', 'University of California, San Diego': '美国',
+    '波士顿大学': '美国', 'Boston University': '美国',
+    '普渡大学': '美国', 'Purdue University': '美国',
+    '伊利诺伊大学厄巴纳-香槟分校': '美国', 'University of Illinois Urbana-Champaign': '美国',
+    # 澳大利亚
+    '墨尔本大学': '澳大利亚', 'University of Melbourne': '澳大利亚',
+    '悉尼大学': '澳大利亚', 'University of Sydney': '澳大利亚',
+    '新南威尔士大学': '澳大利亚', 'University of New South Wales': '澳大利亚', 'UNSW Sydney': '澳大利亚',
+    '澳大利亚国立大学': '澳大利亚', 'Australian National University': '澳大利亚',
+    '莫纳什大学': '澳大利亚', 'Monash University': '澳大利亚',
+    '昆士兰大学': '澳大利亚', 'University of Queensland': '澳大利亚',
+    # 加拿大
+    '多伦多大学': '加拿大', 'University of Toronto': '加拿大',
+    '不列颠哥伦比亚大学': '加拿大', 'University of British Columbia': '加拿大',
+    '麦吉尔大学': '加拿大', 'McGill University': '加拿大',
+    # 欧洲其他
+    '慕尼黑工业大学': '德国', 'Technical University of Munich': '德国',
+    '巴黎高等商学院': '法国', 'HEC Paris': '法国',
+    '代尔夫特理工大学': '荷兰', 'Delft University of Technology': '荷兰',
+    '阿姆斯特丹大学': '荷兰', 'University of Amsterdam': '荷兰',
+    # 其他
+    '奥克兰大学': '新西兰', 'University of Auckland': '新西兰',
+    '东京大学': '日本', 'University of Tokyo': '日本',
+}
+
+# 映射中没有的院校按名称中的关键词判断国家/地区（按顺序匹配第一个）
+COUNTRY_KEYWORDS = [
+    ('香港', '香港'), ('Hong Kong', '香港'),
+    ('澳门', '澳门'), ('Macau', '澳门'),
+    ('新加坡', '新加坡'), ('Singapore', '新加坡'),
+    ('伦敦', '英国'), ('London', '英国'),
+    ('悉尼', '澳大利亚'), ('Sydney', '澳大利亚'), ('Australia', '澳大利亚'),
+    ('加州', '美国'), ('California', '美国'),
+]
+
+# 专业大类（顺序即编号）：大类 -> 关键词（项目名称或意向专业中包含任一关键词即属于该大类，可同时属于多个大类）
+MAJOR_GROUPS = {
+    'computer': ['计算机', '软件', '人工智能', '数据科学', '大数据', '物联网', '信息技术', '信息系统',
+                 'computer', 'computing', 'software', 'artificial intelligence', 'data science',
+                 'information technology', 'information systems'],
+    'electronic': ['电子', '电气', '通信', '自动化', '集成电路', '信息工程',
+                   'electrical', 'electronic', 'communication', 'automation'],
+    'business': ['金融', '会计', '经济', '管理', '市场', '营销', '商业', '商务', '财务',
+                 'finance', 'financial', 'accounting', 'economics', 'management', 'marketing', 'business'],
+    'math': ['数学', '统计', '精算', '物理', '化学', 'mathematics', 'statistics', 'actuarial', 'physics', 'chemistry'],
+    'engineering': ['机械', '土木', '材料', '化工', '能源', '航空', '航天',
+                    'mechanical', 'civil', 'materials', 'chemical engineering', 'aerospace'],
+    'social': ['教育', '传媒', '新闻', '法律', '法学', '心理', '社会', '语言',
+               'education', 'media', 'journalism', 'law', 'psychology', 'social', 'linguistics'],
+}
@@ -0,0 +1,13 @@
+-- 增量ETL支持
+-- original_id 改为唯一索引（INSERT ... ON CONFLICT (original_id) 依赖该约束），并创建高水位状态表
+
+DROP INDEX IF EXISTS idx_cases_original_id;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_cases_original_id ON cases(original_id);
+
+-- 增量ETL状态表：记录已处理到的源表最大 id / 更新时间
+CREATE TABLE IF NOT EXISTS etl_state (
+    name VARCHAR(50) PRIMARY KEY,
+    last_source_id INTEGER,
+    last_source_updated_at TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
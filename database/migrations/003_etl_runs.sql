@@ -0,0 +1,22 @@
+-- ETL运行日志与检查点
+-- 每次全量运行登记一行；按 id 区间并行时每个区间为一个子运行（parent_run_id 指向总运行）
+-- last_committed_id 与该批数据在同一事务内提交，中断后 run_etl.py --resume 从此处继续
+
+CREATE TABLE IF NOT EXISTS etl_runs (
+    run_id SERIAL PRIMARY KEY,
+    parent_run_id INTEGER REFERENCES etl_runs(run_id),
+    strategy VARCHAR(20) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'running',  -- running / completed / failed / superseded
+    id_from INTEGER,                                -- 负责的源表 id 区间 (id_from, id_to]，NULL 表示从头开始
+    id_to INTEGER,
+    source_updated_at TIMESTAMP,                    -- 运行开始时的源表更新时间高水位
+    last_committed_id INTEGER,                      -- 检查点：已提交的最大源 id
+    processed_count INTEGER NOT NULL DEFAULT 0,
+    error_count INTEGER NOT NULL DEFAULT 0,
+    error_message TEXT,
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_etl_runs_parent ON etl_runs(parent_run_id);
@@ -9,10 +9,12 @@ let practicalExperiences = [];
 let configOptions = {};
 let autocompleteOptions = {};
 
+// 服务端自动补全的输入防抖时间（毫秒），连续输入时只检索停顿后的最后一次输入
+const AUTOCOMPLETE_DEBOUNCE_MS = 150;
+
 // 页面加载完成后初始化
 document.addEventListener('DOMContentLoaded', function() {
     loadConfigOptions();
-    loadAutocompleteOptions();
     initializeForm();
     initializeCountrySelection();
     initializeExperienceManager();
@@ -41,20 +43,25 @@ async function loadConfigOptions() {
 }
 
 /**
- * 加载自动补全选项
+ * 服务端自动补全检索（前缀/别名/拼音，按案例频次排序）
  */
-async function loadAutocompleteOptions() {
+async function fetchAutocompleteSuggestions(field, query) {
     try {
-        const response = await fetch('/api/v1/autocomplete-options');
-        autocompleteOptions = await response.json();
-        console.log(`自动补全选项加载成功: ${autocompleteOptions.total_universities} 所院校, ${autocompleteOptions.total_majors} 个专业`);
+        const params = new URLSearchParams({ field: field, q: query, limit: 8 });
+        const response = await fetch(`/api/v1/autocomplete?${params}`);
+        if (!response.ok) {
+            throw new Error(`HTTP ${response.status}`);
+        }
+        const result = await response.json();
+        return result.suggestions.map(item => item.value);
     } catch (error) {
-        console.error('加载自动补全选项失败:', error);
-        // 使用默认配置
+        console.error('自动补全检索失败:', error);
+        // 使用默认选项在本地过滤
         autocompleteOptions = {
             universities: ['北京大学', '清华大学', '复旦大学', '上海交通大学', '浙江大学'],
             majors: ['计算机科学与技术', '软件工程', '电子信息工程', '机械工程', '金融学']
         };
+        return autocompleteOptions[field].filter(item => item.toLowerCase().includes(query));
     }
 }
 
@@ -425,26 +432,28 @@ function setupAutocomplete(inputId, suggestionsId, dataKey, useDatabase = false)
     
     if (!input || !suggestions) return;
     
-    input.addEventListener('input', function() {
+    let requestSeq = 0;
+    input.addEventListener('input', async function() {
         const value = this.value.toLowerCase().trim();
         if (value.length < 1) {
             suggestions.style.display = 'none';
             return;
         }
         
-        // 选择数据源
-        let data = [];
-        if (useDatabase && autocompleteOptions[dataKey]) {
-            data = autocompleteOptions[dataKey];
+        // 选择数据源：数据库数据走服务端检索，其余使用配置选项本地过滤
+        let filtered = [];
+        if (useDatabase) {
+            const seq = ++requestSeq;
+            await new Promise(resolve => setTimeout(resolve, AUTOCOMPLETE_DEBOUNCE_MS));
+            if (seq !== requestSeq) return; // 防抖期间又有输入，不发起检索
+            filtered = await fetchAutocompleteSuggestions(dataKey, value);
+            if (seq !== requestSeq) return; // 丢弃过期的检索结果
         } else if (configOptions[dataKey]) {
-            data = configOptions[dataKey];
+            filtered = configOptions[dataKey].filter(item => 
+                item.toLowerCase().includes(value)
+            ).slice(0, 8); // 限制显示8个建议
         }
         
-        // 过滤匹配项
-        const filtered = data.filter(item => 
-            item.toLowerCase().includes(value)
-        ).slice(0, 8); // 限制显示8个建议
-        
         if (filtered.length === 0) {
             suggestions.style.display = 'none';
             return;
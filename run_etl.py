@@ -2,25 +2,106 @@
 """
 运行ETL数据处理脚本
 """
+import argparse
+import json
 import sys
 import os
 
+import psycopg2
+
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from scripts.etl_processor import ETLProcessor
+from config.database import TARGET_DB_CONFIG
+from config.settings import ETL_CONFIG
+from scripts.etl_benchmark import DEFAULT_STRATEGY, PROFILERS, SINKS, SOURCES, print_benchmark_report, run_benchmark
+from scripts.etl_pipeline import MODES, TRANSFORM_STRATEGIES, ETLPipeline
+from scripts.etl_tables import rollback_to_previous
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="ETL数据预处理")
+    parser.add_argument('--rollback', action='store_true',
+                        help="回滚到上一代数据（交换 cases 与 cases_previous）")
+    parser.add_argument('--mode', choices=MODES, default='full',
+                        help="full: 全量重建并原子切换；incremental: 只处理高水位之后的新增/修改记录并输出变更集")
+    parser.add_argument('--incremental', action='store_true',
+                        help="等同于 --mode incremental")
+    parser.add_argument('--resume', action='store_true',
+                        help="全量模式：从最近一次未完成运行的检查点继续（没有时开始新的运行）")
+    parser.add_argument('--partitions', type=int, default=1,
+                        help="全量模式：按源表 id 区间拆分为多个工作进程并行处理")
+    parser.add_argument('--strategy', choices=list(TRANSFORM_STRATEGIES),
+                        help=f"解析策略（默认取 ETL_STRATEGY；--benchmark 时默认 {DEFAULT_STRATEGY}）")
+    parser.add_argument('--workers', type=int, default=ETL_CONFIG['workers'],
+                        help="解析进程数，1 表示在主进程中解析（默认取 ETL_WORKERS）")
+    parser.add_argument('--batch-size', type=int, default=ETL_CONFIG['batch_size'],
+                        help="每批读取/写入的记录数（默认取 ETL_BATCH_SIZE）")
+    parser.add_argument('--benchmark', action='store_true',
+                        help="吞吐量基准：以合成源数据运行流水线，输出各阶段/各字段耗时（不修改 cases 表）")
+    parser.add_argument('--benchmark-rows', type=int, default=100000, help="基准：源数据条数")
+    parser.add_argument('--benchmark-source', choices=SOURCES, default='memory',
+                        help="基准：memory 为内存中生成的合成数据，postgres 为源库 compassedu_cases 的前 N 条")
+    parser.add_argument('--benchmark-sink', choices=SINKS, default='null',
+                        help="基准：null 为校验并编码 COPY 文本后丢弃，copy 为 COPY 到目标库的临时表")
+    parser.add_argument('--benchmark-output', help="基准：将报告另存为 JSON 文件")
+    parser.add_argument('--profile', choices=PROFILERS,
+                        help="基准：cprofile 按阶段线程记录并合并（.pstats），sample 为采样分析（py-spy raw 折叠栈）")
+    parser.add_argument('--profile-output', help="基准：剖析结果的保存路径")
+    args = parser.parse_args()
+    if args.strategy is None:
+        args.strategy = DEFAULT_STRATEGY if args.benchmark else ETL_CONFIG['strategy']
+    if args.incremental:
+        args.mode = 'incremental'
+    if args.mode == 'incremental' and (args.resume or args.partitions > 1):
+        parser.error("--resume 与 --partitions 仅适用于全量模式（增量合并本身可重复执行）")
+    return args
+
+
+def run_rollback():
+    """回滚到上一代数据"""
+    conn = psycopg2.connect(**TARGET_DB_CONFIG)
+    try:
+        rollback_to_previous(conn)
+    finally:
+        conn.close()
+
 
 if __name__ == "__main__":
+    args = parse_args()
+
+    if args.rollback:
+        try:
+            run_rollback()
+            print("已回滚到上一代数据")
+        except Exception as e:
+            print(f"回滚失败: {e}")
+            sys.exit(1)
+        sys.exit(0)
+
+    if args.benchmark:
+        report = run_benchmark(
+            args.strategy, rows=args.benchmark_rows, batch_size=args.batch_size, workers=args.workers,
+            source=args.benchmark_source, sink=args.benchmark_sink, profiler=args.profile,
+            profile_output=args.profile_output
+        )
+        print_benchmark_report(report)
+        if args.benchmark_output:
+            with open(args.benchmark_output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        sys.exit(0)
+
     print("=" * 50)
     print("ETL数据预处理开始")
     print("=" * 50)
-    
+
     try:
-        processor = ETLProcessor()
-        processor.run_etl()
+        pipeline = ETLPipeline(args.strategy, batch_size=args.batch_size, workers=args.workers)
+        pipeline.run(args.mode, resume=args.resume, partitions=args.partitions)
         print("=" * 50)
         print("ETL数据预处理完成")
         print("=" * 50)
     except Exception as e:
         print(f"ETL处理失败: {e}")
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
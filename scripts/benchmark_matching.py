@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+匹配服务性能基准
+在 1万、10万、100万条合成案例上，按几类典型用户档案分别计时
+calculate_similarity_score、find_similar_cases 与 categorize_recommendations（Top N 及扩大到 Top 500），
+记录吞吐量（次/秒）、单次耗时 p50/p99 与单次调用的内存分配峰值；
+结果可保存为 JSON 基线，之后的运行与基线对比，任一指标变差超过阈值时以非零状态退出
+
+用法:
+  python scripts/benchmark_matching.py --save-baseline                 # 生成基线
+  python scripts/benchmark_matching.py --check                         # 与基线对比（回归时退出码为 1）
+  python scripts/benchmark_matching.py --sizes 10000 --profile 985_cs --threshold 0.1 --check
+"""
+import argparse
+import itertools
+import json
+import logging
+import platform
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.models.case import Case, CaseResponse, UserProfile
+from backend.services.case_store import install_case_snapshot
+from backend.services.matching_service import PRESTIGIOUS_UNIVERSITIES, MatchingService
+from backend.services.program_stats import percentile
+from config.settings import BENCHMARK_CONFIG, CASE_STORE_CONFIG
+from scripts.generate_synthetic_cases import CaseGenerator
+
+DEFAULT_SIZES = [10000, 100000, 1000000]
+
+# 典型用户档案
+PROFILES = {
+    '985_cs': dict(
+        undergrad_school='华中科技大学', school_tier='985院校', major='计算机科学与技术', gpa='3.7/4.0',
+        language_test='雅思', language_score=7.0, gre_score=325, target_degree='硕士',
+        target_countries=['香港', '新加坡'], target_major='计算机科学'
+    ),
+    '211_finance': dict(
+        undergrad_school='西南财经大学', school_tier='211院校', major='金融学', gpa='3.4/4.0',
+        language_test='雅思', language_score=6.5, target_degree='硕士',
+        target_countries=['英国', '香港'], target_major='金融学'
+    ),
+    'non_key_ee': dict(
+        undergrad_school='杭州电子科技大学', school_tier='双非院校', major='电子信息工程', gpa='82/100',
+        language_test='托福', language_score=95, target_degree='硕士',
+        target_countries=['美国'], target_major='电子信息'
+    ),
+    'overseas_phd': dict(
+        undergrad_school='University of Leeds', school_tier='海外院校', major='数学与应用数学', gpa='3.6',
+        language_test='雅思', language_score=7.5, gre_score=320, target_degree='博士',
+        target_countries=['英国'], target_major='应用数学'
+    ),
+}
+
+# 各被测函数的采样方式：每个样本连续调用 number 次，共 repeat 个样本
+SAMPLING = {
+    'calculate_similarity_score': {'number': 1000, 'repeat': 20},
+    'find_similar_cases': {'number': 1, 'repeat': 10},
+    'categorize_recommendations': {'number': 200, 'repeat': 20},
+    'categorize_recommendations_wide': {'number': 50, 'repeat': 20},
+}
+
+# 扩大推荐范围时参与梯度分类的案例数（categorize_recommendations_wide）
+WIDE_RECOMMENDATION_CASES = 500
+
+# 指标方向：True 表示越大越好
+METRICS = {'ops_per_sec': True, 'p50_us': False, 'p99_us': False, 'peak_alloc_kib': False}
+# 低于该绝对变化量的差异视为噪声，不判定为回归
+MIN_ABSOLUTE_CHANGE = {'p50_us': 1.0, 'p99_us': 1.0, 'peak_alloc_kib': 1.0}
+
+
+def legacy_categorize_recommendations(cases: List[CaseResponse]) -> Dict[str, List[Dict]]:
+    """梯度分类的逐院校分组实现（向量化之前的版本），用于对比耗时并校验结果一致"""
+    if not cases:
+        return {"reach": [], "target": [], "safety": []}
+
+    university_cases = {}
+    for case in cases:
+        university_cases.setdefault(case.university, []).append(case)
+
+    target_schools, safety_schools = [], []
+    for uni_cases in university_cases.values():
+        best_case = max(uni_cases, key=lambda x: x.similarity_score)
+        recommendation = {
+            "university": best_case.university,
+            "program": best_case.program,
+            "reason": f"相似度得分: {best_case.similarity_score:.1f}",
+            "evidence_case_id": best_case.id
+        }
+        if best_case.similarity_score >= 60:
+            target_schools.append(recommendation)
+        elif best_case.similarity_score >= 40 and len(target_schools) < 3:
+            target_schools.append(recommendation)
+        else:
+            safety_schools.append(recommendation)
+
+    while len(target_schools) < 3 and safety_schools:
+        target_schools.append(safety_schools.pop(0))
+
+    reach_schools = []
+    for case in cases[:5]:
+        if any(uni in case.university for uni in PRESTIGIOUS_UNIVERSITIES):
+            reach_schools.append({
+                "university": case.university,
+                "program": case.program,
+                "reason": f"顶尖院校，值得冲刺 (相似度: {case.similarity_score:.1f})",
+                "evidence_case_id": case.id
+            })
+            if len(reach_schools) >= 3:
+                break
+
+    return {"reach": reach_schools[:3], "target": target_schools[:4], "safety": safety_schools[:3]}
+
+
+def build_cases(generator: CaseGenerator, cases: List[Case], size: int) -> List[Case]:
+    """将合成案例补足到 size 条（各规模共用同一序列，小规模为大规模的前缀）"""
+    missing = size - len(cases)
+    if missing > 0:
+        for _, rows in generator.iter_chunks(missing, 50000, start_id=len(cases) + 1):
+            for row in rows:
+                cases.append(Case(id=row['original_id'], **row))
+    return cases[:size]
+
+
+def measure(func: Callable[[], object], number: int, repeat: int) -> Dict:
+    """计时 func：返回吞吐量、单次耗时分位数（微秒）与单次调用的内存分配峰值（KiB）"""
+    func()  # 预热
+
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - started) / number)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    per_call_us = sorted(sample * 1e6 for sample in samples)
+    return {
+        'ops_per_sec': round(len(samples) / sum(samples), 2),
+        'p50_us': percentile(per_call_us, 50),
+        'p99_us': percentile(per_call_us, 99),
+        'peak_alloc_kib': round(peak / 1024, 2),
+        'calls': number * repeat,
+    }
+
+
+def benchmark_size(cases: List[Case], profiles: List[str], repeat: Optional[int] = None) -> Dict[str, Dict]:
+    """在一份案例快照上运行全部被测函数，返回 {函数/档案: 指标}"""
+    install_case_snapshot(cases)
+    service = MatchingService(db=None)
+    results = {}
+
+    for name in profiles:
+        user_profile = UserProfile(**PROFILES[name])
+        sampling = {key: dict(value, repeat=repeat or value['repeat']) for key, value in SAMPLING.items()}
+
+        # 逐条为语料开头的一段案例轮流打分
+        next_case = itertools.cycle(cases[:SAMPLING['calculate_similarity_score']['number']]).__next__
+        results[f"calculate_similarity_score/{name}"] = measure(
+            lambda: service.calculate_similarity_score(user_profile, next_case()),
+            **sampling['calculate_similarity_score']
+        )
+        results[f"find_similar_cases/{name}"] = measure(
+            lambda: service.find_similar_cases(user_profile), **sampling['find_similar_cases']
+        )
+
+        matched = service.find_similar_cases(user_profile)
+        results[f"categorize_recommendations/{name}"] = measure(
+            lambda: service.categorize_recommendations(matched, user_profile),
+            **sampling['categorize_recommendations']
+        )
+
+        wide_service = MatchingService(db=None)
+        wide_service.max_cases = WIDE_RECOMMENDATION_CASES
+        wide_matched = wide_service.find_similar_cases(user_profile)
+        results[f"categorize_recommendations_wide/{name}"] = measure(
+            lambda: service.categorize_recommendations(wide_matched, user_profile),
+            **sampling['categorize_recommendations_wide']
+        )
+    return results
+
+
+def run_benchmark(sizes: List[int], profiles: List[str], seed: int = 42, repeat: Optional[int] = None,
+                  verbose: bool = True) -> Dict:
+    """按规模从小到大依次运行，返回可保存为基线的结果"""
+    # 计时期间不从数据库刷新快照
+    refresh_interval = CASE_STORE_CONFIG['refresh_interval']
+    CASE_STORE_CONFIG['refresh_interval'] = float('inf')
+
+    generator = CaseGenerator(seed)
+    cases: List[Case] = []
+    results = {}
+    try:
+        for size in sorted(sizes):
+            size_cases = build_cases(generator, cases, size)
+            for key, metrics in benchmark_size(size_cases, profiles, repeat).items():
+                function, profile = key.split('/')
+                results[f"{function}/{size}/{profile}"] = metrics
+                if verbose:
+                    print(f"{function:<28} {size:>8} {profile:<13} {metrics['ops_per_sec']:>12,.1f} 次/秒  "
+                          f"p50 {metrics['p50_us']:>10,.1f} us  p99 {metrics['p99_us']:>10,.1f} us  "
+                          f"峰值分配 {metrics['peak_alloc_kib']:>9,.1f} KiB")
+    finally:
+        CASE_STORE_CONFIG['refresh_interval'] = refresh_interval
+
+    return {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'seed': seed,
+            'sizes': sorted(sizes),
+            'profiles': profiles,
+        },
+        'results': results,
+    }
+
+
+def compare_results(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """与基线对比，返回回归描述列表（只比较两边都有的测试项）"""
+    regressions = []
+    for key, metrics in current['results'].items():
+        previous = baseline['results'].get(key)
+        if previous is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            old, new = previous.get(metric), metrics.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            if worse > threshold and abs(new - old) >= MIN_ABSOLUTE_CHANGE.get(metric, 0):
+                regressions.append(f"{key} {metric}: {old} -> {new}（{change:+.1%}）")
+    return regressions
+
+
+def load_baseline(path: str) -> Dict:
+    """读取基线文件"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_results(results: Dict, path: str):
+    """保存结果（JSON）"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="匹配服务性能基准")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="案例规模")
+    parser.add_argument('--profile', action='append', choices=list(PROFILES),
+                        help="用户档案，可重复指定（默认全部）")
+    parser.add_argument('--seed', type=int, default=42, help="合成案例的随机种子")
+    parser.add_argument('--repeat', type=int, help="每项的样本数（默认按被测函数分别设置）")
+    parser.add_argument('--baseline', default=BENCHMARK_CONFIG['matching_baseline'], help="基线文件")
+    parser.add_argument('--save-baseline', action='store_true', help="将本次结果写入基线文件")
+    parser.add_argument('--check', action='store_true', help="与基线对比，存在回归时退出码为 1")
+    parser.add_argument('--threshold', type=float, default=BENCHMARK_CONFIG['regression_threshold'],
+                        help="回归阈值（相对基线变差的比例）")
+    parser.add_argument('--output', help="另存本次结果的 JSON 文件")
+    args = parser.parse_args()
+
+    # 匹配服务每次调用都会输出日志，计时期间关闭
+    logging.disable(logging.INFO)
+
+    results = run_benchmark(args.sizes, args.profile or list(PROFILES), args.seed, args.repeat)
+    if args.output:
+        save_results(results, args.output)
+
+    if args.check:
+        regressions = compare_results(results, load_baseline(args.baseline), args.threshold)
+        if regressions:
+            print(f"\n相对基线 {args.baseline} 变差超过 {args.threshold:.0%} 的指标:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"\n未发现超过 {args.threshold:.0%} 的回归（基线 {args.baseline}）")
+
+    if args.save_baseline:
+        save_results(results, args.baseline)
+        print(f"\n基线已保存: {args.baseline}")
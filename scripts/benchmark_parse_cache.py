@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+解析缓存性能对比
+分别在启用与关闭解析缓存（PARSER_CACHE_SIZE=0）的子进程中，用各解析策略解析同一批模拟源数据，输出耗时与命中率
+用法: python scripts/benchmark_parse_cache.py [--count 20000] [--repeat 3] [--strategy optimized]
+"""
+import argparse
+import json
+import random
+import subprocess
+import time
+from typing import List
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.benchmark_title_extractor import build_sample_titles
+
+GPA_VALUES = ['3.5/4.0', '3.6/4.0', '3.2/4.0', '85/100', '88/100', '90/100', '3.8', '82', 'GPA 3.7/4.0']
+LANGUAGE_VALUES = ['雅思7.0', '雅思6.5', 'IELTS 7.5', '托福100', '托福 105', 'TOEFL 98', '多邻国120', '']
+BACKGROUNDS = ['985院校', '211院校', '普通本科', '海外院校', '中山大学 软件工程', '北京邮电大学 物联网工程 GRE 320']
+
+
+def build_raw_cases(count: int, seed: int = 42) -> List[tuple]:
+    """生成源表格式的模拟案例：GPA、语言成绩、背景等取值高度重复，与真实数据分布相近"""
+    rng = random.Random(seed)
+    titles = build_sample_titles(count, seed)
+    raw_cases = []
+    for i, title in enumerate(titles, 1):
+        raw_cases.append((
+            i, title, f"https://example.com/{i}",
+            rng.choice(['香港大学', '新加坡国立大学', None]), rng.choice(['计算机科学硕士', None]),
+            rng.choice(BACKGROUNDS),
+            # 约十分之一的 GPA 为低重复度的取值
+            rng.choice(GPA_VALUES) if rng.random() < 0.9 else f"{rng.uniform(2.5, 4.0):.2f}/4.0",
+            rng.choice(LANGUAGE_VALUES), rng.choice(['2024', '2025', ''])
+        ))
+    return raw_cases
+
+
+def measure(strategy: str, count: int, repeat: int) -> dict:
+    """在当前进程中计时解析阶段（每轮先清空缓存），返回最快一轮的耗时与命中情况"""
+    from backend.utils.parse_cache import clear_parser_caches, merge_cache_stats, parser_cache_stats
+    from scripts.etl_pipeline import create_transform
+
+    raw_cases = build_raw_cases(count)
+    transform = create_transform(strategy)
+
+    best = None
+    for _ in range(repeat):
+        clear_parser_caches()
+        started = time.perf_counter()
+        for raw_case in raw_cases:
+            transform.process_single_case(raw_case)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return {'seconds': best, 'cache': merge_cache_stats([parser_cache_stats()])}
+
+
+def run_in_subprocess(strategy: str, count: int, repeat: int, cache_size: str = None) -> dict:
+    """在子进程中计时（缓存大小在模块导入时确定，需通过环境变量设置）"""
+    env = dict(os.environ)
+    if cache_size is not None:
+        env['PARSER_CACHE_SIZE'] = cache_size
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--strategy', strategy, '--count', str(count),
+         '--repeat', str(repeat), '--child'],
+        env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run_benchmark(strategies: List[str], count: int, repeat: int):
+    """运行对比并输出结果"""
+    print(f"样本 {count} 条模拟案例，每项取 {repeat} 轮中最快一轮")
+    for strategy in strategies:
+        uncached = run_in_subprocess(strategy, count, repeat, cache_size='0')
+        cached = run_in_subprocess(strategy, count, repeat)
+        speedup = uncached['seconds'] / cached['seconds'] if cached['seconds'] else 0
+        print(f"\n[{strategy}] 无缓存: {uncached['seconds'] * 1000:.1f} ms，"
+              f"有缓存: {cached['seconds'] * 1000:.1f} ms（{speedup:.2f}x）")
+        for name, stats in cached['cache'].items():
+            print(f"  {name}: 命中率 {stats['hit_rate']:.1%}，条目 {stats['size']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="解析缓存性能对比")
+    parser.add_argument('--count', type=int, default=20000, help="模拟案例数")
+    parser.add_argument('--repeat', type=int, default=3, help="重复次数（取最快一次）")
+    parser.add_argument('--strategy', action='append', choices=['basic', 'improved', 'optimized'],
+                        help="解析策略，可重复指定（默认全部）")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        # 子进程：只输出一行 JSON 结果
+        import logging
+        logging.disable(logging.CRITICAL)
+        print(json.dumps(measure(args.strategy[0], args.count, args.repeat)))
+    else:
+        run_benchmark(args.strategy or ['basic', 'improved', 'optimized'], args.count, args.repeat)
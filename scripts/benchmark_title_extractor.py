@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+标题字段提取性能对比
+对比原实现（逐模式、逐行 re.search）与单次扫描提取器 extract_title_fields 的吞吐量，并校验结果一致
+用法: python scripts/benchmark_title_extractor.py [--count 20000] [--repeat 3]
+"""
+import argparse
+import random
+import re
+import time
+from typing import Dict, List
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.title_extractor import extract_title_fields
+
+ADMITTED_SCHOOLS = ['香港大学', '新加坡国立大学', 'University of Sydney', 'Imperial College', '南洋理工大学']
+PROGRAMS = ['计算机科学硕士', '软件工程博士', 'Data Science Master', '金融工程硕士', 'PhD in Physics']
+UNDERGRAD_SCHOOLS = ['北京邮电大学', '中山大学', '华中科技大学', '某某理工学院', 'University of Leeds', '南京大学金陵学院']
+MAJORS = ['软件工程', '计算机科学与技术', '金融学', '市场营销', '电子信息', '数学']
+LANGUAGES = ['雅思 7.0', 'IELTS:6.5', '托福 105', 'TOEFL：98', '雅思7.5 托福100', '']
+EXPERIENCES = ['应届', '已毕业', '2年工作经验', '']
+
+
+def legacy_parse_title_info(title: str) -> Dict:
+    """原实现：逐行、逐模式调用 re.search（仅用于对照与性能对比）"""
+    info = {
+        'university': '',
+        'program': '',
+        'undergrad_school': '',
+        'undergrad_major': '',
+        'gpa': '',
+        'language_info': '',
+        'work_experience': '应届生',
+        'gre_score': None,
+        'year': None
+    }
+
+    if not title:
+        return info
+
+    university_match = re.search(r'^([^，,。]*(?:大学|学院|University|College|Institute))[^，,。]*?([^，,。]*(?:硕士|博士|Master|PhD))', title)
+    if university_match:
+        info['university'] = university_match.group(1).strip()
+        info['program'] = university_match.group(2).strip()
+
+    for line in title.split('\n'):
+        line = line.strip()
+        if any(keyword in line for keyword in ['大学', '学院', 'University', 'College']):
+            school_match = re.search(r'([^，,。\s]*(?:大学|学院|University|College))', line)
+            if school_match:
+                school_name = school_match.group(1).strip()
+                if school_name != info['university']:
+                    info['undergrad_school'] = school_name
+
+            major_patterns = [
+                r'([^，,。\s]*(?:工程|科学|技术|管理|经济|学|设计))',
+                r'([^，,。\s]*(?:计算机|软件|电子|机械|土木|化学|物理|数学|金融|会计|市场营销))'
+            ]
+            for pattern in major_patterns:
+                major_match = re.search(pattern, line)
+                if major_match:
+                    major = major_match.group(1).strip()
+                    if len(major) > 2 and '大学' not in major and '学院' not in major:
+                        info['undergrad_major'] = major
+                        break
+
+            gpa_match = re.search(r'GPA[：:\s]*(\d+\.?\d*(?:/\d+\.?\d*)?)', line)
+            if gpa_match:
+                info['gpa'] = gpa_match.group(1)
+
+            language_patterns = [
+                r'(雅思[：:\s]*\d+\.?\d*)',
+                r'(托福[：:\s]*\d+\.?\d*)',
+                r'(IELTS[：:\s]*\d+\.?\d*)',
+                r'(TOEFL[：:\s]*\d+\.?\d*)'
+            ]
+            for pattern in language_patterns:
+                lang_match = re.search(pattern, line)
+                if lang_match:
+                    info['language_info'] = lang_match.group(1)
+                    break
+
+            if '应届' in line:
+                info['work_experience'] = '应届生'
+            elif '已毕业' in line:
+                info['work_experience'] = '已毕业'
+            elif '经验' in line:
+                info['work_experience'] = '有工作经验'
+
+    gre_match = re.search(r'GRE[：:\s]*(\d+)', title)
+    info['gre_score'] = int(gre_match.group(1)) if gre_match else None
+
+    year_match = re.search(r'20(\d{2})', title)
+    info['year'] = int(f"20{year_match.group(1)}") if year_match else None
+
+    return info
+
+
+def build_sample_titles(count: int, seed: int = 42) -> List[str]:
+    """生成贴近真实格式的案例标题"""
+    rng = random.Random(seed)
+    titles = []
+    for _ in range(count):
+        gpa = rng.choice([f"GPA:3.{rng.randint(0, 9)}/4.0", f"GPA {rng.randint(75, 95)}/100", "GPA：3.6", ""])
+        gre = rng.choice([f"GRE {rng.randint(310, 335)}", f"GRE：{rng.randint(310, 335)}", ""])
+        titles.append(
+            f"{rng.choice(ADMITTED_SCHOOLS)}{rng.choice(PROGRAMS)}offer\n"
+            f"{rng.choice(UNDERGRAD_SCHOOLS)} {rng.choice(MAJORS)} {gpa} {rng.choice(LANGUAGES)} "
+            f"{rng.choice(EXPERIENCES)}\n"
+            f"{gre} {rng.randint(2018, 2026)}"
+        )
+    return titles
+
+
+def run_benchmark(count: int, repeat: int):
+    """运行对比并输出吞吐量"""
+    titles = build_sample_titles(count)
+
+    mismatches = sum(1 for title in titles if legacy_parse_title_info(title) != extract_title_fields(title))
+    print(f"样本 {count} 条标题，结果不一致: {mismatches} 条")
+
+    for name, extractor in (("原实现", legacy_parse_title_info), ("单次扫描", extract_title_fields)):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for title in titles:
+                extractor(title)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        print(f"{name}: {best * 1000:.1f} ms，{count / best:,.0f} 条/秒")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="标题字段提取性能对比")
+    parser.add_argument('--count', type=int, default=20000, help="样本标题数")
+    parser.add_argument('--repeat', type=int, default=3, help="重复次数（取最快一次）")
+    args = parser.parse_args()
+    run_benchmark(args.count, args.repeat)
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+ETL吞吐量基准与性能剖析
+以合成源数据（内存中预先生成，或源库中由 generate_synthetic_cases.py 写入的数据）运行统一流水线，
+统计读取、解析、写入各阶段耗时，串行解析时另统计各字段解析函数的耗时；
+可选用 cProfile（按阶段线程分别记录后合并）或采样分析（输出 py-spy raw 格式的折叠栈）找出热点函数。
+结果作为ETL性能优化的基线，由 run_etl.py --benchmark 调用
+"""
+import cProfile
+import logging
+import os
+import pstats
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import psycopg2
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.utils.profiling import StackSampler, is_idle_frame
+from config.database import SOURCE_DB_CONFIG, TARGET_DB_CONFIG
+from scripts.etl_incremental import SOURCE_COLUMNS
+from scripts.etl_pipeline import ETLPipeline, create_transform
+from scripts.etl_runtime import get_peak_rss, open_source_cursor, peak_rss_mb
+from scripts.etl_tables import CASES_TABLE_DDL
+from scripts.etl_writers import CopyWriter, encode_copy_rows, validate_case_row
+from scripts.generate_synthetic_cases import SOURCE_COLUMNS as SOURCE_COLUMN_NAMES, CaseGenerator
+
+SOURCES = ('memory', 'postgres')
+SINKS = ('null', 'copy')
+PROFILERS = ('cprofile', 'sample')
+# 未指定 --strategy 时基准使用的解析策略（ETL_STRATEGY 默认的 basic 仅作兼容保留，不作为优化基线）
+DEFAULT_STRATEGY = 'optimized'
+
+# copy 写入时使用的临时表（会话结束时自动删除）
+BENCHMARK_TABLE = 'pg_temp.cases_benchmark'
+
+# 处理器中不属于字段解析的方法
+NON_FIELD_METHODS = {'process_single_case', 'run_etl', 'run_incremental', 'iter_processed_batches'}
+# 处理器模块中从这些模块导入的函数视为字段解析函数
+FIELD_MODULES = {'scripts.title_extractor', 'scripts.school_tier_matcher'}
+
+
+class SyntheticSource:
+    """内存中的合成源数据（计时前生成完毕，读取阶段只包含分批开销），提供与源库游标一致的 fetchmany"""
+
+    def __init__(self, rows: int, seed: int = 42):
+        self.rows = [
+            tuple(source[column] for column in SOURCE_COLUMN_NAMES)
+            for sources, _ in CaseGenerator(seed).iter_chunks(rows, 50000)
+            for source in sources
+        ]
+        self.position = 0
+
+    def fetchmany(self, size: int) -> List[tuple]:
+        batch = self.rows[self.position:self.position + size]
+        self.position += len(batch)
+        return batch
+
+
+class NullWriter(CopyWriter):
+    """不写数据库的写入器：与 CopyWriter 相同地校验并编码为 COPY 文本后丢弃"""
+
+    def __init__(self):
+        super().__init__(conn=None, table=None, reject_path=os.devnull)
+
+    def write(self, rows: List[Dict]) -> int:
+        valid_rows = []
+        for row in rows:
+            reason = validate_case_row(row)
+            if reason:
+                self.reject(row, reason)
+            else:
+                valid_rows.append(row)
+        encode_copy_rows(valid_rows)
+        self.written_count += len(valid_rows)
+        return len(valid_rows)
+
+
+class NullConnection:
+    """空写入时代替目标库连接（流水线按批提交）"""
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FieldTimer:
+    """
+    串行解析时统计各字段解析函数的自身耗时（不含其调用的其他被统计函数）：
+    包装处理器的公开方法，以及处理器模块中从 title_extractor / school_tier_matcher 导入的函数
+    """
+
+    def __init__(self, transform):
+        self.transform = transform
+        self.seconds: Dict[str, float] = defaultdict(float)
+        self.calls: Dict[str, int] = defaultdict(int)
+        self._stack: List[float] = []
+        self._patched = []
+
+    def _wrap(self, name: str, func):
+        stack, seconds, calls = self._stack, self.seconds, self.calls
+
+        def timed(*args, **kwargs):
+            stack.append(0.0)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                children = stack.pop()
+                seconds[name] += elapsed - children
+                calls[name] += 1
+                if stack:
+                    stack[-1] += elapsed
+        return timed
+
+    def install(self):
+        """替换为计时版本（实例属性覆盖类方法，模块属性替换导入的函数）"""
+        for name, value in vars(type(self.transform)).items():
+            if callable(value) and not name.startswith('_') and name not in NON_FIELD_METHODS:
+                setattr(self.transform, name, self._wrap(name, getattr(self.transform, name)))
+                self._patched.append((self.transform, name, None))
+
+        module = sys.modules[type(self.transform).__module__]
+        for name, value in list(vars(module).items()):
+            if callable(value) and not isinstance(value, type) and getattr(value, '__module__', None) in FIELD_MODULES:
+                setattr(module, name, self._wrap(name, value))
+                self._patched.append((module, name, value))
+
+    def uninstall(self):
+        """恢复原函数"""
+        for target, name, original in reversed(self._patched):
+            if original is None:
+                delattr(target, name)
+            else:
+                setattr(target, name, original)
+        self._patched.clear()
+
+    def report(self, rows: int, transform_seconds: float) -> Dict[str, Dict]:
+        """各字段解析函数的调用次数、自身耗时、每行耗时及占解析阶段的比例（其余为组装记录等开销）"""
+        fields = {}
+        for name, seconds in sorted(self.seconds.items(), key=lambda item: -item[1]):
+            fields[name] = {
+                'calls': self.calls[name],
+                'seconds': round(seconds, 3),
+                'us_per_row': round(seconds * 1e6 / rows, 2) if rows else None,
+                'share': round(seconds / transform_seconds, 4) if transform_seconds else None,
+            }
+        other = transform_seconds - sum(self.seconds.values())
+        fields['(其他)'] = {
+            'calls': None,
+            'seconds': round(other, 3),
+            'us_per_row': round(other * 1e6 / rows, 2) if rows else None,
+            'share': round(other / transform_seconds, 4) if transform_seconds else None,
+        }
+        return fields
+
+
+class BenchmarkPipeline(ETLPipeline):
+    """可按阶段线程记录 cProfile 的流水线"""
+
+    def __init__(self, strategy: str = None, batch_size: int = None, workers: int = None, profiler: str = None):
+        super().__init__(strategy, batch_size=batch_size, workers=workers)
+        self.profiler = profiler
+        self.profiles: List[cProfile.Profile] = []
+
+    def _run_stage(self, stage, *args):
+        if self.profiler != 'cprofile':
+            return super()._run_stage(stage, *args)
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12 起 cProfile 对所有线程生效，已有阶段启用时本线程同样会被记录
+            return super()._run_stage(stage, *args)
+        try:
+            super()._run_stage(stage, *args)
+        finally:
+            profile.disable()
+            self.profiles.append(profile)
+
+    def profile_stats(self) -> Optional[pstats.Stats]:
+        """合并各阶段线程的 cProfile 结果"""
+        if not self.profiles:
+            return None
+        stats = pstats.Stats(self.profiles[0])
+        for profile in self.profiles[1:]:
+            stats.add(profile)
+        return stats
+
+
+def _is_overhead(name: str, filename: str) -> bool:
+    """空闲等待（阶段线程在队列上阻塞）与字段计时包装本身不计入热点"""
+    return is_idle_frame(name, filename) or os.path.basename(filename) == os.path.basename(__file__)
+
+
+def cprofile_hot_functions(stats: pstats.Stats, top: int) -> List[Dict]:
+    """按自身耗时排序的热点函数"""
+    entries = [(key, value) for key, value in stats.stats.items() if not _is_overhead(key[2], key[0])]
+    ranked = sorted(entries, key=lambda item: -item[1][2])[:top]
+    hot = []
+    for (filename, line, name), (_, calls, self_seconds, cumulative_seconds, _) in ranked:
+        location = f"{os.path.relpath(filename)}:{line}" if line else filename
+        hot.append({
+            'function': f"{name} ({location})",
+            'calls': calls,
+            'self_seconds': round(self_seconds, 3),
+            'cumulative_seconds': round(cumulative_seconds, 3),
+        })
+    return hot
+
+
+def run_benchmark(strategy: str = DEFAULT_STRATEGY, rows: int = 100000, batch_size: int = None, workers: int = 1,
+                  source: str = 'memory', sink: str = 'null', profiler: Optional[str] = None,
+                  profile_output: Optional[str] = None, seed: int = 42, top: int = 15) -> Dict:
+    """
+    运行一次基准，返回报告：总吞吐量、各阶段耗时与吞吐量、字段解析耗时（仅串行解析）与热点函数
+    source: memory（内存合成数据）/ postgres（源库 compassedu_cases 的前 rows 条）
+    sink: null（校验并编码后丢弃）/ copy（COPY 到目标库的临时表）
+    """
+    pipeline = BenchmarkPipeline(strategy, batch_size=batch_size, workers=workers, profiler=profiler)
+    field_timer = None
+    if pipeline.workers <= 1:
+        pipeline.transform = create_transform(pipeline.strategy)
+        field_timer = FieldTimer(pipeline.transform)
+
+    connections = []
+    try:
+        if source == 'memory':
+            source_cursor = SyntheticSource(rows, seed)
+        else:
+            source_conn = psycopg2.connect(**SOURCE_DB_CONFIG)
+            connections.append(source_conn)
+            source_cursor = open_source_cursor(source_conn, name='etl_benchmark_cursor')
+            source_cursor.execute(f"SELECT {SOURCE_COLUMNS} FROM compassedu_cases ORDER BY id LIMIT %s", (rows,))
+
+        if sink == 'copy':
+            pipeline.target_conn = psycopg2.connect(**TARGET_DB_CONFIG)
+            connections.append(pipeline.target_conn)
+            pipeline.target_conn.cursor().execute(CASES_TABLE_DDL.format(table=BENCHMARK_TABLE))
+            writer = CopyWriter(pipeline.target_conn, table=BENCHMARK_TABLE, reject_path=os.devnull)
+        else:
+            pipeline.target_conn = NullConnection()
+            writer = NullWriter()
+
+        sampler = StackSampler(is_idle=_is_overhead, name='etl-sampler') if profiler == 'sample' else None
+        # 逐条的拒绝警告与每批进度日志会淹没报告，基准运行期间只输出错误
+        logging.disable(logging.WARNING)
+        if field_timer:
+            field_timer.install()
+        if sampler:
+            sampler.start()
+        started = time.perf_counter()
+        try:
+            pipeline.execute(source_cursor, writer)
+        finally:
+            elapsed = time.perf_counter() - started
+            if sampler:
+                sampler.stop()
+            if field_timer:
+                field_timer.uninstall()
+            logging.disable(logging.NOTSET)
+    finally:
+        for conn in connections:
+            conn.close()
+
+    read_rows = pipeline.stats['source'].rows
+    stages = {}
+    for name, stats in pipeline.stats.items():
+        stage = stats.to_dict()
+        stage['rows_per_second'] = round(stats.rows / stats.busy_seconds, 1) if stats.busy_seconds else None
+        stages[name] = stage
+
+    peak_rss = get_peak_rss()
+    report = {
+        'strategy': pipeline.strategy,
+        'source': source,
+        'sink': sink,
+        'workers': pipeline.workers,
+        'batch_size': pipeline.batch_size,
+        'rows': read_rows,
+        'processed': pipeline.processed_count,
+        'errors': pipeline.error_count,
+        'elapsed_seconds': round(elapsed, 3),
+        'rows_per_second': round(read_rows / elapsed, 1) if elapsed else None,
+        'stages': stages,
+        'fields': field_timer.report(read_rows, pipeline.stats['transform'].busy_seconds) if field_timer else None,
+        'parser_cache': pipeline.parser_cache_summary(),
+        'peak_rss': peak_rss,
+        'peak_rss_mb': peak_rss_mb(peak_rss),
+        'profiler': profiler,
+        'hot_functions': [],
+        'profile_output': None,
+    }
+
+    if profiler == 'cprofile' and pipeline.profile_stats():
+        stats = pipeline.profile_stats()
+        report['hot_functions'] = cprofile_hot_functions(stats, top)
+        report['profile_output'] = profile_output or 'logs/etl_benchmark.pstats'
+        _ensure_parent(report['profile_output'])
+        stats.dump_stats(report['profile_output'])
+    elif sampler:
+        report['hot_functions'] = sampler.hot_functions(top)
+        report['profile_output'] = profile_output or 'logs/etl_benchmark.folded'
+        _ensure_parent(report['profile_output'])
+        sampler.save(report['profile_output'])
+    return report
+
+
+def _ensure_parent(path: str):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+
+def print_benchmark_report(report: Dict):
+    """输出基准报告"""
+    print(f"ETL吞吐量基准（解析策略: {report['strategy']}）")
+    print(f"源 {report['source']}，写入 {report['sink']}，"
+          f"解析进程 {report['workers']}，批大小 {report['batch_size']}")
+    print(f"共 {report['rows']:,} 条（写入 {report['processed']:,}，失败 {report['errors']:,}），"
+          f"耗时 {report['elapsed_seconds']} 秒，{report['rows_per_second']:,} 条/秒")
+    if report['peak_rss_mb'] is not None:
+        print(f"峰值内存 {report['peak_rss_mb']} MB")
+
+    print(f"\n{'阶段':<12}{'处理(s)':>10}{'等待(s)':>10}{'条数':>10}{'条/秒(处理)':>14}")
+    for name, stage in report['stages'].items():
+        print(f"{name:<12}{stage['busy_seconds']:>10}{stage['wait_seconds']:>10}{stage['rows']:>10}"
+              f"{stage['rows_per_second'] or '-':>14}")
+
+    if report['fields']:
+        print(f"\n{'字段解析':<36}{'调用':>10}{'自身(s)':>10}{'us/条':>10}{'占解析':>10}")
+        for name, field in report['fields'].items():
+            print(f"{name:<36}{field['calls'] or '':>10}{field['seconds']:>10}{field['us_per_row']:>10}"
+                  f"{field['share']:>10.1%}")
+    else:
+        print("\n（多进程解析时不统计字段耗时，需要时使用 --workers 1）")
+
+    if report['hot_functions']:
+        print(f"\n热点函数（{report['profiler']}，结果保存在 {report['profile_output']}）:")
+        for item in report['hot_functions']:
+            if 'samples' in item:
+                print(f"  {item['share']:>6.1%} {item['samples']:>7} 次采样  {item['function']}")
+            else:
+                print(f"  {item['self_seconds']:>8.3f}s {item['calls']:>9} 次调用  {item['function']}")
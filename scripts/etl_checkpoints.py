@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+ETL运行日志与检查点
+每次全量运行在 etl_runs 表登记一行；每批数据写入影子表时，在同一事务内记录已提交的最大源 id 与计数，
+进程中断后可从检查点继续（检查点之后的批次会重新处理，已提交的批次不会重复写入）。
+按 id 区间并行时，每个区间是一个子运行（parent_run_id 指向总运行），各自记录检查点
+"""
+import logging
+from typing import Dict, List, Optional, Tuple
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.etl_tables import HighWaterMark
+
+logger = logging.getLogger(__name__)
+
+RUNS_TABLE = 'etl_runs'
+# 全量运行持有的会话级 advisory lock，防止两次运行（如误判中断后续跑）同时写入影子表
+RUN_LOCK_ID = 7260301
+
+# 运行状态
+STATUS_RUNNING = 'running'
+STATUS_COMPLETED = 'completed'
+STATUS_FAILED = 'failed'
+# 新的全量运行开始后，之前未完成的运行不再续跑
+STATUS_SUPERSEDED = 'superseded'
+
+RUN_COLUMNS = (
+    'run_id', 'parent_run_id', 'strategy', 'status', 'id_from', 'id_to', 'source_updated_at',
+    'last_committed_id', 'processed_count', 'error_count'
+)
+
+
+def ensure_runs_table(cursor):
+    """创建运行日志表（已存在时跳过，与 003_etl_runs.sql 保持一致）"""
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {RUNS_TABLE} (
+            run_id SERIAL PRIMARY KEY,
+            parent_run_id INTEGER REFERENCES {RUNS_TABLE}(run_id),
+            strategy VARCHAR(20) NOT NULL,
+            status VARCHAR(20) NOT NULL DEFAULT '{STATUS_RUNNING}',
+            id_from INTEGER,
+            id_to INTEGER,
+            source_updated_at TIMESTAMP,
+            last_committed_id INTEGER,
+            processed_count INTEGER NOT NULL DEFAULT 0,
+            error_count INTEGER NOT NULL DEFAULT 0,
+            error_message TEXT,
+            started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            finished_at TIMESTAMP
+        )
+    """)
+
+
+def _row_to_run(row) -> Optional[Dict]:
+    return dict(zip(RUN_COLUMNS, row)) if row else None
+
+
+def acquire_run_lock(cursor):
+    """获取全量运行锁（连接关闭时自动释放），已有运行在进行时抛出异常"""
+    cursor.execute("SELECT pg_try_advisory_lock(%s)", (RUN_LOCK_ID,))
+    if not cursor.fetchone()[0]:
+        raise RuntimeError("已有ETL全量运行正在进行，请等待其结束后再运行或续跑")
+
+
+def create_run(cursor, strategy: str, id_from: Optional[int], id_to: Optional[int],
+               source_updated_at=None, parent_run_id: Optional[int] = None) -> int:
+    """
+    登记一次运行，负责源表 id 区间 (id_from, id_to]（id_from 为 None 表示从头开始），返回 run_id
+    """
+    ensure_runs_table(cursor)
+    cursor.execute(f"""
+        INSERT INTO {RUNS_TABLE} (parent_run_id, strategy, id_from, id_to, source_updated_at)
+        VALUES (%s, %s, %s, %s, %s)
+        RETURNING run_id
+    """, (parent_run_id, strategy, id_from, id_to, source_updated_at))
+    return cursor.fetchone()[0]
+
+
+def get_run(cursor, run_id: int) -> Optional[Dict]:
+    """读取一次运行"""
+    cursor.execute(f"SELECT {', '.join(RUN_COLUMNS)} FROM {RUNS_TABLE} WHERE run_id = %s", (run_id,))
+    return _row_to_run(cursor.fetchone())
+
+
+def get_child_runs(cursor, parent_run_id: int) -> List[Dict]:
+    """读取总运行下的各区间子运行（按区间顺序）"""
+    cursor.execute(
+        f"SELECT {', '.join(RUN_COLUMNS)} FROM {RUNS_TABLE} WHERE parent_run_id = %s ORDER BY id_from NULLS FIRST",
+        (parent_run_id,)
+    )
+    return [_row_to_run(row) for row in cursor.fetchall()]
+
+
+def find_resumable_run(cursor) -> Optional[Dict]:
+    """最近一次未完成（运行中或失败）的全量总运行，没有时返回 None"""
+    ensure_runs_table(cursor)
+    cursor.execute(f"""
+        SELECT {', '.join(RUN_COLUMNS)} FROM {RUNS_TABLE}
+        WHERE parent_run_id IS NULL AND status IN (%s, %s)
+        ORDER BY run_id DESC
+        LIMIT 1
+    """, (STATUS_RUNNING, STATUS_FAILED))
+    return _row_to_run(cursor.fetchone())
+
+
+def supersede_unfinished_runs(cursor):
+    """开始新的全量运行前，将之前未完成的运行标记为不再续跑"""
+    ensure_runs_table(cursor)
+    cursor.execute(f"""
+        UPDATE {RUNS_TABLE} SET status = %s, updated_at = CURRENT_TIMESTAMP
+        WHERE status IN (%s, %s)
+    """, (STATUS_SUPERSEDED, STATUS_RUNNING, STATUS_FAILED))
+
+
+def save_checkpoint(cursor, run_id: int, last_committed_id: int, processed_count: int, error_count: int):
+    """记录检查点（由调用方在写入该批数据的同一事务内提交）"""
+    cursor.execute(f"""
+        UPDATE {RUNS_TABLE}
+        SET last_committed_id = %s, processed_count = %s, error_count = %s, updated_at = CURRENT_TIMESTAMP
+        WHERE run_id = %s
+    """, (last_committed_id, processed_count, error_count, run_id))
+
+
+def finish_run(cursor, run_id: int, status: str, error_message: Optional[str] = None):
+    """结束一次运行（由调用方提交）"""
+    cursor.execute(f"""
+        UPDATE {RUNS_TABLE}
+        SET status = %s, error_message = %s, updated_at = CURRENT_TIMESTAMP, finished_at = CURRENT_TIMESTAMP
+        WHERE run_id = %s
+    """, (status, error_message, run_id))
+
+
+def mark_run_running(cursor, run_id: int):
+    """续跑前将失败的运行重新标记为运行中"""
+    cursor.execute(f"""
+        UPDATE {RUNS_TABLE} SET status = %s, error_message = NULL, updated_at = CURRENT_TIMESTAMP
+        WHERE run_id = %s
+    """, (STATUS_RUNNING, run_id))
+
+
+def resume_point(run: Dict) -> Optional[int]:
+    """续跑的起点：已提交的最大源 id，尚无检查点时为区间下界"""
+    if run['last_committed_id'] is not None:
+        return run['last_committed_id']
+    return run['id_from']
+
+
+def run_high_water_mark(run: Dict) -> HighWaterMark:
+    """运行开始时记录的源表高水位，切换时写入 etl_state"""
+    return run['id_to'], run['source_updated_at']
+
+
+def split_id_range(id_from: Optional[int], id_to: Optional[int], partitions: int) -> List[Tuple[int, int]]:
+    """
+    将源表 id 区间 (id_from, id_to] 按 id 值均分为至多 partitions 个相邻的左开右闭区间
+    """
+    if id_to is None or id_from is None or id_to <= id_from:
+        return [(id_from, id_to)]
+
+    partitions = max(1, min(partitions, id_to - id_from))
+    span = id_to - id_from
+    bounds = [id_from + span * i // partitions for i in range(partitions + 1)]
+    return list(zip(bounds[:-1], bounds[1:]))
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+增量ETL辅助模块
+基于源表 compassedu_cases 的高水位（最大 id，及可选的更新时间列）只读取新增/修改的记录，并输出变更集
+"""
+import json
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.etl_tables import HighWaterMark
+
+logger = logging.getLogger(__name__)
+
+SOURCE_COLUMNS = "id, title, url, university, program, student_background, gpa, language_score, graduation_year"
+
+
+def read_source_high_water_mark(cursor, updated_column: Optional[str] = None) -> HighWaterMark:
+    """
+    读取源表当前的高水位；本次运行只处理不超过该水位的记录，运行期间新到的记录留给下一次
+    """
+    if updated_column:
+        cursor.execute(f"SELECT MAX(id), MAX({updated_column}) FROM compassedu_cases")
+    else:
+        cursor.execute("SELECT MAX(id), NULL FROM compassedu_cases")
+    max_id, max_updated_at = cursor.fetchone()
+    return max_id, max_updated_at
+
+
+def merge_high_water_mark(previous: HighWaterMark, current: HighWaterMark) -> HighWaterMark:
+    """合并新旧高水位，源表为空或更新时间列为空时保留旧值"""
+    return (
+        current[0] if current[0] is not None else previous[0],
+        current[1] if current[1] is not None else previous[1],
+    )
+
+
+def build_incremental_query(previous: HighWaterMark, current: HighWaterMark,
+                            updated_column: Optional[str] = None) -> Tuple[str, Dict]:
+    """
+    构建增量读取SQL：id 位于 (上次水位, 本次水位] 的新记录，
+    以及（配置了更新时间列时）更新时间位于 (上次水位, 本次水位] 的已修改记录
+    """
+    params = {'last_id': previous[0], 'max_id': current[0]}
+    condition = "id <= %(max_id)s"
+    if previous[0] is not None:
+        condition = "id > %(last_id)s AND " + condition
+
+    if updated_column and current[1] is not None:
+        params.update({'last_updated_at': previous[1], 'max_updated_at': current[1]})
+        updated_condition = f"{updated_column} <= %(max_updated_at)s"
+        if previous[1] is not None:
+            updated_condition = f"{updated_column} > %(last_updated_at)s AND " + updated_condition
+        condition = f"({condition}) OR ({updated_condition})"
+
+    return f"SELECT {SOURCE_COLUMNS} FROM compassedu_cases WHERE {condition} ORDER BY id", params
+
+
+def write_changeset(path: str, previous: HighWaterMark, current: HighWaterMark,
+                    inserted_ids: List[int], updated_ids: List[int], error_count: int) -> Dict:
+    """
+    输出本次增量运行的变更集（JSON），供下游缓存按 original_id 增量更新
+    """
+    changeset = {
+        'generated_at': datetime.now().isoformat(),
+        'from': {'source_id': previous[0], 'source_updated_at': previous[1]},
+        'to': {'source_id': current[0], 'source_updated_at': current[1]},
+        'inserted': sorted(inserted_ids),
+        'updated': sorted(updated_ids),
+        'error_count': error_count,
+    }
+
+    changeset_dir = os.path.dirname(path)
+    if changeset_dir:
+        os.makedirs(changeset_dir, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(changeset, f, ensure_ascii=False, indent=2, default=str)
+
+    logger.info(f"变更集已写入 {path}: 新增 {len(inserted_ids)} 条, 更新 {len(updated_ids)} 条")
+    return changeset
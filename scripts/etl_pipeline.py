@@ -0,0 +1,607 @@
+#!/usr/bin/env python3
+"""
+统一ETL流水线
+读取（source）、解析（transform）、写入（sink）三个阶段分别运行，阶段之间通过有界队列衔接：
+下游处理不过来时上游阻塞等待（背压），内存占用只取决于队列长度与批大小。
+三种处理器（basic/improved/optimized）的解析逻辑作为可互换的解析策略接入，
+支持全量（影子表 + 原子切换）与增量（按 original_id 合并 + 变更集）两种模式，并统计各阶段耗时。
+全量运行按批记录检查点（见 etl_checkpoints.py），中断后可续跑，也可按源表 id 区间拆分为多个进程并行处理
+"""
+import importlib
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import sys
+import os
+
+import psycopg2
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.utils.metrics import Counter, Gauge, Registry
+from backend.utils.parse_cache import clear_parser_caches, diff_cache_stats, merge_cache_stats, parser_cache_stats
+from config.database import SOURCE_DB_CONFIG, TARGET_DB_CONFIG
+from config.settings import ETL_CONFIG
+from scripts.etl_checkpoints import (
+    STATUS_COMPLETED, STATUS_FAILED, acquire_run_lock, create_run, find_resumable_run, finish_run, get_child_runs, get_run,
+    mark_run_running, resume_point, run_high_water_mark, save_checkpoint, split_id_range, supersede_unfinished_runs
+)
+from scripts.etl_incremental import (
+    build_incremental_query, merge_high_water_mark, read_source_high_water_mark, write_changeset
+)
+from scripts.etl_runtime import log_peak_rss, open_source_cursor
+from scripts.etl_tables import (
+    STAGING_TABLE, create_staging_table, get_high_water_mark, publish_staging_table, set_high_water_mark,
+    table_exists
+)
+from scripts.etl_writers import CopyWriter, UpsertWriter, run_reject_path
+
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# 解析策略：名称 -> 处理器类（按需导入，处理器需提供 process_single_case(raw_case) -> Optional[Dict]）
+TRANSFORM_STRATEGIES = {
+    'basic': 'scripts.etl_processor.ETLProcessor',
+    'improved': 'scripts.improved_etl.ImprovedETLProcessor',
+    'optimized': 'scripts.optimized_etl.OptimizedETLProcessor',
+}
+
+MODES = ('full', 'incremental')
+STAGES = ('source', 'transform', 'sink')
+
+# ETL 运行指标：单独注册，每次运行结束后写入文本文件（ETL_METRICS_FILE），由 API 的 /metrics 一并输出
+ETL_REGISTRY = Registry()
+ETL_ROWS = Counter('etl_rows_total', 'ETL处理的记录数', ('mode', 'outcome'), registry=ETL_REGISTRY)
+ETL_RUNS = Counter('etl_runs_total', 'ETL运行次数', ('mode', 'status'), registry=ETL_REGISTRY)
+ETL_LAST_RUN_TIMESTAMP = Gauge('etl_last_run_timestamp_seconds', '最近一次ETL运行结束的时间', ('mode', 'status'),
+                               registry=ETL_REGISTRY)
+ETL_LAST_RUN_DURATION = Gauge('etl_last_run_duration_seconds', '最近一次ETL运行的耗时（秒）', ('mode',),
+                              registry=ETL_REGISTRY)
+
+# 队列结束标记
+_END = object()
+
+
+class PipelineAborted(Exception):
+    """其他阶段已失败，当前阶段停止"""
+
+
+class StageStats:
+    """单个阶段的计数：处理耗时（不含队列等待）、等待耗时、批次数与记录数"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.busy_seconds = 0.0
+        self.wait_seconds = 0.0
+        self.batches = 0
+        self.rows = 0
+
+    def to_dict(self) -> Dict:
+        return {
+            'busy_seconds': round(self.busy_seconds, 3),
+            'wait_seconds': round(self.wait_seconds, 3),
+            'batches': self.batches,
+            'rows': self.rows,
+        }
+
+
+def create_transform(strategy: str):
+    """按名称创建解析策略（处理器实例）"""
+    if strategy not in TRANSFORM_STRATEGIES:
+        raise ValueError(f"未知的解析策略: {strategy}（可选: {', '.join(TRANSFORM_STRATEGIES)}）")
+    module_name, class_name = TRANSFORM_STRATEGIES[strategy].rsplit('.', 1)
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+def iter_source_batches(source_cursor, batch_size: int) -> Iterator[List[tuple]]:
+    """按批读取源数据"""
+    while True:
+        raw_cases = source_cursor.fetchmany(batch_size)
+        if not raw_cases:
+            break
+        yield raw_cases
+
+
+def transform_batches(strategy: str, raw_batches: Iterable[List[tuple]], workers: int,
+                      transform=None, cache_stats: Optional[Dict[int, Dict]] = None) -> Iterator[List[Optional[Dict]]]:
+    """
+    解析各批原始案例，按输入顺序产出结果；每批结果与输入一一对应，解析失败的位置为 None
+    workers > 1 时使用进程池并行解析，在途批次数不超过 workers * 2
+    传入 cache_stats 时按进程号记录各解析进程最新的解析缓存统计
+    """
+    if workers <= 1:
+        transform = transform or create_transform(strategy)
+        for raw_cases in raw_batches:
+            processed_cases = [transform.process_single_case(raw_case) for raw_case in raw_cases]
+            if cache_stats is not None:
+                cache_stats[os.getpid()] = parser_cache_stats()
+            yield processed_cases
+        return
+
+    def collect(future) -> List[Optional[Dict]]:
+        processed_cases, pid, worker_cache_stats = future.result()
+        if cache_stats is not None:
+            cache_stats[pid] = worker_cache_stats
+        return processed_cases
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(strategy,)) as executor:
+        pending = deque()
+        for raw_cases in raw_batches:
+            pending.append(executor.submit(_process_chunk, raw_cases))
+
+            # 限制在途批次数，避免读取速度远超写入时占用过多内存
+            if len(pending) >= workers * 2:
+                yield collect(pending.popleft())
+
+        while pending:
+            yield collect(pending.popleft())
+
+
+class ETLPipeline:
+    """ETL流水线：读取线程 -> 解析（主线程/进程池） -> 写入线程"""
+
+    def __init__(self, strategy: str = None, batch_size: int = None, workers: int = None, queue_size: int = None):
+        self.strategy = strategy or ETL_CONFIG['strategy']
+        if self.strategy not in TRANSFORM_STRATEGIES:
+            raise ValueError(f"未知的解析策略: {self.strategy}（可选: {', '.join(TRANSFORM_STRATEGIES)}）")
+        self.batch_size = batch_size or ETL_CONFIG['batch_size']
+        self.workers = workers or ETL_CONFIG['workers']
+        self.queue_size = queue_size or ETL_CONFIG['queue_size']
+
+        self.source_conn = None
+        self.target_conn = None
+        self.processed_count = 0
+        self.error_count = 0
+        # 当前记录检查点的运行（仅全量模式）
+        self.run_id = None
+        # 峰值内存（MB），运行结束时由 run() 记录
+        self.peak_rss_mb = None
+        # 串行解析时使用的处理器实例（None 时按策略创建）
+        self.transform = None
+        self.stats = {name: StageStats(name) for name in STAGES}
+        # 解析缓存统计：进程号 -> 该进程最新统计；当前进程另记运行前的计数，汇总时扣除
+        self.cache_stats: Dict[int, Dict] = {}
+        self._cache_baseline = parser_cache_stats()
+
+        self._failed = threading.Event()
+        self._errors: List[BaseException] = []
+
+    def connect_databases(self):
+        """连接源数据库和目标数据库"""
+        try:
+            self.source_conn = psycopg2.connect(**SOURCE_DB_CONFIG)
+            logger.info("成功连接源数据库")
+
+            self.target_conn = psycopg2.connect(**TARGET_DB_CONFIG)
+            self.target_conn.autocommit = False
+            logger.info("成功连接目标数据库")
+
+        except Exception as e:
+            logger.error(f"数据库连接失败: {e}")
+            raise
+
+    def close_connections(self):
+        """关闭数据库连接"""
+        if self.source_conn:
+            self.source_conn.close()
+        if self.target_conn:
+            self.target_conn.close()
+
+    def run(self, mode: str = 'full', resume: bool = False, partitions: int = 1) -> Dict:
+        """
+        运行流水线，返回运行汇总（增量模式下包含变更集）
+        全量模式下 resume=True 时从最近一次未完成运行的检查点继续，partitions > 1 时按 id 区间多进程并行
+        """
+        if mode not in MODES:
+            raise ValueError(f"未知的运行模式: {mode}（可选: {', '.join(MODES)}）")
+
+        started = time.time()
+        status = 'failed'
+        try:
+            self.connect_databases()
+            if mode == 'incremental':
+                summary = self._run_incremental()
+            else:
+                summary = self._run_full(resume, partitions)
+            self.log_stage_stats()
+            self.peak_rss_mb = log_peak_rss()
+            summary['peak_rss_mb'] = self.peak_rss_mb
+            status = 'completed'
+            return summary
+
+        except Exception as e:
+            logger.error(f"ETL处理失败: {e}")
+            if self.target_conn:
+                self.target_conn.rollback()
+            raise
+        finally:
+            self.close_connections()
+            self.record_metrics(mode, status, started)
+
+    def run_partition(self, run_id: int):
+        """运行（或续跑）一个 id 区间子运行，写入影子表；由区间工作进程调用"""
+        try:
+            self.connect_databases()
+            cursor = self.target_conn.cursor()
+            run = get_run(cursor, run_id)
+            mark_run_running(cursor, run_id)
+            self.target_conn.commit()
+
+            self._run_range(run)
+            finish_run(cursor, run_id, STATUS_COMPLETED)
+            self.target_conn.commit()
+            logger.info(f"区间 ({run['id_from']}, {run['id_to']}] 处理完成，共 {self.processed_count} 条记录")
+            self.log_stage_stats()
+
+        except Exception as e:
+            logger.error(f"区间运行 {run_id} 失败: {e}")
+            self._mark_failed(run_id, e)
+            raise
+        finally:
+            self.close_connections()
+
+    def _run_full(self, resume: bool = False, partitions: int = 1) -> Dict:
+        """全量模式：写入影子表（按批记录检查点），完成后建索引并原子切换"""
+        cursor = self.target_conn.cursor()
+        acquire_run_lock(cursor)
+
+        run = find_resumable_run(cursor) if resume else None
+        if run and not table_exists(cursor, STAGING_TABLE):
+            logger.warning(f"运行 {run['run_id']} 的影子表已不存在，无法续跑")
+            run = None
+        if resume and run is None:
+            logger.info("没有可续跑的运行，开始新的全量运行")
+
+        if run is None:
+            run = self._start_full_run(cursor, partitions)
+        else:
+            mark_run_running(cursor, run['run_id'])
+            logger.info(f"从运行 {run['run_id']} 的检查点继续")
+        self.target_conn.commit()
+
+        try:
+            child_runs = get_child_runs(cursor, run['run_id'])
+            if child_runs:
+                self._run_partitions(child_runs)
+                child_runs = get_child_runs(cursor, run['run_id'])
+                self.processed_count = sum(child['processed_count'] for child in child_runs)
+                self.error_count = sum(child['error_count'] for child in child_runs)
+                save_checkpoint(cursor, run['run_id'], run['id_to'], self.processed_count, self.error_count)
+            else:
+                self._run_range(run)
+
+            # 运行完成标记与切换在同一事务内提交
+            finish_run(cursor, run['run_id'], STATUS_COMPLETED)
+            publish_staging_table(self.target_conn, run_high_water_mark(run))
+
+        except Exception as e:
+            self._mark_failed(run['run_id'], e)
+            raise
+
+        logger.info(f"ETL处理完成！")
+        logger.info(f"成功处理: {self.processed_count} 条记录")
+        logger.info(f"失败记录: {self.error_count} 条")
+        summary = self.summary('full')
+        summary['run_id'] = run['run_id']
+        return summary
+
+    def _start_full_run(self, cursor, partitions: int) -> Dict:
+        """开始新的全量运行：重建影子表并登记运行（及各区间子运行）"""
+        supersede_unfinished_runs(cursor)
+
+        # 先记录源表高水位：本次只处理不超过该水位的记录，并供后续增量ETL衔接
+        source_cursor = self.source_conn.cursor()
+        high_water_mark = read_source_high_water_mark(source_cursor, ETL_CONFIG['source_updated_column'])
+
+        # 写入影子表，在线表在切换前保持不变
+        create_staging_table(self.target_conn)
+
+        run_id = create_run(cursor, self.strategy, None, high_water_mark[0], high_water_mark[1])
+        if partitions > 1:
+            source_cursor.execute("SELECT MIN(id) FROM compassedu_cases")
+            min_id = source_cursor.fetchone()[0]
+            id_from = min_id - 1 if min_id is not None else None
+            ranges = split_id_range(id_from, high_water_mark[0], partitions)
+            if len(ranges) > 1:
+                for range_from, range_to in ranges:
+                    create_run(cursor, self.strategy, range_from, range_to, high_water_mark[1], parent_run_id=run_id)
+        return get_run(cursor, run_id)
+
+    def _run_range(self, run: Dict):
+        """处理一次运行负责的 id 区间中检查点之后的部分，写入影子表"""
+        self.run_id = run['run_id']
+        self.processed_count = run['processed_count']
+        self.error_count = run['error_count']
+
+        # 与增量读取相同的区间条件：(检查点, 区间上界]
+        query, params = build_incremental_query((resume_point(run), None), (run['id_to'], None))
+        source_cursor = open_source_cursor(self.source_conn)
+        source_cursor.execute(query, params)
+
+        logger.info(f"开始处理数据（解析策略: {self.strategy}，解析进程数: {self.workers}，"
+                    f"源 id 区间: ({resume_point(run)}, {run['id_to']}]）...")
+        # 每个运行（区间子运行）使用独立的拒绝文件，续跑时追加
+        writer = CopyWriter(self.target_conn, table=STAGING_TABLE, reject_path=run_reject_path(run['run_id']), append=True)
+        self.execute(source_cursor, writer)
+        writer.close()
+
+    def _run_partitions(self, child_runs: List[Dict]):
+        """为每个未完成的区间启动一个工作进程，全部结束后检查结果"""
+        pending = [child for child in child_runs if child['status'] != STATUS_COMPLETED]
+        if not pending:
+            return
+
+        # 进程中持有数据库连接，使用 spawn 启动，避免子进程继承父进程的连接
+        context = multiprocessing.get_context('spawn')
+        workers = max(1, self.workers // len(pending))
+        processes = [
+            context.Process(
+                target=_run_partition,
+                args=(self.strategy, self.batch_size, workers, self.queue_size, child['run_id']),
+                name=f"etl-partition-{child['run_id']}"
+            )
+            for child in pending
+        ]
+        logger.info(f"启动 {len(processes)} 个区间工作进程（每个解析进程数: {workers}）")
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        failed = [process.name for process in processes if process.exitcode != 0]
+        if failed:
+            raise RuntimeError(f"{len(failed)} 个区间运行失败（{', '.join(failed)}），可使用 --resume 继续")
+
+    def _mark_failed(self, run_id: int, error: Exception):
+        """将运行标记为失败（连接已断开时无法标记，续跑同样会从检查点继续）"""
+        if not self.target_conn or self.target_conn.closed:
+            return
+        try:
+            self.target_conn.rollback()
+            finish_run(self.target_conn.cursor(), run_id, STATUS_FAILED, str(error))
+            self.target_conn.commit()
+        except Exception as e:
+            logger.warning(f"无法记录运行 {run_id} 的失败状态: {e}")
+
+    def _run_incremental(self) -> Dict:
+        """
+        增量模式：只读取高水位之后的新增/修改记录，按 original_id 合并到在线表，输出变更集
+        依赖 cases.original_id 上的唯一索引（见 002_incremental_etl.sql）
+        """
+        updated_column = ETL_CONFIG['source_updated_column']
+
+        target_cursor = self.target_conn.cursor()
+        previous_mark = get_high_water_mark(target_cursor)
+        self.target_conn.commit()
+
+        current_mark = merge_high_water_mark(
+            previous_mark, read_source_high_water_mark(self.source_conn.cursor(), updated_column)
+        )
+        query, params = build_incremental_query(previous_mark, current_mark, updated_column)
+        source_cursor = open_source_cursor(self.source_conn)
+        source_cursor.execute(query, params)
+
+        logger.info(f"开始增量处理（解析策略: {self.strategy}，上次水位: {previous_mark[0]}，"
+                    f"本次水位: {current_mark[0]}）...")
+        writer = UpsertWriter(self.target_conn)
+        self.execute(source_cursor, writer)
+        writer.close()
+
+        # 全部批次写入后再推进高水位，中途失败时下次运行会重新处理（合并是幂等的）
+        set_high_water_mark(target_cursor, current_mark)
+        self.target_conn.commit()
+
+        changeset = write_changeset(
+            ETL_CONFIG['changeset_file'], previous_mark, current_mark,
+            writer.inserted_ids, writer.updated_ids, self.error_count
+        )
+        logger.info(f"增量ETL完成！新增 {len(writer.inserted_ids)} 条，更新 {len(writer.updated_ids)} 条，"
+                    f"失败 {self.error_count} 条")
+        summary = self.summary('incremental')
+        summary['changeset'] = changeset
+        return summary
+
+    def execute(self, source_cursor, writer):
+        """
+        运行三个阶段：读取与写入各占一个线程，解析在当前线程（或其进程池）中进行；
+        任一阶段失败时其余阶段尽快停止，并在此抛出首个异常
+        """
+        raw_queue = queue.Queue(maxsize=self.queue_size)
+        processed_queue = queue.Queue(maxsize=self.queue_size)
+
+        threads = [
+            threading.Thread(target=self._run_stage, args=(self._source_stage, source_cursor, raw_queue),
+                             name='etl-source', daemon=True),
+            threading.Thread(target=self._run_stage, args=(self._sink_stage, writer, processed_queue),
+                             name='etl-sink', daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+        self._run_stage(self._transform_stage, raw_queue, processed_queue)
+        for thread in threads:
+            thread.join()
+
+        if self._errors:
+            raise self._errors[0]
+
+    def _run_stage(self, stage, *args):
+        """运行单个阶段并记录异常"""
+        try:
+            stage(*args)
+        except PipelineAborted:
+            pass
+        except BaseException as e:
+            self._errors.append(e)
+            self._failed.set()
+
+    def _put(self, target_queue: queue.Queue, item, stats: StageStats):
+        """放入下游队列；队列已满时阻塞（背压），阻塞时间计入等待耗时"""
+        started = time.perf_counter()
+        try:
+            while True:
+                if self._failed.is_set():
+                    raise PipelineAborted()
+                try:
+                    target_queue.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+        finally:
+            stats.wait_seconds += time.perf_counter() - started
+
+    def _iter_queue(self, source_queue: queue.Queue, stats: StageStats) -> Iterator:
+        """从上游队列依次取出批次直到结束标记，等待时间计入等待耗时"""
+        while True:
+            started = time.perf_counter()
+            try:
+                while True:
+                    if self._failed.is_set():
+                        raise PipelineAborted()
+                    try:
+                        item = source_queue.get(timeout=0.1)
+                        break
+                    except queue.Empty:
+                        continue
+            finally:
+                stats.wait_seconds += time.perf_counter() - started
+            if item is _END:
+                return
+            yield item
+
+    def _source_stage(self, source_cursor, raw_queue: queue.Queue):
+        """读取阶段：从服务器端游标按批读取"""
+        stats = self.stats['source']
+        batches = iter_source_batches(source_cursor, self.batch_size)
+        while True:
+            started = time.perf_counter()
+            raw_cases = next(batches, None)
+            stats.busy_seconds += time.perf_counter() - started
+            if raw_cases is None:
+                break
+            stats.batches += 1
+            stats.rows += len(raw_cases)
+            self._put(raw_queue, raw_cases, stats)
+        self._put(raw_queue, _END, stats)
+
+    def _transform_stage(self, raw_queue: queue.Queue, processed_queue: queue.Queue):
+        """解析阶段：按所选策略解析，保持输入顺序；每批结果附带该批最后一条源记录的 id（检查点）"""
+        stats = self.stats['transform']
+        last_ids = deque()
+
+        def raw_batches():
+            for raw_cases in self._iter_queue(raw_queue, stats):
+                last_ids.append(raw_cases[-1][0])
+                yield raw_cases
+
+        batches = transform_batches(self.strategy, raw_batches(), self.workers, transform=self.transform,
+                                    cache_stats=self.cache_stats)
+        try:
+            while True:
+                started = time.perf_counter()
+                waited = stats.wait_seconds
+                processed_cases = next(batches, None)
+                # 处理耗时不含等待上游的时间
+                stats.busy_seconds += time.perf_counter() - started - (stats.wait_seconds - waited)
+                if processed_cases is None:
+                    break
+                stats.batches += 1
+                stats.rows += len(processed_cases)
+                self._put(processed_queue, (last_ids.popleft(), processed_cases), stats)
+        finally:
+            # 提前退出时关闭生成器，等待进程池中的在途批次结束
+            batches.close()
+        self._put(processed_queue, _END, stats)
+
+    def _sink_stage(self, writer, processed_queue: queue.Queue):
+        """写入阶段：过滤解析失败的记录，按批写入；检查点与该批数据在同一事务内提交"""
+        stats = self.stats['sink']
+        for last_id, processed_cases in self._iter_queue(processed_queue, stats):
+            started = time.perf_counter()
+            batch_data = [case for case in processed_cases if case]
+            self.error_count += len(processed_cases) - len(batch_data)
+
+            if batch_data:
+                written = writer.write(batch_data)
+                self.processed_count += written
+                self.error_count += len(batch_data) - written
+                stats.rows += written
+            if self.run_id is not None:
+                save_checkpoint(self.target_conn.cursor(), self.run_id, last_id, self.processed_count, self.error_count)
+            if batch_data or self.run_id is not None:
+                self.target_conn.commit()
+                logger.info(f"已处理 {self.processed_count} 条记录")
+
+            stats.batches += 1
+            stats.busy_seconds += time.perf_counter() - started
+
+    def record_metrics(self, mode: str, status: str, started: float):
+        """记录本次运行的指标并写入文本文件（写入失败不影响运行结果）"""
+        ETL_ROWS.inc(self.processed_count, (mode, 'processed'))
+        ETL_ROWS.inc(self.error_count, (mode, 'error'))
+        ETL_RUNS.inc(labels=(mode, status))
+        ETL_LAST_RUN_TIMESTAMP.set(time.time(), (mode, status))
+        ETL_LAST_RUN_DURATION.set(time.time() - started, (mode,))
+        if ETL_CONFIG['metrics_file']:
+            try:
+                ETL_REGISTRY.write_textfile(ETL_CONFIG['metrics_file'])
+            except OSError as e:
+                logger.warning(f"写入ETL指标文件失败: {e}")
+
+    def summary(self, mode: str) -> Dict:
+        """运行汇总"""
+        return {
+            'mode': mode,
+            'strategy': self.strategy,
+            'processed': self.processed_count,
+            'errors': self.error_count,
+            'stages': {name: stats.to_dict() for name, stats in self.stats.items()},
+            'parser_cache': self.parser_cache_summary(),
+            'peak_rss_mb': self.peak_rss_mb,
+        }
+
+    def parser_cache_summary(self) -> Dict[str, Dict]:
+        """汇总各解析进程的缓存命中情况（当前进程扣除运行前的计数）"""
+        snapshots = []
+        for pid, stats in self.cache_stats.items():
+            if pid == os.getpid():
+                stats = diff_cache_stats(stats, self._cache_baseline)
+            snapshots.append(stats)
+        return merge_cache_stats(snapshots)
+
+    def log_stage_stats(self):
+        """输出各阶段耗时（等待耗时较长的阶段说明其上游或下游是瓶颈）及解析缓存命中率"""
+        for name, stats in self.stats.items():
+            logger.info(f"阶段 {name}: 处理 {stats.busy_seconds:.2f}s，等待 {stats.wait_seconds:.2f}s，"
+                        f"{stats.batches} 批 / {stats.rows} 条")
+        for name, stats in self.parser_cache_summary().items():
+            logger.info(f"解析缓存 {name}: 命中率 {stats['hit_rate']:.1%}（命中 {stats['hits']} / "
+                        f"未命中 {stats['misses']}，条目 {stats['size']}）")
+
+
+# 进程池工作进程内的解析策略实例（每个进程初始化一次）
+_worker_transform = None
+
+
+def _init_worker(strategy: str):
+    """初始化解析工作进程（清空 fork 时继承的解析缓存计数，使统计只包含本次运行）"""
+    global _worker_transform
+    clear_parser_caches()
+    _worker_transform = create_transform(strategy)
+
+
+def _process_chunk(raw_cases: List[tuple]) -> Tuple[List[Optional[Dict]], int, Dict]:
+    """在工作进程中解析一批原始案例，结果顺序与输入一致；附带本进程的解析缓存统计"""
+    processed_cases = [_worker_transform.process_single_case(raw_case) for raw_case in raw_cases]
+    return processed_cases, os.getpid(), parser_cache_stats()
+
+
+def _run_partition(strategy: str, batch_size: int, workers: int, queue_size: int, run_id: int):
+    """区间工作进程入口"""
+    ETLPipeline(strategy, batch_size=batch_size, workers=workers, queue_size=queue_size).run_partition(run_id)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+ETL运行时工具
+源端服务器游标（流式读取，内存占用与源表大小无关）及运行资源统计
+"""
+import logging
+from typing import Dict, Optional
+import sys
+import os
+
+try:
+    import resource
+except ImportError:  # Windows 无 resource 模块，不统计峰值内存
+    resource = None
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import ETL_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+def open_source_cursor(conn, name: str = 'etl_source_cursor', itersize: int = None):
+    """
+    打开源库的命名（服务器端）游标：结果集保留在服务器，
+    迭代时每次取 itersize 行、fetchmany(n) 每次取 n 行，客户端不再缓存整张表
+    命名游标只能 execute 一次，读取高水位等辅助查询需使用普通游标
+    """
+    cursor = conn.cursor(name=name)
+    cursor.itersize = itersize or ETL_CONFIG['itersize']
+    return cursor
+
+
+def get_peak_rss() -> Dict[str, float]:
+    """
+    返回峰值常驻内存（MB）：当前进程，以及已回收子进程（如解析进程池）中的最大值
+    """
+    if resource is None:
+        return {}
+
+    # Linux 上 ru_maxrss 单位为 KB，macOS 上为字节
+    unit = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return {
+        'self_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unit, 1),
+        'children_mb': round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / unit, 1),
+    }
+
+
+def peak_rss_mb(peak_rss: Dict[str, float]) -> Optional[float]:
+    """峰值内存（MB）：当前进程与子进程中的较大值（分区运行时峰值在区间工作进程中），无法获取时为 None"""
+    return max(peak_rss.values()) if peak_rss else None
+
+
+def log_peak_rss() -> Optional[float]:
+    """在ETL汇总中输出峰值内存，并返回峰值（MB）供运行汇总记录"""
+    peak_rss = get_peak_rss()
+    if not peak_rss:
+        return None
+    message = f"峰值内存: {peak_rss['self_mb']} MB"
+    if peak_rss['children_mb']:
+        message += f"（子进程峰值 {peak_rss['children_mb']} MB）"
+    logger.info(message)
+    return peak_rss_mb(peak_rss)
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+ETL目标表管理模块
+ETL 写入影子表 cases_staging，加载完成后建索引，并在单个事务内通过重命名原子切换为 cases；
+上一代数据保留为 cases_previous，可随时回滚
+"""
+import logging
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+logger = logging.getLogger(__name__)
+
+LIVE_TABLE = 'cases'
+STAGING_TABLE = 'cases_staging'
+PREVIOUS_TABLE = 'cases_previous'
+# 回滚时交换两代表所用的临时表名
+SWAP_TABLE = 'cases_swap'
+# 增量ETL的高水位状态表
+STATE_TABLE = 'etl_state'
+STATE_NAME = 'cases'
+
+# 表结构（与 001_create_cases_table.sql 保持一致）；每一代表使用独立的序列，删除旧表不会影响在线表
+CASES_TABLE_DDL = """
+    CREATE TABLE {table} (
+        id SERIAL,
+        original_id INTEGER NOT NULL,
+        university VARCHAR(255) NOT NULL,
+        program VARCHAR(255) NOT NULL,
+        degree_level VARCHAR(50) NOT NULL,
+        undergrad_school VARCHAR(255),
+        undergrad_school_tier VARCHAR(50),
+        undergrad_major VARCHAR(255),
+        gpa_original VARCHAR(50),
+        gpa_scale_4 NUMERIC(4, 2),
+        gpa_scale_100 NUMERIC(5, 2),
+        language_type VARCHAR(20),
+        language_score NUMERIC(3, 1),
+        gre_score INTEGER,
+        work_experience VARCHAR(100),
+        graduation_year INTEGER,
+        original_url TEXT,
+        original_title TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+# 索引：名称后缀 -> 列，完整名称为 idx_<表名>_<后缀>
+CASE_INDEXES = {
+    'degree_level': 'degree_level',
+    'school_tier': 'undergrad_school_tier',
+    'gpa_4': 'gpa_scale_4',
+    'language_score': 'language_score',
+    'original_id': 'original_id',
+}
+# 唯一索引（增量ETL的 ON CONFLICT (original_id) 依赖该约束）
+UNIQUE_INDEXES = {'original_id'}
+
+# 更新时间触发器函数（与 001_create_cases_table.sql 保持一致；影子表可能建在尚未执行迁移的库上）
+UPDATED_AT_FUNCTION_DDL = """
+    CREATE OR REPLACE FUNCTION update_updated_at_column()
+    RETURNS TRIGGER AS $$
+    BEGIN
+        NEW.updated_at = CURRENT_TIMESTAMP;
+        RETURN NEW;
+    END;
+    $$ language 'plpgsql'
+"""
+
+# 高水位：(已处理的最大源id, 已处理的最大源更新时间)
+HighWaterMark = Tuple[Optional[int], Optional[datetime]]
+
+
+def get_relation_names(table: str) -> Dict[str, str]:
+    """返回某一代表附属对象（主键、序列、索引）的名称"""
+    names = {
+        'pkey': f"{table}_pkey",
+        'sequence': f"{table}_id_seq",
+    }
+    for suffix in CASE_INDEXES:
+        names[f"idx_{suffix}"] = f"idx_{table}_{suffix}"
+    return names
+
+
+def table_exists(cursor, table: str) -> bool:
+    """判断表是否存在"""
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (table,))
+    return cursor.fetchone()[0]
+
+
+def create_staging_table(conn):
+    """
+    重建空的影子表（不含二级索引，加载完成后再创建）
+    """
+    cursor = conn.cursor()
+    cursor.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+    cursor.execute(CASES_TABLE_DDL.format(table=STAGING_TABLE))
+    conn.commit()
+    logger.info(f"已创建影子表 {STAGING_TABLE}")
+
+
+def deduplicate_staging(cursor) -> int:
+    """
+    删除影子表中 original_id 重复的记录，每个 original_id 保留最后写入（id 最大）的一条；
+    返回删除的记录数（如断点续跑时重复写入的批次）
+    """
+    cursor.execute(f"""
+        DELETE FROM {STAGING_TABLE} older
+        USING {STAGING_TABLE} newer
+        WHERE older.original_id = newer.original_id AND older.id < newer.id
+    """)
+    return cursor.rowcount
+
+
+def build_staging_indexes(cursor) -> int:
+    """
+    为加载完成的影子表创建主键、二级索引和更新时间触发器，并更新统计信息；
+    创建 original_id 唯一索引前先去除重复记录，避免切换因唯一约束失败，返回去除的记录数
+    """
+    duplicates = deduplicate_staging(cursor)
+    if duplicates:
+        logger.warning(f"影子表 {STAGING_TABLE} 中有 {duplicates} 条 original_id 重复的记录，已保留最后写入的一条")
+    cursor.execute(f"ALTER TABLE {STAGING_TABLE} ADD CONSTRAINT {STAGING_TABLE}_pkey PRIMARY KEY (id)")
+    for suffix, column in CASE_INDEXES.items():
+        unique = "UNIQUE " if suffix in UNIQUE_INDEXES else ""
+        cursor.execute(f"CREATE {unique}INDEX idx_{STAGING_TABLE}_{suffix} ON {STAGING_TABLE}({column})")
+    cursor.execute(UPDATED_AT_FUNCTION_DDL)
+    cursor.execute(f"""
+        CREATE TRIGGER update_cases_updated_at
+            BEFORE UPDATE ON {STAGING_TABLE}
+            FOR EACH ROW
+            EXECUTE FUNCTION update_updated_at_column()
+    """)
+    cursor.execute(f"ANALYZE {STAGING_TABLE}")
+    return duplicates
+
+
+def rename_generation(cursor, source: str, target: str):
+    """将一代表及其主键、序列、索引整体重命名"""
+    source_names = get_relation_names(source)
+    target_names = get_relation_names(target)
+
+    cursor.execute(f"ALTER TABLE {source} RENAME TO {target}")
+    cursor.execute(f"ALTER INDEX IF EXISTS {source_names['pkey']} RENAME TO {target_names['pkey']}")
+    cursor.execute(f"ALTER SEQUENCE IF EXISTS {source_names['sequence']} RENAME TO {target_names['sequence']}")
+    for suffix in CASE_INDEXES:
+        key = f"idx_{suffix}"
+        cursor.execute(f"ALTER INDEX IF EXISTS {source_names[key]} RENAME TO {target_names[key]}")
+
+
+def publish_staging_table(conn, high_water_mark: Optional[HighWaterMark] = None) -> int:
+    """
+    建索引后在同一事务内原子切换：cases -> cases_previous，cases_staging -> cases
+    查询在切换期间只会短暂等待表锁，始终看到完整的一代数据；返回新表的记录数
+    传入 high_water_mark 时同一事务内更新增量ETL的高水位
+    """
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT COUNT(*) FROM {STAGING_TABLE}")
+    row_count = cursor.fetchone()[0]
+    if row_count == 0:
+        raise RuntimeError(f"影子表 {STAGING_TABLE} 为空，放弃切换")
+
+    try:
+        row_count -= build_staging_indexes(cursor)
+
+        cursor.execute(f"DROP TABLE IF EXISTS {PREVIOUS_TABLE}")
+        if table_exists(cursor, LIVE_TABLE):
+            cursor.execute(f"LOCK TABLE {LIVE_TABLE} IN ACCESS EXCLUSIVE MODE")
+            rename_generation(cursor, LIVE_TABLE, PREVIOUS_TABLE)
+        rename_generation(cursor, STAGING_TABLE, LIVE_TABLE)
+        if high_water_mark is not None:
+            set_high_water_mark(cursor, high_water_mark)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    logger.info(f"已切换到新一代数据（{row_count} 条记录），上一代保留为 {PREVIOUS_TABLE}")
+    return row_count
+
+
+def rollback_to_previous(conn):
+    """回滚到上一代数据：交换 cases 与 cases_previous"""
+    cursor = conn.cursor()
+    try:
+        if not table_exists(cursor, PREVIOUS_TABLE):
+            raise RuntimeError(f"不存在可回滚的上一代数据表 {PREVIOUS_TABLE}")
+
+        cursor.execute(f"LOCK TABLE {LIVE_TABLE}, {PREVIOUS_TABLE} IN ACCESS EXCLUSIVE MODE")
+        rename_generation(cursor, LIVE_TABLE, SWAP_TABLE)
+        rename_generation(cursor, PREVIOUS_TABLE, LIVE_TABLE)
+        rename_generation(cursor, SWAP_TABLE, PREVIOUS_TABLE)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    logger.info(f"已回滚到上一代数据，当前数据保留为 {PREVIOUS_TABLE}")
+
+
+def ensure_state_table(cursor):
+    """创建增量ETL状态表（已存在时跳过）"""
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+            name VARCHAR(50) PRIMARY KEY,
+            last_source_id INTEGER,
+            last_source_updated_at TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def get_high_water_mark(cursor) -> HighWaterMark:
+    """读取上次ETL处理到的高水位，从未运行过时返回 (None, None)"""
+    ensure_state_table(cursor)
+    cursor.execute(
+        f"SELECT last_source_id, last_source_updated_at FROM {STATE_TABLE} WHERE name = %s",
+        (STATE_NAME,)
+    )
+    row = cursor.fetchone()
+    return (row[0], row[1]) if row else (None, None)
+
+
+def set_high_water_mark(cursor, high_water_mark: HighWaterMark):
+    """更新高水位（由调用方在写入数据的同一事务内提交）"""
+    ensure_state_table(cursor)
+    cursor.execute(f"""
+        INSERT INTO {STATE_TABLE} (name, last_source_id, last_source_updated_at, updated_at)
+        VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
+        ON CONFLICT (name) DO UPDATE SET
+            last_source_id = EXCLUDED.last_source_id,
+            last_source_updated_at = EXCLUDED.last_source_updated_at,
+            updated_at = CURRENT_TIMESTAMP
+    """, (STATE_NAME, high_water_mark[0], high_water_mark[1]))
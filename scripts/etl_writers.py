@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+ETL批量写入模块
+使用 COPY ... FROM STDIN 将处理后的案例流式写入目标表，校验失败或写入失败的记录转存到拒绝文件
+"""
+import io
+import json
+import logging
+from typing import Dict, List, Optional
+import sys
+import os
+
+import psycopg2
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import ETL_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# cases 表的写入列（顺序即 COPY 列顺序）
+CASE_COLUMNS = [
+    'original_id', 'university', 'program', 'degree_level',
+    'undergrad_school', 'undergrad_school_tier', 'undergrad_major',
+    'gpa_original', 'gpa_scale_4', 'gpa_scale_100',
+    'language_type', 'language_score', 'gre_score',
+    'work_experience', 'graduation_year',
+    'original_url', 'original_title'
+]
+
+# 列约束（与 001_create_cases_table.sql 保持一致），COPY 前预先校验，避免单条坏数据导致整批失败
+REQUIRED_COLUMNS = ['original_id', 'university', 'program', 'degree_level']
+VARCHAR_LIMITS = {
+    'university': 255,
+    'program': 255,
+    'degree_level': 50,
+    'undergrad_school': 255,
+    'undergrad_school_tier': 50,
+    'undergrad_major': 255,
+    'gpa_original': 50,
+    'language_type': 20,
+    'work_experience': 100,
+}
+NUMERIC_LIMITS = {  # 列 -> (精度, 小数位)
+    'gpa_scale_4': (4, 2),
+    'gpa_scale_100': (5, 2),
+    'language_score': (3, 1),
+}
+INTEGER_COLUMNS = ['original_id', 'gre_score', 'graduation_year']
+INTEGER_MAX = 2 ** 31 - 1
+
+
+def validate_case_row(row: Dict) -> Optional[str]:
+    """
+    校验一条待写入的案例，返回错误描述，合法时返回 None
+    """
+    for column in REQUIRED_COLUMNS:
+        if row.get(column) is None:
+            return f"{column} 不能为空"
+
+    for column, limit in VARCHAR_LIMITS.items():
+        value = row.get(column)
+        if value is not None and len(str(value)) > limit:
+            return f"{column} 超过长度限制 {limit}"
+
+    try:
+        for column, (precision, scale) in NUMERIC_LIMITS.items():
+            value = row.get(column)
+            if value is not None and abs(round(float(value), scale)) >= 10 ** (precision - scale):
+                return f"{column}={value} 超出 NUMERIC({precision}, {scale}) 范围"
+
+        for column in INTEGER_COLUMNS:
+            value = row.get(column)
+            if value is not None and abs(int(value)) > INTEGER_MAX:
+                return f"{column}={value} 超出整数范围"
+    except (ValueError, TypeError) as e:
+        return f"数值字段格式错误: {e}"
+
+    return None
+
+
+def format_copy_value(value) -> str:
+    """将值转换为 COPY 文本格式的字段"""
+    if value is None:
+        return '\\N'
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
+def encode_copy_rows(rows: List[Dict]) -> io.StringIO:
+    """将一批记录编码为 COPY 文本（按 CASE_COLUMNS 顺序），返回可直接读取的缓冲区"""
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(format_copy_value(row.get(column)) for column in CASE_COLUMNS))
+        buffer.write('\n')
+    buffer.seek(0)
+    return buffer
+
+
+def run_reject_path(run_id: int) -> str:
+    """全量运行（或区间子运行）的拒绝文件：默认路径加运行 id 后缀，各区间进程互不覆盖"""
+    root, ext = os.path.splitext(ETL_CONFIG['reject_file'])
+    return f"{root}.run{run_id}{ext}"
+
+
+class CopyWriter:
+    """
+    基于 COPY 的批量写入器（事务由调用方提交）
+    拒绝文件默认在首次写入时覆盖；append=True 时追加（续跑同一运行时保留已完成部分的拒绝记录）
+    """
+
+    def __init__(self, conn, table: str = 'cases', reject_path: Optional[str] = None, append: bool = False):
+        self.conn = conn
+        self.table = table
+        self.reject_path = reject_path or ETL_CONFIG['reject_file']
+        self.append = append
+        self.written_count = 0
+        self.rejected_count = 0
+        self._reject_file = None
+
+    def _copy_into(self, cursor, table: str, rows: List[Dict]):
+        """将一批记录编码为内存中的 COPY 文本并写入指定表"""
+        cursor.copy_expert(
+            f"COPY {table} ({', '.join(CASE_COLUMNS)}) FROM STDIN",
+            encode_copy_rows(rows)
+        )
+
+    def _copy(self, cursor, rows: List[Dict]):
+        """写入一批记录（失败时抛出 psycopg2.Error，由 write 回滚到保存点）"""
+        self._copy_into(cursor, self.table, rows)
+
+    def reject(self, row: Dict, reason: str):
+        """将无法写入的记录追加到拒绝文件"""
+        if self._reject_file is None:
+            reject_dir = os.path.dirname(self.reject_path)
+            if reject_dir:
+                os.makedirs(reject_dir, exist_ok=True)
+            self._reject_file = open(self.reject_path, 'a' if self.append else 'w', encoding='utf-8')
+
+        self._reject_file.write(json.dumps(
+            {"original_id": row.get('original_id'), "reason": reason, "row": row},
+            ensure_ascii=False,
+            default=str
+        ) + '\n')
+        self.rejected_count += 1
+        logger.warning(f"案例 {row.get('original_id')} 写入被拒绝: {reason}")
+
+    def write(self, rows: List[Dict]) -> int:
+        """
+        写入一批记录，返回成功写入的条数
+        整批 COPY 失败时回滚到保存点并逐条重试，定位出的坏记录转存到拒绝文件
+        """
+        valid_rows = []
+        for row in rows:
+            reason = validate_case_row(row)
+            if reason:
+                self.reject(row, reason)
+            else:
+                valid_rows.append(row)
+
+        if not valid_rows:
+            return 0
+
+        cursor = self.conn.cursor()
+        cursor.execute("SAVEPOINT copy_batch")
+        try:
+            self._copy(cursor, valid_rows)
+            cursor.execute("RELEASE SAVEPOINT copy_batch")
+            self.written_count += len(valid_rows)
+            return len(valid_rows)
+        except psycopg2.Error as e:
+            logger.error(f"批量COPY失败，逐条重试: {e}")
+            cursor.execute("ROLLBACK TO SAVEPOINT copy_batch")
+
+        written = 0
+        for row in valid_rows:
+            cursor.execute("SAVEPOINT copy_row")
+            try:
+                self._copy(cursor, [row])
+                cursor.execute("RELEASE SAVEPOINT copy_row")
+                written += 1
+            except psycopg2.Error as e:
+                cursor.execute("ROLLBACK TO SAVEPOINT copy_row")
+                self.reject(row, str(e).strip())
+
+        self.written_count += written
+        return written
+
+    def close(self):
+        """关闭拒绝文件"""
+        if self._reject_file is not None:
+            self._reject_file.close()
+            self._reject_file = None
+            logger.info(f"共 {self.rejected_count} 条记录被拒绝，详见 {self.reject_path}")
+
+
+class UpsertWriter(CopyWriter):
+    """
+    增量写入器：每批先 COPY 到临时表，再以 INSERT ... ON CONFLICT (original_id) DO UPDATE 合并到目标表
+    内容未变化的记录不会被更新；实际新增/更新的 original_id 记录在 inserted_ids / updated_ids 中
+    目标表须有 original_id 上的唯一索引（002_incremental_etl.sql），创建时检查，缺少时直接报错
+    """
+
+    INCOMING_TABLE = 'cases_incoming'
+
+    def __init__(self, conn, table: str = 'cases', reject_path: Optional[str] = None):
+        super().__init__(conn, table, reject_path)
+        self.check_unique_index()
+        self.inserted_ids: List[int] = []
+        self.updated_ids: List[int] = []
+
+        columns = ', '.join(CASE_COLUMNS)
+        update_columns = [column for column in CASE_COLUMNS if column != 'original_id']
+        self.upsert_sql = f"""
+            INSERT INTO {table} ({columns})
+            SELECT {columns} FROM {self.INCOMING_TABLE}
+            ON CONFLICT (original_id) DO UPDATE SET
+                {', '.join(f"{column} = EXCLUDED.{column}" for column in update_columns)}
+            WHERE ({', '.join(f"{table}.{column}" for column in update_columns)})
+                IS DISTINCT FROM ({', '.join(f"EXCLUDED.{column}" for column in update_columns)})
+            RETURNING original_id, (xmax = 0) AS inserted
+        """
+
+    def check_unique_index(self):
+        """
+        检查目标表 original_id 上是否有（非部分）唯一索引；缺少时 ON CONFLICT 会使每一批都失败、
+        所有记录逐条进入拒绝文件，因此在写入前报错
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT 1
+            FROM pg_index i
+            JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+            WHERE i.indrelid = to_regclass(%s) AND i.indisunique AND i.indnatts = 1
+                AND i.indpred IS NULL AND a.attname = 'original_id'
+        """, (self.table,))
+        if cursor.fetchone() is None:
+            raise RuntimeError(
+                f"{self.table}.original_id 上缺少唯一索引，增量ETL无法按 original_id 合并；"
+                f"请先执行 database/migrations/002_incremental_etl.sql"
+            )
+
+    def _copy(self, cursor, rows: List[Dict]):
+        """COPY 到临时表后合并（临时表可能随保存点回滚而消失，每次按需创建）"""
+        cursor.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS {self.INCOMING_TABLE} AS "
+            f"SELECT {', '.join(CASE_COLUMNS)} FROM {self.table} WITH NO DATA"
+        )
+        cursor.execute(f"TRUNCATE {self.INCOMING_TABLE}")
+        self._copy_into(cursor, self.INCOMING_TABLE, rows)
+        cursor.execute(self.upsert_sql)
+
+        for original_id, inserted in cursor.fetchall():
+            if inserted:
+                self.inserted_ids.append(original_id)
+            else:
+                self.updated_ids.append(original_id)
@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+"""
+合成案例数据生成脚本
+按固定随机种子生成任意规模（1千 ~ 1千万条）的模拟案例，同时产出：
+- 源表 compassedu_cases 的原始记录（标题、背景等格式与ETL解析规则一致）
+- 目标表 cases 的结构化记录（与原始记录来自同一份“真实”取值，可用于校验ETL结果）
+院校、层次、专业、GPA、语言成绩等按贴近真实数据的分布抽样；
+输出到 PostgreSQL（COPY）、本地 SQLite 或 Parquet 文件，便于离线进行生产规模的性能测试
+
+用法:
+  python scripts/generate_synthetic_cases.py --rows 1000000 --target postgres --truncate
+  python scripts/generate_synthetic_cases.py --rows 100000 --target sqlite --output data/synthetic.db
+  python scripts/generate_synthetic_cases.py --rows 1000000 --target parquet --output data/synthetic
+"""
+import argparse
+import io
+import itertools
+import random
+import sqlite3
+import time
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import sys
+import os
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+except ImportError:  # 未安装 pyarrow 时不支持 Parquet 输出
+    pyarrow = None
+    pq = None
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.etl_writers import CASE_COLUMNS, format_copy_value, validate_case_row
+from scripts.title_extractor import convert_gpa
+
+SOURCE_TABLE = 'compassedu_cases'
+CASES_TABLE = 'cases'
+TABLES = ('source', 'cases')
+TARGETS = ('postgres', 'sqlite', 'parquet')
+
+# 源表结构（全部为文本列，与线上源库一致）
+SOURCE_COLUMNS = [
+    'id', 'title', 'url', 'university', 'program', 'student_background', 'gpa', 'language_score', 'graduation_year'
+]
+SOURCE_TABLE_DDL = f"""
+    CREATE TABLE IF NOT EXISTS {SOURCE_TABLE} (
+        id SERIAL PRIMARY KEY,
+        title TEXT,
+        url TEXT,
+        university TEXT,
+        program TEXT,
+        student_background TEXT,
+        gpa TEXT,
+        language_score TEXT,
+        graduation_year TEXT
+    )
+"""
+
+# 申请院校（按热门程度排列，越靠前抽中概率越高）
+TARGET_UNIVERSITIES = [
+    '香港大学', '新加坡国立大学', '香港中文大学', '香港科技大学', '南洋理工大学', '伦敦大学学院',
+    '帝国理工学院', '曼彻斯特大学', '爱丁堡大学', '香港城市大学', '香港理工大学', '伦敦国王学院',
+    'University of Sydney', '墨尔本大学', '华威大学', '哥伦比亚大学', '南加州大学', '东北大学（美国）',
+    '多伦多大学', 'University of Melbourne', 'Imperial College London', '杜伦大学', '布里斯托大学', '澳门大学',
+]
+
+# 本科院校：层次 -> (抽样权重, 院校列表)
+UNDERGRAD_SCHOOLS = {
+    '985院校': (0.18, [
+        '中山大学', '华中科技大学', '武汉大学', '山东大学', '四川大学', '华南理工大学', '同济大学', '厦门大学',
+        '东南大学', '天津大学', '浙江大学', '南京大学', '复旦大学', '上海交通大学', '西安交通大学',
+        '哈尔滨工业大学', '北京航空航天大学', '中国科学技术大学', '清华大学', '北京大学',
+    ]),
+    '211院校': (0.27, [
+        '北京邮电大学', '西南财经大学', '上海财经大学', '中央财经大学', '暨南大学', '苏州大学', '华东理工大学',
+        '南京理工大学', '西南交通大学', '北京交通大学', '对外经济贸易大学', '河海大学', '江南大学', '北京科技大学',
+    ]),
+    '双非院校': (0.40, [
+        '深圳大学', '南京信息工程大学', '杭州电子科技大学', '浙江工业大学', '南京邮电大学', '广东工业大学',
+        '上海理工大学', '首都师范大学', '江苏科技大学', '南京大学金陵学院', '南京信息工程大学滨江学院',
+        '某某理工学院',
+    ]),
+    '海外院校': (0.15, [
+        'University of Leeds', 'University of Manchester', 'University of Sydney', 'Monash University',
+        'University of Toronto', 'Purdue University',
+    ]),
+}
+# 源表背景字段中的层次写法
+BACKGROUND_TIER_LABELS = {'985院校': '985院校', '211院校': '211院校', '双非院校': '普通本科', '海外院校': '海外院校'}
+
+# 本科专业（按常见程度排列）与对应的申请方向
+MAJORS = [
+    ('计算机科学与技术', '计算机科学'), ('软件工程', '软件工程'), ('金融学', '金融学'), ('电子信息工程', '电子信息'),
+    ('会计学', '会计学'), ('数据科学与大数据技术', '数据科学'), ('经济学', '经济学'), ('市场营销', '市场营销'),
+    ('机械工程', '机械工程'), ('数学与应用数学', '应用数学'), ('通信工程', '通信工程'), ('工商管理', '管理学'),
+    ('物联网工程', '物联网'), ('土木工程', '土木工程'), ('统计学', '统计学'), ('自动化', '自动化'),
+]
+
+# 语言考试：(类型, 抽样权重, 分数候选, 分数权重, 源数据中的写法模板)
+LANGUAGE_TESTS = [
+    ('雅思', 0.60, [6.0, 6.5, 7.0, 7.5, 8.0], [0.12, 0.38, 0.32, 0.14, 0.04],
+     ['雅思{}', '雅思 {}', 'IELTS {}', 'IELTS:{}']),
+    # 托福分数按正态分布抽样，不使用分数权重
+    ('托福', 0.32, list(range(85, 116)), None, ['托福 {}', '托福{}', 'TOEFL {}']),
+    ('多邻国', 0.03, list(range(105, 141, 5)), None, ['多邻国{}']),
+]
+NO_LANGUAGE_WEIGHT = 0.05
+
+WORK_EXPERIENCE = [('应届', '应届生', 0.65), ('已毕业', '已毕业', 0.15), ('2年工作经验', '有工作经验', 0.20)]
+GRADUATION_YEARS = [(2019, 0.04), (2020, 0.06), (2021, 0.08), (2022, 0.12), (2023, 0.18), (2024, 0.24),
+                    (2025, 0.20), (2026, 0.08)]
+
+
+def zipf_weights(count: int, exponent: float = 0.8) -> List[float]:
+    """长尾分布权重：排名靠前的取值更常见"""
+    return [1 / (rank + 1) ** exponent for rank in range(count)]
+
+
+def cumulative(weights: Sequence[float]) -> List[float]:
+    """预先计算累计权重，逐条抽样时省去重复求和"""
+    return list(itertools.accumulate(weights))
+
+
+class CaseGenerator:
+    """合成案例生成器（同一随机种子产生相同的数据）"""
+
+    def __init__(self, seed: int = 42):
+        self.rng = random.Random(seed)
+        self.university_weights = cumulative(zipf_weights(len(TARGET_UNIVERSITIES)))
+        self.major_weights = cumulative(zipf_weights(len(MAJORS), 0.6))
+        self.tiers = list(UNDERGRAD_SCHOOLS)
+        self.tier_weights = cumulative([weight for weight, _ in UNDERGRAD_SCHOOLS.values()])
+        self.school_weights = {
+            tier: cumulative(zipf_weights(len(schools))) for tier, (_, schools) in UNDERGRAD_SCHOOLS.items()
+        }
+        self.languages = LANGUAGE_TESTS + [None]
+        self.language_weights = cumulative([test[1] for test in LANGUAGE_TESTS] + [NO_LANGUAGE_WEIGHT])
+        self.language_score_weights = {
+            test[0]: cumulative(test[3]) if test[3] else None for test in LANGUAGE_TESTS
+        }
+        self.experiences = [(text, value) for text, value, _ in WORK_EXPERIENCE]
+        self.experience_weights = cumulative([weight for _, _, weight in WORK_EXPERIENCE])
+        self.years = [year for year, _ in GRADUATION_YEARS]
+        self.year_weights = cumulative([weight for _, weight in GRADUATION_YEARS])
+
+    def pick(self, values: Sequence, cum_weights: Optional[Sequence[float]] = None):
+        """按累计权重抽取一个值（不给权重时等概率）"""
+        if cum_weights is None:
+            return values[int(self.rng.random() * len(values))]
+        return self.rng.choices(values, cum_weights=cum_weights)[0]
+
+    def generate_gpa(self, tier: str) -> Tuple[str, float, float]:
+        """按院校层次抽样GPA，返回 (源数据写法, 4分制, 百分制)"""
+        rng = self.rng
+        mean = {'985院校': 3.45, '211院校': 3.35, '海外院校': 3.3}.get(tier, 3.25)
+        gpa_4 = min(3.98, max(2.5, rng.gauss(mean, 0.28)))
+
+        style = rng.random()
+        if style < 0.5:
+            gpa_original = f"{gpa_4:.2f}/4.0" if rng.random() < 0.6 else f"{gpa_4:.1f}"
+        else:
+            score = min(98.0, max(70.0, round(rng.gauss(mean * 25, 5), 1)))
+            gpa_original = f"{score:g}/100" if style < 0.9 else f"{score:g}"
+
+        gpa_scale_4, gpa_scale_100 = convert_gpa(*self.parse_gpa_original(gpa_original))
+        return gpa_original, round(gpa_scale_4, 2), round(gpa_scale_100, 2)
+
+    @staticmethod
+    def parse_gpa_original(gpa_original: str) -> Tuple[float, Optional[float]]:
+        """生成时已知格式，直接拆出分子与分母"""
+        if '/' in gpa_original:
+            numerator, denominator = gpa_original.split('/')
+            return float(numerator), float(denominator)
+        return float(gpa_original), None
+
+    def generate_language(self) -> Tuple[Optional[str], Optional[float], str]:
+        """抽样语言成绩，返回 (类型, 分数, 源数据写法)"""
+        test = self.pick(self.languages, self.language_weights)
+        if test is None:
+            return None, None, ''
+        language_type, _, scores, _, templates = test
+        if language_type == '托福':
+            score = int(min(115, max(85, round(self.rng.gauss(101, 6)))))
+        else:
+            score = self.pick(scores, self.language_score_weights[language_type])
+        text = self.pick(templates).format(score)
+        return language_type, float(score), text
+
+    def generate_case(self, case_id: int) -> Tuple[Dict, Dict]:
+        """生成一条案例，返回 (源表记录, cases 表记录)"""
+        rng = self.rng
+        university = self.pick(TARGET_UNIVERSITIES, self.university_weights)
+        major, field = self.pick(MAJORS, self.major_weights)
+        degree_level = '博士' if rng.random() < 0.07 else '硕士'
+        program = f"{field}{degree_level}"
+
+        tier = self.pick(self.tiers, self.tier_weights)
+        school = self.pick(UNDERGRAD_SCHOOLS[tier][1], self.school_weights[tier])
+
+        gpa_original, gpa_scale_4, gpa_scale_100 = self.generate_gpa(tier)
+        language_type, language_score, language_text = self.generate_language()
+        gre_score = rng.randint(305, 335) if rng.random() < 0.3 else None
+        experience_text, work_experience = self.pick(self.experiences, self.experience_weights)
+        graduation_year = self.pick(self.years, self.year_weights)
+
+        title = (
+            f"{university}{program}offer\n"
+            f"{school} {major} GPA:{gpa_original} {language_text} {experience_text}\n"
+            f"GRE {gre_score or ''} {graduation_year}"
+        )
+        url = f"https://www.compassedu.hk/case/{case_id}"
+
+        # 源表中的结构化列只有部分记录填写，其余信息需从标题解析
+        source = {
+            'id': case_id,
+            'title': title,
+            'url': url,
+            'university': university if rng.random() < 0.5 else '',
+            'program': program if rng.random() < 0.4 else '',
+            'student_background': BACKGROUND_TIER_LABELS[tier] if rng.random() < 0.6 else '',
+            'gpa': gpa_original if rng.random() < 0.4 else '',
+            'language_score': language_text if rng.random() < 0.7 else '',
+            'graduation_year': str(graduation_year) if rng.random() < 0.5 else '',
+        }
+        case = {
+            'original_id': case_id,
+            'university': university,
+            'program': program,
+            'degree_level': degree_level,
+            'undergrad_school': school,
+            'undergrad_school_tier': tier,
+            'undergrad_major': major,
+            'gpa_original': gpa_original,
+            'gpa_scale_4': gpa_scale_4,
+            'gpa_scale_100': gpa_scale_100,
+            'language_type': language_type,
+            'language_score': language_score,
+            'gre_score': gre_score,
+            'work_experience': work_experience,
+            'graduation_year': graduation_year,
+            'original_url': url,
+            'original_title': title,
+        }
+        return source, case
+
+    def iter_chunks(self, rows: int, chunk_size: int, start_id: int = 1) -> Iterator[Tuple[List[Dict], List[Dict]]]:
+        """按块生成 (源表记录列表, cases 表记录列表)，内存占用只与块大小有关"""
+        for chunk_start in range(start_id, start_id + rows, chunk_size):
+            chunk_end = min(chunk_start + chunk_size, start_id + rows)
+            sources, cases = [], []
+            for case_id in range(chunk_start, chunk_end):
+                source, case = self.generate_case(case_id)
+                sources.append(source)
+                cases.append(case)
+            yield sources, cases
+
+
+def filter_valid_cases(cases: List[Dict]) -> Tuple[List[Dict], int]:
+    """
+    过滤不满足 cases 表约束的记录（如托福 100 分以上超出 NUMERIC(3, 1)），
+    与ETL写入时拒绝的记录一致；返回 (合法记录, 过滤条数)
+    """
+    valid = [case for case in cases if validate_case_row(case) is None]
+    return valid, len(cases) - len(valid)
+
+
+class PostgresOutput:
+    """通过 COPY 写入源库 compassedu_cases 与目标库 cases"""
+
+    def __init__(self, tables: Sequence[str], truncate: bool = False):
+        import psycopg2
+        from config.database import SOURCE_DB_CONFIG, TARGET_DB_CONFIG
+
+        self.tables = tables
+        self.source_conn = psycopg2.connect(**SOURCE_DB_CONFIG) if 'source' in tables else None
+        self.target_conn = psycopg2.connect(**TARGET_DB_CONFIG) if 'cases' in tables else None
+
+        if self.source_conn:
+            cursor = self.source_conn.cursor()
+            cursor.execute(SOURCE_TABLE_DDL)
+            if truncate:
+                cursor.execute(f"TRUNCATE {SOURCE_TABLE} RESTART IDENTITY")
+            self.source_conn.commit()
+        if self.target_conn:
+            from scripts.etl_tables import CASES_TABLE_DDL, table_exists
+            cursor = self.target_conn.cursor()
+            if not table_exists(cursor, CASES_TABLE):
+                cursor.execute(CASES_TABLE_DDL.format(table=CASES_TABLE))
+            if truncate:
+                cursor.execute(f"TRUNCATE {CASES_TABLE} RESTART IDENTITY")
+            self.target_conn.commit()
+
+    def next_id(self) -> int:
+        """追加写入时从现有最大 id 之后继续编号"""
+        max_ids = []
+        if self.source_conn:
+            cursor = self.source_conn.cursor()
+            cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {SOURCE_TABLE}")
+            max_ids.append(cursor.fetchone()[0])
+        if self.target_conn:
+            cursor = self.target_conn.cursor()
+            cursor.execute(f"SELECT COALESCE(MAX(original_id), 0) FROM {CASES_TABLE}")
+            max_ids.append(cursor.fetchone()[0])
+        return max(max_ids) + 1
+
+    @staticmethod
+    def _copy(conn, table: str, columns: List[str], rows: List[Dict]):
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write('\t'.join(format_copy_value(row.get(column)) for column in columns))
+            buffer.write('\n')
+        buffer.seek(0)
+        conn.cursor().copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+        conn.commit()
+
+    def write(self, sources: List[Dict], cases: List[Dict]):
+        if self.source_conn:
+            self._copy(self.source_conn, SOURCE_TABLE, SOURCE_COLUMNS, sources)
+        if self.target_conn:
+            self._copy(self.target_conn, CASES_TABLE, CASE_COLUMNS, cases)
+
+    def close(self):
+        if self.source_conn:
+            # 显式写入了 id，同步序列以免后续插入冲突
+            cursor = self.source_conn.cursor()
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence('{SOURCE_TABLE}', 'id'), "
+                f"(SELECT COALESCE(MAX(id), 1) FROM {SOURCE_TABLE}))"
+            )
+            self.source_conn.commit()
+            self.source_conn.close()
+        if self.target_conn:
+            self.target_conn.close()
+
+
+class SQLiteOutput:
+    """写入本地 SQLite 文件（两张表与线上同名）"""
+
+    def __init__(self, path: str, tables: Sequence[str], truncate: bool = False):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.tables = tables
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS {SOURCE_TABLE} (id INTEGER PRIMARY KEY, "
+                          + ', '.join(f"{column} TEXT" for column in SOURCE_COLUMNS[1:]) + ")")
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS {CASES_TABLE} (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                          + ', '.join(CASE_COLUMNS)
+                          + ", created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, updated_at TIMESTAMP)")
+        if truncate:
+            self.conn.execute(f"DELETE FROM {SOURCE_TABLE}")
+            self.conn.execute(f"DELETE FROM {CASES_TABLE}")
+        self.conn.commit()
+
+    def next_id(self) -> int:
+        max_source = self.conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {SOURCE_TABLE}").fetchone()[0]
+        max_case = self.conn.execute(f"SELECT COALESCE(MAX(original_id), 0) FROM {CASES_TABLE}").fetchone()[0]
+        return max(max_source, max_case) + 1
+
+    def _insert(self, table: str, columns: List[str], rows: List[Dict]):
+        placeholders = ', '.join('?' for _ in columns)
+        self.conn.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+            ([row.get(column) for column in columns] for row in rows)
+        )
+
+    def write(self, sources: List[Dict], cases: List[Dict]):
+        if 'source' in self.tables:
+            self._insert(SOURCE_TABLE, SOURCE_COLUMNS, sources)
+        if 'cases' in self.tables:
+            self._insert(CASES_TABLE, CASE_COLUMNS, cases)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+class ParquetOutput:
+    """写入本地 Parquet 文件（每张表一个文件，按块追加为行组）"""
+
+    def __init__(self, directory: str, tables: Sequence[str]):
+        if pq is None:
+            raise RuntimeError("Parquet 输出需要安装 pyarrow")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.tables = tables
+        self.writers = {}
+
+    def next_id(self) -> int:
+        # Parquet 文件每次重新生成
+        return 1
+
+    def _write(self, table: str, columns: List[str], rows: List[Dict]):
+        batch = pyarrow.Table.from_pylist([{column: row.get(column) for column in columns} for row in rows])
+        writer = self.writers.get(table)
+        if writer is None:
+            writer = pq.ParquetWriter(os.path.join(self.directory, f"{table}.parquet"), batch.schema)
+            self.writers[table] = writer
+        writer.write_table(batch.cast(writer.schema))
+
+    def write(self, sources: List[Dict], cases: List[Dict]):
+        if 'source' in self.tables:
+            self._write(SOURCE_TABLE, SOURCE_COLUMNS, sources)
+        if 'cases' in self.tables:
+            self._write(CASES_TABLE, CASE_COLUMNS, cases)
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+
+
+def create_output(target: str, tables: Sequence[str], output: Optional[str] = None, truncate: bool = False):
+    """按输出目标创建写入器"""
+    if target == 'postgres':
+        return PostgresOutput(tables, truncate)
+    if target == 'sqlite':
+        return SQLiteOutput(output or 'data/synthetic_cases.db', tables, truncate)
+    if target == 'parquet':
+        return ParquetOutput(output or 'data/synthetic_cases', tables)
+    raise ValueError(f"未知的输出目标: {target}（可选: {', '.join(TARGETS)}）")
+
+
+def generate(rows: int, seed: int = 42, target: str = 'postgres', tables: Sequence[str] = TABLES,
+             output: Optional[str] = None, truncate: bool = False, chunk_size: int = 50000) -> Dict:
+    """生成并写入合成案例，返回统计信息"""
+    writer = create_output(target, tables, output, truncate)
+    generator = CaseGenerator(seed)
+    started = time.perf_counter()
+    written = filtered = 0
+    try:
+        start_id = writer.next_id()
+        for sources, cases in generator.iter_chunks(rows, chunk_size, start_id):
+            cases, skipped = filter_valid_cases(cases)
+            writer.write(sources, cases)
+            written += len(sources)
+            filtered += skipped
+            elapsed = time.perf_counter() - started
+            print(f"已生成 {written:,} / {rows:,} 条（{written / elapsed:,.0f} 条/秒）")
+    finally:
+        writer.close()
+
+    return {
+        'rows': written,
+        'cases_filtered': filtered,
+        'start_id': start_id,
+        'seconds': round(time.perf_counter() - started, 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="生成合成案例数据")
+    parser.add_argument('--rows', type=int, default=100000, help="生成的案例数（1千 ~ 1千万）")
+    parser.add_argument('--seed', type=int, default=42, help="随机种子，相同种子生成相同数据")
+    parser.add_argument('--target', choices=TARGETS, default='postgres', help="输出目标")
+    parser.add_argument('--output', help="SQLite 文件路径或 Parquet 输出目录")
+    parser.add_argument('--tables', nargs='+', choices=TABLES, default=list(TABLES),
+                        help="生成的表：source（compassedu_cases 原始记录）、cases（结构化记录）")
+    parser.add_argument('--truncate', action='store_true', help="写入前清空目标表（否则在现有最大 id 之后追加）")
+    parser.add_argument('--chunk-size', type=int, default=50000, help="每块生成并写入的记录数")
+    args = parser.parse_args()
+    if args.target == 'parquet' and pq is None:
+        parser.error("Parquet 输出需要安装 pyarrow")
+
+    result = generate(args.rows, args.seed, args.target, args.tables, args.output, args.truncate, args.chunk_size)
+    print(f"完成：共 {result['rows']:,} 条（起始 id {result['start_id']}），"
+          f"cases 表过滤不满足约束的记录 {result['cases_filtered']:,} 条，耗时 {result['seconds']} 秒")
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+选校规划接口压测
+启动本地 OpenAI 兼容桩服务与 API 服务（连接本地 PostgreSQL 或 SQLite），
+按分阶段的目标 RPS（阶段内从上一阶段的速率线性爬升）向 /api/v1/school-planning 发送请求，
+输出各阶段的吞吐量、错误数与延迟分位数，容量评估无需访问外部网络
+
+用法:
+  python scripts/load_test.py --stages 2x30,5x30,10x60
+  python scripts/load_test.py --database-url postgresql://suan@localhost/processed_cases --llm-latency-ms 1500
+  python scripts/load_test.py --url http://127.0.0.1:8000 --stages 5x60   # 压测已启动的服务
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+# 添加项目根目录到路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+from backend.services.program_stats import percentile
+from scripts.benchmark_matching import PROFILES
+from scripts.stub_llm_server import add_stub_arguments
+
+PLANNING_PATH = '/api/v1/school-planning'
+
+
+def parse_stages(spec: str) -> List[Tuple[float, float]]:
+    """解析阶段配置 "2x30,5x60" -> [(目标RPS, 持续秒数), ...]"""
+    stages = []
+    for item in spec.split(','):
+        rate, duration = item.strip().lower().split('x')
+        stages.append((float(rate), float(duration)))
+    return stages
+
+
+def build_schedule(stages: List[Tuple[float, float]], ramp: bool = True) -> List[Tuple[float, int]]:
+    """
+    生成发送计划 [(相对开始时间, 阶段序号)]：阶段内速率从上一阶段的目标速率线性变化到本阶段目标速率
+    （ramp=False 时每个阶段恒定速率）；第 k 个请求的发送时间为累计请求数 ∫r(t)dt 达到 k 的时刻
+    """
+    schedule = []
+    stage_start = 0.0
+    previous_rate = 0.0
+    for index, (rate, duration) in enumerate(stages):
+        start_rate = previous_rate if ramp else rate
+        slope = (rate - start_rate) / duration
+        expected = (start_rate + rate) * duration / 2
+        for k in itertools.count(1):
+            if k > expected:
+                break
+            if slope == 0:
+                offset = k / start_rate
+            else:
+                # 解 slope / 2 * t^2 + start_rate * t = k
+                offset = (math.sqrt(start_rate ** 2 + 2 * slope * k) - start_rate) / slope
+            if offset >= duration:
+                break
+            schedule.append((stage_start + offset, index))
+        stage_start += duration
+        previous_rate = rate
+    return schedule
+
+
+class LoadRunner:
+    """开环压测：按计划时间发送请求，延迟从计划时间起算（包含排队等待，避免协调遗漏）"""
+
+    def __init__(self, base_url: str, concurrency: int = 64, timeout: float = 60):
+        self.url = base_url.rstrip('/') + PLANNING_PATH
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.records: List[Tuple[int, Optional[int], float]] = []  # (阶段序号, 状态码, 延迟秒数)
+        self.payloads = itertools.cycle([dict(profile) for profile in PROFILES.values()])
+
+    def session(self) -> requests.Session:
+        """每个工作线程复用一个连接"""
+        if not hasattr(self.local, 'session'):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def send(self, stage: int, scheduled_at: float, payload: Dict):
+        try:
+            response = self.session().post(self.url, json=payload, timeout=self.timeout)
+            status = response.status_code
+        except requests.RequestException:
+            status = None
+        latency = time.perf_counter() - scheduled_at
+        with self.lock:
+            self.records.append((stage, status, latency))
+
+    def run(self, stages: List[Tuple[float, float]], ramp: bool = True, verbose: bool = True) -> Dict:
+        schedule = build_schedule(stages, ramp)
+        if verbose:
+            print(f"共 {len(schedule)} 个请求，{len(stages)} 个阶段，最大并发 {self.concurrency}：{self.url}")
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for offset, stage in schedule:
+                delay = started + offset - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(self.send, stage, started + offset, next(self.payloads))
+        elapsed = time.perf_counter() - started
+        return summarize(self.records, stages, elapsed)
+
+
+def summarize_records(records: List[Tuple[int, Optional[int], float]], duration: float) -> Dict:
+    """汇总一组请求：吞吐量（成功数/秒）、错误分布与延迟分位数（毫秒）"""
+    latencies = sorted(latency * 1000 for _, _, latency in records)
+    success = sum(1 for _, status, _ in records if status == 200)
+    errors: Dict[str, int] = {}
+    for _, status, _ in records:
+        if status != 200:
+            key = str(status) if status is not None else 'connection_error'
+            errors[key] = errors.get(key, 0) + 1
+    return {
+        'requests': len(records),
+        'success': success,
+        'errors': errors,
+        'throughput_rps': round(success / duration, 2) if duration else 0.0,
+        'latency_ms': {
+            'p50': percentile(latencies, 50),
+            'p90': percentile(latencies, 90),
+            'p99': percentile(latencies, 99),
+            'max': round(latencies[-1], 2) if latencies else None,
+        },
+    }
+
+
+def summarize(records: List[Tuple[int, Optional[int], float]], stages: List[Tuple[float, float]],
+              elapsed: float) -> Dict:
+    """按阶段与总体汇总"""
+    return {
+        'stages': [
+            dict(summarize_records([record for record in records if record[0] == index], duration),
+                 target_rps=rate, duration_s=duration)
+            for index, (rate, duration) in enumerate(stages)
+        ],
+        'total': summarize_records(records, elapsed),
+    }
+
+
+def print_report(report: Dict):
+    """输出压测报告"""
+    print(f"\n{'阶段':<6}{'目标RPS':>9}{'请求':>8}{'成功':>8}{'吞吐(次/秒)':>14}"
+          f"{'p50(ms)':>11}{'p90(ms)':>11}{'p99(ms)':>11}{'max(ms)':>11}  错误")
+    rows = [(str(index + 1), stage) for index, stage in enumerate(report['stages'])] + [('总计', report['total'])]
+    for name, stats in rows:
+        latency = stats['latency_ms']
+        print(f"{name:<6}{stats.get('target_rps', ''):>9}{stats['requests']:>8}{stats['success']:>8}"
+              f"{stats['throughput_rps']:>14}{latency['p50'] or '-':>11}{latency['p90'] or '-':>11}"
+              f"{latency['p99'] or '-':>11}{latency['max'] or '-':>11}  {stats['errors'] or ''}")
+
+
+def prepare_sqlite_database(database_url: str, cases: int, seed: int = 42):
+    """SQLite 数据库中没有案例时，生成合成案例"""
+    path = database_url[len('sqlite:///'):]
+    if os.path.exists(path):
+        conn = sqlite3.connect(path)
+        try:
+            count = conn.execute("SELECT COUNT(*) FROM cases").fetchone()[0]
+        except sqlite3.OperationalError:
+            count = 0
+        finally:
+            conn.close()
+        if count:
+            print(f"使用已有的 SQLite 数据库 {path}（{count:,} 个案例）")
+            return
+
+    from scripts.generate_synthetic_cases import generate
+    print(f"生成 {cases:,} 个合成案例到 {path} ...")
+    generate(cases, seed, target='sqlite', tables=['cases'], output=path, truncate=True)
+
+
+def wait_until_ready(url: str, process: subprocess.Popen, timeout: float = 60):
+    """等待服务的健康检查通过"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"服务进程已退出（退出码 {process.returncode}）: {url}")
+        try:
+            if requests.get(url, timeout=1).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"等待服务启动超时: {url}")
+
+
+def start_services(args) -> Tuple[str, List[subprocess.Popen]]:
+    """启动桩服务与 API 服务，返回 (API 地址, 进程列表)"""
+    processes = []
+    stub = subprocess.Popen([
+        sys.executable, os.path.join(PROJECT_ROOT, 'scripts', 'stub_llm_server.py'),
+        '--port', str(args.llm_port),
+        '--latency-ms', str(args.llm_latency_ms), '--latency-spread-ms', str(args.llm_latency_spread_ms),
+        '--distribution', args.llm_distribution, '--error-rate', str(args.llm_error_rate),
+        '--error-status', str(args.llm_error_status), '--stream-chunks', str(args.llm_stream_chunks),
+    ], cwd=PROJECT_ROOT)
+    processes.append(stub)
+    llm_url = f"http://127.0.0.1:{args.llm_port}/v1"
+    wait_until_ready(f"{llm_url}/models", stub)
+
+    env = dict(os.environ, OPENAI_BASE_URL=llm_url, OPENAI_API_KEY='stub', TARGET_DATABASE_URL=args.database_url,
+               DEBUG='False')
+    api = subprocess.Popen([
+        sys.executable, '-m', 'uvicorn', 'backend.app.main:app', '--host', '127.0.0.1', '--port', str(args.port),
+        '--workers', str(args.api_workers), '--log-level', 'warning',
+    ], cwd=PROJECT_ROOT, env=env)
+    processes.append(api)
+    base_url = f"http://127.0.0.1:{args.port}"
+    wait_until_ready(f"{base_url}/health", api)
+    return base_url, processes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="选校规划接口压测")
+    parser.add_argument('--stages', default='2x30,5x30,10x60',
+                        help="阶段配置：目标RPSx持续秒数，逗号分隔（阶段内从上一阶段速率线性爬升）")
+    parser.add_argument('--no-ramp', action='store_true', help="每个阶段直接以目标速率恒定发送")
+    parser.add_argument('--concurrency', type=int, default=64, help="最大并发请求数")
+    parser.add_argument('--timeout', type=float, default=60, help="单个请求超时（秒）")
+    parser.add_argument('--output', help="将报告另存为 JSON 文件")
+    parser.add_argument('--url', help="压测已启动的服务（不启动桩服务与 API 服务）")
+    parser.add_argument('--database-url', default='sqlite:///data/loadtest.db',
+                        help="API 服务使用的数据库（PostgreSQL 或 SQLite）")
+    parser.add_argument('--cases', type=int, default=10000, help="SQLite 数据库为空时生成的合成案例数")
+    parser.add_argument('--port', type=int, default=8001, help="API 服务端口")
+    parser.add_argument('--api-workers', type=int, default=1, help="API 服务的 uvicorn 工作进程数")
+    parser.add_argument('--llm-port', type=int, default=8900, help="桩服务端口")
+    add_stub_arguments(parser, prefix='llm-')
+    args = parser.parse_args()
+
+    stages = parse_stages(args.stages)
+    processes = []
+    try:
+        base_url = args.url
+        if base_url is None:
+            if args.database_url.startswith('sqlite:///'):
+                prepare_sqlite_database(args.database_url, args.cases)
+            base_url, processes = start_services(args)
+            # 预热：首个请求加载案例快照
+            requests.post(base_url + PLANNING_PATH, json=PROFILES['985_cs'], timeout=args.timeout)
+
+        report = LoadRunner(base_url, args.concurrency, args.timeout).run(stages, ramp=not args.no_ramp)
+        print_report(report)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            process.wait()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+院校层次多模式匹配模块
+将按优先级排列的关键词组编译为 Aho-Corasick 自动机，对名称单次扫描即可得到命中的最高优先级层次；
+前置按名称的有界 LRU 缓存，重复出现的院校名称无需再次扫描
+"""
+from collections import deque
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.utils.parse_cache import memoize
+
+# 按名称共享的分类器（见 TierClassifier.shared）
+_shared_classifiers: Dict[str, 'TierClassifier'] = {}
+_shared_lock = threading.Lock()
+
+
+class AhoCorasickAutomaton:
+    """多模式匹配自动机：返回文本中出现的所有模式里优先级最高（数值最小）的一个"""
+
+    def __init__(self, patterns: Sequence[Tuple[str, int]]):
+        # 状态转移表、失败指针、每个状态（含失败链）可输出的最高优先级
+        self.transitions: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[Optional[int]] = [None]
+
+        for pattern, priority in patterns:
+            if not pattern:
+                continue
+            state = 0
+            for char in pattern:
+                next_state = self.transitions[state].get(char)
+                if next_state is None:
+                    next_state = len(self.transitions)
+                    self.transitions.append({})
+                    self.fail.append(0)
+                    self.output.append(None)
+                    self.transitions[state][char] = next_state
+                state = next_state
+            self.output[state] = self._best(self.output[state], priority)
+
+        self._build_fail_links()
+
+    @staticmethod
+    def _best(current: Optional[int], candidate: Optional[int]) -> Optional[int]:
+        """取两个优先级中较高（数值较小）的一个"""
+        if current is None:
+            return candidate
+        if candidate is None:
+            return current
+        return min(current, candidate)
+
+    def _build_fail_links(self):
+        """按广度优先构建失败指针，并沿失败链合并输出"""
+        queue = deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.transitions[state].items():
+                fail_state = self.fail[state]
+                while fail_state and char not in self.transitions[fail_state]:
+                    fail_state = self.fail[fail_state]
+                self.fail[next_state] = self.transitions[fail_state].get(char, 0)
+                self.output[next_state] = self._best(self.output[next_state], self.output[self.fail[next_state]])
+                queue.append(next_state)
+
+    def search(self, text: str) -> Optional[int]:
+        """单次扫描文本，返回命中模式的最高优先级，未命中返回 None"""
+        transitions = self.transitions
+        fail = self.fail
+        output = self.output
+
+        best = None
+        state = 0
+        for char in text:
+            while state and char not in transitions[state]:
+                state = fail[state]
+            state = transitions[state].get(char, 0)
+            priority = output[state]
+            if priority is not None and (best is None or priority < best):
+                best = priority
+                if best == 0:
+                    break
+        return best
+
+
+class TierClassifier:
+    """
+    院校层次分类器
+    rules 为按优先级排列的 (层次, 关键词列表)，名称包含某组任一关键词即归入该组，
+    多组命中时取排在前面的组，与逐组线性判断的结果一致；均未命中时返回 default
+    name 用于登记缓存以统计命中率（见 backend/utils/parse_cache.py）；同名缓存只登记最后创建的一个，
+    处理器等会多次创建的场景使用 shared() 共用同名分类器
+    """
+
+    def __init__(self, rules: Sequence[Tuple[str, Sequence[str]]], default: str, name: Optional[str] = None):
+        self.rules = [(label, tuple(keywords)) for label, keywords in rules]
+        self.labels = [label for label, _ in rules]
+        self.default = default
+        self.automaton = AhoCorasickAutomaton([
+            (keyword, priority)
+            for priority, (_, keywords) in enumerate(rules)
+            for keyword in keywords
+        ])
+        # 返回名称对应的层次（带缓存）
+        self.classify = memoize(self._classify, name or f"tier:{'/'.join(self.labels)}")
+
+    @classmethod
+    def shared(cls, name: str, rules: Sequence[Tuple[str, Sequence[str]]], default: str) -> 'TierClassifier':
+        """
+        返回按名称共享的分类器：同名只构建一次，各处理器实例共用同一自动机与缓存，
+        新实例不会覆盖已登记缓存的命中统计；同名但规则不同时报错
+        """
+        rules = [(label, tuple(keywords)) for label, keywords in rules]
+        with _shared_lock:
+            classifier = _shared_classifiers.get(name)
+            if classifier is None:
+                classifier = _shared_classifiers[name] = cls(rules, default, name)
+        if classifier.rules != rules or classifier.default != default:
+            raise ValueError(f"分类器 {name} 已按不同规则创建")
+        return classifier
+
+    def _classify(self, text: str) -> str:
+        """扫描名称并返回层次（不经缓存）"""
+        priority = self.automaton.search(text)
+        return self.default if priority is None else self.labels[priority]
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+本地 OpenAI 兼容桩服务
+实现 /v1/chat/completions（含 stream 流式输出）与 /v1/models，返回固定格式的选校分析报告；
+响应延迟按指定分布抽样，并可按比例返回错误，用于在无外部网络的情况下压测选校规划接口
+
+用法:
+  python scripts/stub_llm_server.py --port 8900 --latency-ms 800 --latency-spread-ms 300 --distribution lognormal
+  OPENAI_BASE_URL=http://127.0.0.1:8900/v1 OPENAI_API_KEY=stub python run_server.py
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+LATENCY_DISTRIBUTIONS = ('fixed', 'uniform', 'normal', 'lognormal')
+
+# 与 LLMService.parse_analysis_report 能解析的章节格式一致
+REPORT_TEXT = """## 1. 背景综合评估
+### 优势 (Strengths)
+本科院校层次与GPA在相似案例中处于中上水平，专业与申请方向匹配度高。
+
+### 劣势 (Weaknesses)
+标准化考试成绩与高分案例相比仍有差距，科研与实习经历较少。
+
+## 2. 选校梯度策略
+冲刺、核心与保底院校请参考相似案例中的录取结果。
+
+## 3. 后续提升建议
+建议在申请季前将语言成绩提升0.5分，并补充一段与目标专业相关的实习经历。
+
+## 4. 申请时间规划
+建议在申请截止日期前三个月完成语言考试，前一个月完成文书。
+"""
+
+
+def sample_latency(rng: random.Random, distribution: str, mean_ms: float, spread_ms: float) -> float:
+    """
+    按分布抽样一次响应延迟（秒）：
+    fixed 恒为 mean；uniform 在 mean ± spread 内均匀分布；normal 为均值 mean、标准差 spread 的正态分布；
+    lognormal 为中位数 mean、对数标准差 spread / mean 的对数正态分布（长尾，接近真实LLM接口）
+    """
+    if distribution == 'fixed' or mean_ms <= 0:
+        latency_ms = mean_ms
+    elif distribution == 'uniform':
+        latency_ms = rng.uniform(mean_ms - spread_ms, mean_ms + spread_ms)
+    elif distribution == 'normal':
+        latency_ms = rng.gauss(mean_ms, spread_ms)
+    elif distribution == 'lognormal':
+        latency_ms = rng.lognormvariate(math.log(mean_ms), spread_ms / mean_ms)
+    else:
+        raise ValueError(f"未知的延迟分布: {distribution}（可选: {', '.join(LATENCY_DISTRIBUTIONS)}）")
+    return max(0.0, latency_ms) / 1000
+
+
+class StubLLMServer(ThreadingHTTPServer):
+    """桩服务（每个请求一个线程），持有延迟/错误配置与请求计数"""
+
+    daemon_threads = True
+
+    def __init__(self, address, latency_ms: float = 800, latency_spread_ms: float = 0, distribution: str = 'fixed',
+                 error_rate: float = 0.0, error_status: int = 500, stream_chunks: int = 20, seed: int = None):
+        super().__init__(address, StubLLMHandler)
+        self.latency_ms = latency_ms
+        self.latency_spread_ms = latency_spread_ms
+        self.distribution = distribution
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.stream_chunks = max(1, stream_chunks)
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, 'errors': 0, 'streamed': 0}
+
+    def next_response(self) -> tuple:
+        """抽样本次请求的 (延迟秒数, 是否返回错误)"""
+        with self.lock:
+            self.stats['requests'] += 1
+            latency = sample_latency(self.rng, self.distribution, self.latency_ms, self.latency_spread_ms)
+            failed = self.rng.random() < self.error_rate
+            if failed:
+                self.stats['errors'] += 1
+            return latency, failed
+
+    def count_stream(self):
+        with self.lock:
+            self.stats['streamed'] += 1
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    """OpenAI 兼容接口的请求处理"""
+
+    protocol_version = 'HTTP/1.1'
+    server: StubLLMServer
+
+    def log_message(self, format, *args):
+        # 压测时不逐条输出访问日志
+        pass
+
+    def send_json(self, status: int, payload: Dict):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip('/').endswith('/models'):
+            self.send_json(200, {'object': 'list', 'data': [{'id': 'stub-model', 'object': 'model', 'owned_by': 'stub'}]})
+        elif self.path.rstrip('/').endswith('/stats'):
+            with self.server.lock:
+                self.send_json(200, dict(self.server.stats))
+        else:
+            self.send_json(404, {'error': {'message': f'未知路径: {self.path}', 'type': 'invalid_request_error'}})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            request = json.loads(self.rfile.read(length) or b'{}')
+        except json.JSONDecodeError:
+            self.send_json(400, {'error': {'message': '请求体不是合法的 JSON', 'type': 'invalid_request_error'}})
+            return
+
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self.send_json(404, {'error': {'message': f'未知路径: {self.path}', 'type': 'invalid_request_error'}})
+            return
+
+        latency, failed = self.server.next_response()
+        if failed:
+            time.sleep(latency)
+            self.send_json(self.server.error_status, {
+                'error': {'message': '桩服务按错误率返回的模拟错误', 'type': 'server_error', 'code': 'stub_error'}
+            })
+            return
+
+        model = request.get('model') or 'stub-model'
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        if request.get('stream'):
+            self.server.count_stream()
+            self.stream_completion(completion_id, model, latency)
+        else:
+            time.sleep(latency)
+            prompt_tokens = sum(len(str(message.get('content', ''))) for message in request.get('messages', []))
+            self.send_json(200, {
+                'id': completion_id,
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': model,
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': REPORT_TEXT},
+                    'finish_reason': 'stop',
+                }],
+                'usage': {
+                    'prompt_tokens': prompt_tokens,
+                    'completion_tokens': len(REPORT_TEXT),
+                    'total_tokens': prompt_tokens + len(REPORT_TEXT),
+                },
+            })
+
+    def stream_completion(self, completion_id: str, model: str, latency: float):
+        """以 SSE 分块输出报告，总耗时与非流式一致（首块之前等待一份间隔）"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        chunks = self.server.stream_chunks
+        size = math.ceil(len(REPORT_TEXT) / chunks)
+        pieces = [REPORT_TEXT[i:i + size] for i in range(0, len(REPORT_TEXT), size)]
+        created = int(time.time())
+
+        def event(delta: Dict, finish_reason=None) -> bytes:
+            chunk = {
+                'id': completion_id,
+                'object': 'chat.completion.chunk',
+                'created': created,
+                'model': model,
+                'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}],
+            }
+            return f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode('utf-8')
+
+        self.wfile.write(event({'role': 'assistant', 'content': ''}))
+        for piece in pieces:
+            time.sleep(latency / len(pieces))
+            self.wfile.write(event({'content': piece}))
+            self.wfile.flush()
+        self.wfile.write(event({}, 'stop'))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def add_stub_arguments(parser: argparse.ArgumentParser, prefix: str = ''):
+    """添加桩服务的命令行参数（压测脚本以 --llm- 前缀复用）"""
+    parser.add_argument(f'--{prefix}latency-ms', type=float, default=800, help="响应延迟的均值/中位数（毫秒）")
+    parser.add_argument(f'--{prefix}latency-spread-ms', type=float, default=200, help="延迟的离散程度（毫秒）")
+    parser.add_argument(f'--{prefix}distribution', choices=LATENCY_DISTRIBUTIONS, default='lognormal', help="延迟分布")
+    parser.add_argument(f'--{prefix}error-rate', type=float, default=0.0, help="返回错误的比例（0 ~ 1）")
+    parser.add_argument(f'--{prefix}error-status', type=int, default=500, help="错误响应的状态码（如 429、500）")
+    parser.add_argument(f'--{prefix}stream-chunks', type=int, default=20, help="流式输出的分块数")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="本地 OpenAI 兼容桩服务")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--seed', type=int, help="随机种子")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    server = StubLLMServer(
+        (args.host, args.port), args.latency_ms, args.latency_spread_ms, args.distribution,
+        args.error_rate, args.error_status, args.stream_chunks, args.seed
+    )
+    print(f"OpenAI 兼容桩服务已启动: {server.base_url}（延迟 {args.distribution} {args.latency_ms} ms，"
+          f"错误率 {args.error_rate:.0%}）", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
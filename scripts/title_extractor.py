@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+案例字段提取模块
+三个ETL处理器共用的预编译正则、GPA/语言成绩解析（带 LRU 缓存），以及标题的单次扫描字段提取器
+"""
+import logging
+import re
+from typing import Dict, Optional, Tuple
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.utils.parse_cache import memoized
+
+logger = logging.getLogger(__name__)
+
+# ---------- 通用数值 ----------
+NUMBER_PATTERN = re.compile(r'(\d+\.?\d*)')
+GPA_FRACTION_PATTERN = re.compile(r'(\d+\.?\d*)/(\d+\.?\d*)')
+YEAR_PATTERN = re.compile(r'20(\d{2})')
+GRE_PATTERN = re.compile(r'GRE[：:\s]*(\d+)')
+# 背景信息中的GRE（仅半角冒号）
+BACKGROUND_GRE_PATTERN = re.compile(r'GRE[:\s]*(\d+)')
+
+# ---------- 标题：录取院校与项目 ----------
+# 模式：大学名+项目名+研究生offer（split_admission 以字符串查找实现相同语义，避免该模式的大量回溯）
+ADMISSION_PATTERN = re.compile(
+    r'^([^，,。]*(?:大学|学院|University|College|Institute))[^，,。]*?([^，,。]*(?:硕士|博士|Master|PhD))'
+)
+ADMISSION_SEPARATORS = ('，', ',', '。')
+ADMISSION_SCHOOL_SUFFIXES = ('大学', '学院', 'University', 'College', 'Institute')
+ADMISSION_DEGREE_SUFFIXES = ('硕士', '博士', 'Master', 'PhD')
+UNIVERSITY_PATTERNS = (
+    re.compile(r'([^，,。]*大学)'),
+    re.compile(r'([^，,。]*理工学院)'),
+    re.compile(r'([^，,。]*University)'),
+    re.compile(r'([^，,。]*College)'),
+)
+MASTER_PROGRAM_PATTERN = re.compile(r'([^，,。]*硕士)')
+UNIVERSITY_PROGRAM_PATTERNS = (
+    re.compile(r'(.+?)大学(.+?)(?:硕士|博士|Master|PhD)'),
+    re.compile(r'(.+?)(?:University|College)(.+?)(?:Master|PhD)'),
+    re.compile(r'(.+?)大学(.+)'),
+)
+
+# ---------- 本科院校与专业 ----------
+LINE_SCHOOL_PATTERN = re.compile(r'([^，,。\s]*(?:大学|学院|University|College))')
+LINE_MAJOR_PATTERNS = (
+    re.compile(r'([^，,。\s]*(?:工程|科学|技术|管理|经济|学|设计))'),
+    re.compile(r'([^，,。\s]*(?:计算机|软件|电子|机械|土木|化学|物理|数学|金融|会计|市场营销))'),
+)
+SCHOOL_PATTERNS = (
+    re.compile(r'([^，,。\s]*大学)'),
+    re.compile(r'([^，,。\s]*学院)'),
+)
+# 背景信息中的学校名（同时以英文句点分隔）
+BACKGROUND_SCHOOL_PATTERNS = (
+    re.compile(r'([^，,。.\s]*大学)'),
+    re.compile(r'([^，,。.\s]*学院)'),
+    re.compile(r'([^，,。.\s]*University)'),
+    re.compile(r'([^，,。.\s]*College)'),
+)
+MAJOR_PATTERNS = (
+    re.compile(r'([^，,。\s]*工程)'),
+    re.compile(r'([^，,。\s]*科学)'),
+    re.compile(r'([^，,。\s]*技术)'),
+    re.compile(r'([^，,。\s]*管理)'),
+    re.compile(r'([^，,。\s]*经济)'),
+)
+EXTENDED_MAJOR_PATTERNS = MAJOR_PATTERNS + (
+    re.compile(r'([^，,。\s]*文学)'),
+    re.compile(r'([^，,。\s]*理学)'),
+    re.compile(r'([^，,。\s]*学)'),
+)
+
+# ---------- 标题单次扫描 ----------
+# 所有备选分支包在零宽前瞻中，finditer 在每个位置尝试一次且不消耗字符，
+# 因此各字段的匹配互不遮挡，结果与逐个模式 re.search 一致。
+# 各分支首字符互不相同，同一位置至多一个分支命中；开头的首字符集合先行过滤，其余位置无需逐个尝试分支。
+# 行内字段用 [^\S\n] 代替 \s，保证匹配不跨行；GRE 按全文匹配，允许跨行。
+LINE_SPACE = r'(?:[：:]|[^\S\n])*'
+TITLE_FIELD_SCANNER = re.compile(
+    r'(?=[\n大学UCG雅托IT2应已经])'
+    r'(?=(?:'
+    r'(?P<newline>\n)'
+    r'|(?P<school_keyword>大学|学院|University|College)'
+    rf'|GPA{LINE_SPACE}(?P<gpa>\d+\.?\d*(?:/\d+\.?\d*)?)'
+    r'|GRE[：:\s]*(?P<gre>\d+)'
+    rf'|(?P<ielts>雅思{LINE_SPACE}\d+\.?\d*)'
+    rf'|(?P<toefl>托福{LINE_SPACE}\d+\.?\d*)'
+    rf'|(?P<ielts_en>IELTS{LINE_SPACE}\d+\.?\d*)'
+    rf'|(?P<toefl_en>TOEFL{LINE_SPACE}\d+\.?\d*)'
+    r'|20(?P<year>\d{2})'
+    r'|(?P<work>应届|已毕业|经验)'
+    r'))'
+)
+# 同一行出现多种语言成绩时的取用顺序
+LANGUAGE_GROUPS = ('ielts', 'toefl', 'ielts_en', 'toefl_en')
+# 同一行出现多个工作经验关键词时的取用顺序
+WORK_EXPERIENCE_KEYWORDS = (('应届', '应届生'), ('已毕业', '已毕业'), ('经验', '有工作经验'))
+
+# 语言类型映射
+LANGUAGE_TYPES = {
+    '雅思': ['雅思', 'IELTS', 'ielts'],
+    '托福': ['托福', 'TOEFL', 'toefl'],
+    '多邻国': ['多邻国', 'Duolingo', 'duolingo']
+}
+# 各语言考试的满分，超出视为无效
+LANGUAGE_MAX_SCORES = {'雅思': 9, '托福': 120, '多邻国': 160}
+
+
+def first_group(pattern, text: str, group: int = 1) -> Optional[str]:
+    """返回模式在文本中首个匹配的分组，未匹配返回 None"""
+    match = pattern.search(text)
+    return match.group(group) if match else None
+
+
+def find_year(text: str) -> Optional[int]:
+    """提取文本中首个 20xx 年份"""
+    match = YEAR_PATTERN.search(text)
+    return int(f"20{match.group(1)}") if match else None
+
+
+def convert_gpa(numerator: float, denominator: Optional[float] = None) -> Tuple[float, float]:
+    """将GPA换算为 (4分制, 百分制)，无分母时按数值大小推断制式"""
+    if denominator == 4:
+        scale_4 = True
+    elif denominator == 100:
+        scale_4 = False
+    else:
+        scale_4 = numerator <= 4
+
+    if scale_4:
+        return min(4.0, max(0, numerator)), min(100.0, max(0, numerator * 25))
+    return min(4.0, max(0, numerator / 25)), min(100.0, max(0, numerator))
+
+
+@memoized('parse_gpa')
+def parse_gpa(gpa_str: str) -> Tuple[Optional[float], Optional[float]]:
+    """解析GPA字符串（如 3.5/4.0、85/100、3.5），返回 (4分制, 百分制)"""
+    if not gpa_str or gpa_str.strip() == '':
+        return None, None
+
+    try:
+        gpa_str = str(gpa_str).strip()
+
+        match = GPA_FRACTION_PATTERN.search(gpa_str)
+        if match:
+            return convert_gpa(float(match.group(1)), float(match.group(2)))
+
+        match = NUMBER_PATTERN.search(gpa_str)
+        if match:
+            return convert_gpa(float(match.group(1)))
+
+    except (ValueError, TypeError) as e:
+        logger.warning(f"GPA解析失败: {gpa_str}, 错误: {e}")
+
+    return None, None
+
+
+@memoized('detect_language_type')
+def detect_language_type(language_str: str) -> Optional[str]:
+    """识别语言考试类型"""
+    for lang, keywords in LANGUAGE_TYPES.items():
+        if any(keyword in language_str for keyword in keywords):
+            return lang
+    return None
+
+
+@memoized('parse_language_score')
+def parse_language_score(language_str: str) -> Tuple[Optional[str], Optional[float]]:
+    """解析语言成绩字符串，返回 (考试类型, 分数)，超出满分的分数视为无效"""
+    if not language_str or language_str.strip() == '':
+        return None, None
+
+    try:
+        language_str = str(language_str).strip()
+        language_type = detect_language_type(language_str)
+
+        score_match = NUMBER_PATTERN.search(language_str)
+        if score_match:
+            score = float(score_match.group(1))
+            if language_type in LANGUAGE_MAX_SCORES and score > LANGUAGE_MAX_SCORES[language_type]:
+                score = None
+            return language_type, score
+
+    except (ValueError, TypeError) as e:
+        logger.warning(f"语言成绩解析失败: {language_str}, 错误: {e}")
+
+    return None, None
+
+
+def split_admission(title: str) -> Optional[Tuple[str, str]]:
+    """
+    拆分标题开头的录取院校与项目，结果与 ADMISSION_PATTERN.search 的两个分组一致：
+    匹配限定在首个分隔符之前；项目以最后出现的学位关键词结尾，
+    院校取该学位关键词之前最后出现的院校关键词，二者之间的文本归入项目
+    """
+    end = len(title)
+    for separator in ADMISSION_SEPARATORS:
+        position = title.find(separator, 0, end)
+        if position != -1:
+            end = position
+
+    degree_start, degree_end = -1, -1
+    for suffix in ADMISSION_DEGREE_SUFFIXES:
+        position = title.rfind(suffix, 0, end)
+        if position > degree_start:
+            degree_start, degree_end = position, position + len(suffix)
+    if degree_start < 0:
+        return None
+
+    school_start, school_end = -1, -1
+    for suffix in ADMISSION_SCHOOL_SUFFIXES:
+        position = title.rfind(suffix, 0, degree_start)
+        if position > school_start:
+            school_start, school_end = position, position + len(suffix)
+    if school_start < 0:
+        return None
+
+    return title[:school_end].strip(), title[school_end:degree_end].strip()
+
+
+def _apply_line_fields(info: Dict, title: str, start: int, end: int, line_fields: Dict):
+    """将一行的扫描结果写入 info（仅处理包含院校名称的行，后出现的行覆盖先出现的行）"""
+    # 学校名（排除录取大学）
+    school_match = LINE_SCHOOL_PATTERN.search(title, start, end)
+    if school_match:
+        school_name = school_match.group(1).strip()
+        if school_name != info['university']:
+            info['undergrad_school'] = school_name
+
+    # 专业
+    for pattern in LINE_MAJOR_PATTERNS:
+        major_match = pattern.search(title, start, end)
+        if major_match:
+            major = major_match.group(1).strip()
+            if len(major) > 2 and '大学' not in major and '学院' not in major:
+                info['undergrad_major'] = major
+                break
+
+    if 'gpa' in line_fields:
+        info['gpa'] = line_fields['gpa']
+
+    for group in LANGUAGE_GROUPS:
+        if group in line_fields:
+            info['language_info'] = line_fields[group]
+            break
+
+    work_keywords = line_fields.get('work', ())
+    for keyword, work_experience in WORK_EXPERIENCE_KEYWORDS:
+        if keyword in work_keywords:
+            info['work_experience'] = work_experience
+            break
+
+
+def extract_title_fields(title: str) -> Dict:
+    """
+    单次扫描标题，提取录取院校/项目、本科院校/专业、GPA、语言成绩、GRE、年份和工作经验
+    GPA、语言成绩与工作经验按行取值，且只取自包含院校名称的行；GRE 与年份取全文首个匹配
+    """
+    info = {
+        'university': '',
+        'program': '',
+        'undergrad_school': '',
+        'undergrad_major': '',
+        'gpa': '',
+        'language_info': '',
+        'work_experience': '应届生',
+        'gre_score': None,
+        'year': None
+    }
+
+    if not title:
+        return info
+
+    admission = split_admission(title)
+    if admission:
+        info['university'], info['program'] = admission
+
+    line_start = 0
+    line_fields: Dict = {}
+    for match in TITLE_FIELD_SCANNER.finditer(title):
+        kind = match.lastgroup
+        if kind == 'newline':
+            if 'school_keyword' in line_fields:
+                _apply_line_fields(info, title, line_start, match.start(), line_fields)
+            line_start = match.start() + 1
+            line_fields = {}
+        elif kind == 'gre':
+            if info['gre_score'] is None:
+                info['gre_score'] = int(match.group('gre'))
+        elif kind == 'year':
+            if info['year'] is None:
+                info['year'] = int(f"20{match.group('year')}")
+        elif kind == 'work':
+            line_fields.setdefault('work', set()).add(match.group('work'))
+        elif kind not in line_fields:
+            # 每行只保留各字段的首个匹配
+            line_fields[kind] = match.group(kind)
+
+    if 'school_keyword' in line_fields:
+        _apply_line_fields(info, title, line_start, len(title), line_fields)
+
+    return info
@@ -0,0 +1,508 @@
+#!/usr/bin/env python3
+"""
+案例快照与分区匹配测试脚本
+"""
+import sys
+import os
+import random
+import tempfile
+import threading
+import time
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from backend.models.case import Case, UserProfile, CaseResponse
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import backend.services.case_store as case_store
+from backend.services.case_store import get_case_snapshot, get_loaded_snapshot, install_case_snapshot
+from backend.services.matching_service import MatchingService
+from backend.services.program_stats import percentile
+from backend.services.autocomplete_index import AutocompleteIndex
+from backend.services.target_index import MAJOR_GROUP_NAMES, get_country_id, get_major_group_mask
+from config.settings import CASE_STORE_CONFIG, MATCHING_CONFIG
+from config.target_taxonomy import COUNTRIES, UNIVERSITY_COUNTRIES
+from scripts.benchmark_matching import compare_results, legacy_categorize_recommendations, run_benchmark
+
+TIERS = ['985院校', '211院校', '双非院校', '海外院校', '其他', None]
+MAJORS = ['计算机科学与技术', '软件工程', '金融学', '机械工程', '数学与应用数学', 'computer science']
+UNIVERSITIES = ['香港大学', '新加坡国立大学', '伦敦大学学院', '曼彻斯特大学', '悉尼大学', '爱丁堡大学']
+
+
+def build_sample_cases(count: int = 300, seed: int = 42):
+    """生成带随机背景的测试案例"""
+    rng = random.Random(seed)
+    cases = []
+    for i in range(1, count + 1):
+        cases.append(Case(
+            id=i,
+            original_id=i,
+            university=rng.choice(UNIVERSITIES),
+            program="理学硕士",
+            degree_level=rng.choice(['硕士', '硕士', '硕士', '博士']),
+            undergrad_school="测试大学",
+            undergrad_school_tier=rng.choice(TIERS),
+            undergrad_major=rng.choice(MAJORS),
+            gpa_scale_4=round(rng.uniform(2.8, 4.0), 2) if rng.random() > 0.1 else None,
+            language_type="雅思",
+            language_score=rng.choice([6.0, 6.5, 7.0, 7.5, None]),
+            gre_score=rng.choice([None, 315, 320, 325]),
+        ))
+    return cases
+
+
+def build_user_profile(**overrides):
+    """构建测试用户档案"""
+    data = dict(
+        undergrad_school="中山大学",
+        school_tier="985院校",
+        major="软件工程",
+        gpa="3.5/4.0",
+        language_test="雅思",
+        language_score=7.0,
+        gre_score=None,
+        target_degree="硕士",
+        target_countries=["香港", "新加坡"],
+        target_major="计算机科学"
+    )
+    data.update(overrides)
+    return UserProfile(**data)
+
+
+def filter_by_targets(user_profile: UserProfile, cases):
+    """逐个案例按意向国家/地区与意向专业筛选（参考实现，筛选后为空时先去掉专业条件，再不筛选）"""
+    target_mask = 0
+    for major in user_profile.target_majors or [user_profile.target_major]:
+        target_mask |= get_major_group_mask(major)
+
+    # 无法识别的意向不参与筛选
+    countries = [country for country in user_profile.target_countries if country in COUNTRIES]
+
+    def in_countries(case):
+        return not countries or UNIVERSITY_COUNTRIES.get(case.university) in countries
+
+    def in_majors(case):
+        return not target_mask or get_major_group_mask(case.program) & target_mask
+
+    matched = [case for case in cases if in_countries(case) and in_majors(case)]
+    return matched or [case for case in cases if in_countries(case)] or cases
+
+
+def brute_force_top_cases(service: MatchingService, user_profile: UserProfile, cases):
+    """按全量扫描逻辑计算Top N（参考实现）"""
+    scored = []
+    cases = [case for case in cases if case.degree_level == user_profile.target_degree]
+    for case in filter_by_targets(user_profile, cases):
+        score = service.calculate_similarity_score(user_profile, case)
+        if score > 0:
+            scored.append((score, case.id))
+    scored.sort(key=lambda x: x[0], reverse=True)
+    return scored[:service.max_cases]
+
+
+def test_partition_counts():
+    """测试快照分区计数"""
+    print("🧪 测试快照分区计数...")
+
+    cases = build_sample_cases()
+    snapshot = install_case_snapshot(cases)
+    diagnostics = snapshot.get_diagnostics()
+
+    assert diagnostics["total_cases"] == len(cases)
+    partition_total = sum(sum(levels.values()) for levels in diagnostics["partitions"].values())
+    assert partition_total == len(cases)
+    assert sum(diagnostics["buckets"].values()) == len(cases)
+
+    print(f"✅ 快照版本 {diagnostics['version']}，分区: {diagnostics['partitions']}")
+
+
+def test_snapshot_refresh():
+    """测试快照加载：并发首次加载只加载一次，过期后由后台刷新，数据未变化时版本号不变"""
+    print("\n🧪 测试快照刷新...")
+
+    refresh_interval = CASE_STORE_CONFIG['refresh_interval']
+    original_install = case_store.install_case_snapshot
+    installs = []
+
+    def counting_install(cases, fingerprint=None):
+        installs.append(len(cases))
+        return original_install(cases, fingerprint)
+
+    def wait_for_refresh():
+        with case_store._reload_lock:
+            pass
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'cases.db')}")
+        Case.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine)
+        with Session() as db:
+            db.add_all(build_sample_cases(50))
+            db.commit()
+
+        case_store._snapshot = None
+        case_store.install_case_snapshot = counting_install
+        try:
+            def load():
+                with Session() as db:
+                    get_case_snapshot(db)
+
+            threads = [threading.Thread(target=load) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert installs == [50]
+            snapshot = get_loaded_snapshot()
+
+            # 已过期但数据未变化：返回当前快照，后台核对后只更新核对时间
+            CASE_STORE_CONFIG['refresh_interval'] = 0
+            time.sleep(0.01)
+            with Session() as db:
+                assert get_case_snapshot(db) is snapshot
+            wait_for_refresh()
+            assert installs == [50] and get_loaded_snapshot() is snapshot
+            assert snapshot.checked_at > snapshot.loaded_at
+
+            # 数据变化：刷新完成前仍返回旧快照，之后版本号递增
+            with Session() as db:
+                db.add(build_sample_cases(51)[-1])
+                db.commit()
+                time.sleep(0.01)
+                assert get_case_snapshot(db) is snapshot
+            wait_for_refresh()
+            assert installs == [50, 51]
+            assert get_loaded_snapshot().version == snapshot.version + 1
+        finally:
+            CASE_STORE_CONFIG['refresh_interval'] = refresh_interval
+            case_store.install_case_snapshot = original_install
+            engine.dispose()
+
+    print("✅ 快照刷新测试通过")
+
+
+def test_partitioned_matching_matches_full_scan():
+    """测试分区扫描结果与全量扫描一致"""
+    print("\n🧪 测试分区扫描与全量扫描一致性...")
+
+    cases = build_sample_cases()
+    install_case_snapshot(cases)
+    service = MatchingService(db=None)
+
+    profiles = [
+        build_user_profile(),
+        build_user_profile(school_tier="双非院校", gpa="85/100", language_score=None),
+        build_user_profile(school_tier="其他", gre_score=320, target_degree="博士"),
+        build_user_profile(school_tier="211院校", major="金融学"),
+    ]
+
+    for user_profile in profiles:
+        expected = brute_force_top_cases(service, user_profile, cases)
+        actual = service.find_similar_cases(user_profile)
+        assert all(isinstance(case, CaseResponse) for case in actual)
+        assert [case.similarity_score for case in actual] == [score for score, _ in expected]
+        assert [case.id for case in actual] == [case_id for _, case_id in expected]
+
+    print("✅ 分区扫描结果与全量扫描一致")
+
+
+def test_target_filter():
+    """测试按意向国家/地区与意向专业的位图筛选：只扫描符合意向的案例，无结果时逐步放宽"""
+    print("\n🧪 测试意向筛选...")
+
+    assert COUNTRIES[get_country_id('香港大学')] == '香港'
+    assert COUNTRIES[get_country_id('Hong Kong Metropolitan University')] == '香港'
+    assert get_country_id('某某大学') == -1
+    groups = get_major_group_mask('MSc Financial Technology and Computer Science')
+    assert [name for i, name in enumerate(MAJOR_GROUP_NAMES) if groups & (1 << i)] == ['computer', 'business']
+    assert get_major_group_mask('理学硕士') == 0
+
+    programs = ['计算机科学硕士', '金融学硕士', 'MSc Data Science', '理学硕士']
+    cases = build_sample_cases(600, seed=11)
+    for case in cases:
+        case.program = programs[case.id % len(programs)]
+    snapshot = install_case_snapshot(cases)
+    service = MatchingService(db=None)
+
+    def scan(user_profile):
+        return snapshot.target_index.select(
+            user_profile.target_degree, user_profile.target_countries,
+            user_profile.target_majors or [user_profile.target_major]
+        )
+
+    # 香港/新加坡的计算机类项目（计算机科学、数据科学）
+    user_profile = build_user_profile(target_majors=['人工智能'])
+    positions, applied = scan(user_profile)
+    bucket = snapshot.buckets['硕士']
+    assert applied == 'country+major'
+    assert {bucket[p].program for p in positions} == {'计算机科学硕士', 'MSc Data Science'}
+    assert {bucket[p].university for p in positions} == {'香港大学', '新加坡国立大学'}
+    assert len(positions) < len(bucket) / 4
+
+    for profile in [
+        user_profile,
+        build_user_profile(target_major='金融科技', target_countries=['英国']),
+        build_user_profile(target_major='临床医学'),  # 无法识别的专业，只按国家/地区
+        build_user_profile(target_major='法学', target_countries=['美国', '英国']),  # 无英国法学项目，放宽为只按国家/地区
+        build_user_profile(target_countries=['火星']),  # 无法识别的国家/地区，只按专业
+        build_user_profile(target_countries=['加拿大'], target_major='临床医学'),  # 无符合的案例，不筛选
+    ]:
+        expected = brute_force_top_cases(service, profile, cases)
+        actual = service.find_similar_cases(profile)
+        assert [(case.similarity_score, case.id) for case in actual] == expected
+
+    assert scan(build_user_profile(target_major='法学', target_countries=['英国']))[1] == 'country'
+    assert scan(build_user_profile(target_countries=['火星']))[1] == 'major'
+    assert scan(build_user_profile(target_countries=['加拿大'], target_major='临床医学')) == (None, 'none')
+
+    targets = snapshot.get_diagnostics()['targets']['硕士']
+    assert sum(targets['countries'].values()) + targets['unknown_country'] == len(bucket)
+
+    print("✅ 意向筛选测试通过")
+
+
+def test_target_filter_fallback_order():
+    """固定意向筛选的放宽顺序：country+major -> country -> none；只有专业意向时 major -> none；默认开启"""
+    print("\n🧪 测试意向筛选放宽顺序...")
+
+    assert MATCHING_CONFIG['target_filter'] is True
+
+    # 香港只有金融项目，英国只有计算机项目
+    cases = build_sample_cases(40, seed=5)
+    for case in cases:
+        case.university, case.program = [('香港大学', '金融学硕士'), ('伦敦大学学院', '计算机科学硕士')][case.id % 2]
+    snapshot = install_case_snapshot(cases)
+    service = MatchingService(db=None)
+
+    for target_countries, target_major, expected in [
+        (['英国'], '计算机科学', 'country+major'),
+        (['香港'], '计算机科学', 'country'),  # 香港无计算机项目：去掉专业条件
+        (['加拿大'], '计算机科学', 'none'),  # 意向国家/地区无案例：不退回只按专业筛选
+        (['火星'], '计算机科学', 'major'),  # 无法识别的国家/地区不参与筛选
+        (['火星'], '临床医学', 'none'),
+    ]:
+        profile = build_user_profile(target_countries=target_countries, target_major=target_major)
+        assert snapshot.target_index.select('硕士', target_countries, [target_major])[1] == expected
+        service.find_similar_cases(profile)
+        assert service.applied_target_filter == expected, (target_countries, target_major)
+
+    disabled = MatchingService(db=None)
+    disabled.target_filter = False
+    disabled.find_similar_cases(build_user_profile(target_countries=['英国']))
+    assert disabled.applied_target_filter == 'disabled'
+
+    print("✅ 意向筛选放宽顺序测试通过")
+
+
+def test_school_planning_returns_target_filter():
+    """测试选校规划接口的响应中返回实际使用的意向筛选"""
+    print("\n🧪 测试选校规划响应中的意向筛选...")
+
+    from fastapi.testclient import TestClient
+    import backend.app.main as main
+    from backend.models.case import AnalysisReport
+    from backend.utils.database import get_read_db
+
+    class FakeLLMService:
+        def generate_analysis_report(self, user_profile, matched_cases):
+            return AnalysisReport(strengths="", weaknesses="", recommendations={}, suggestions="")
+
+    cases = build_sample_cases(40, seed=5)
+    for case in cases:
+        case.university, case.program = [('香港大学', '金融学硕士'), ('伦敦大学学院', '计算机科学硕士')][case.id % 2]
+    install_case_snapshot(cases)
+
+    original_llm_service = main.LLMService
+    main.LLMService = FakeLLMService
+    main.app.dependency_overrides[get_read_db] = lambda: None
+    try:
+        client = TestClient(main.app)
+        for target_countries, expected in [(['英国'], 'country+major'), (['香港'], 'country')]:
+            profile = build_user_profile(target_countries=target_countries, target_major='计算机科学')
+            response = client.post("/api/v1/school-planning", json=profile.model_dump())
+            assert response.status_code == 200
+            assert response.json()["target_filter"] == expected
+    finally:
+        main.LLMService = original_llm_service
+        main.app.dependency_overrides.pop(get_read_db, None)
+
+    print("✅ 选校规划响应意向筛选测试通过")
+
+
+def test_categorize_recommendations_matches_legacy():
+    """测试向量化梯度分类与逐院校分组实现的结果一致（含同分、阈值边界与大量院校）"""
+    print("\n🧪 测试梯度分类...")
+
+    service = MatchingService(db=None)
+    user_profile = build_user_profile()
+    rng = random.Random(7)
+    universities = UNIVERSITIES + ['牛津大学', '剑桥大学', '香港中文大学（深圳）'] + [f'测试大学{i}' for i in range(40)]
+    for trial in range(300):
+        count = rng.choice([1, 2, 5, 20, 100, 500])
+        pool = universities[:rng.randint(1, len(universities))]
+        cases = [
+            CaseResponse(
+                id=i, university=rng.choice(pool), program=f"项目{i}", degree_level="硕士",
+                similarity_score=rng.choice([0.0, 39.9, 40.0, 59.5, 60.0, 85.0, round(rng.uniform(0, 100), 1)])
+            )
+            for i in range(count)
+        ]
+        assert service.categorize_recommendations(cases, user_profile) == legacy_categorize_recommendations(cases), trial
+
+    assert service.categorize_recommendations([], user_profile) == {"reach": [], "target": [], "safety": []}
+
+    print("✅ 梯度分类测试通过")
+
+
+def test_program_stats_cube():
+    """测试项目录取统计预计算"""
+    print("\n🧪 测试项目录取统计预计算...")
+
+    cases = build_sample_cases()
+    snapshot = install_case_snapshot(cases)
+    cube = snapshot.program_stats
+
+    program_id = cube.get_program_id("香港大学", "理学硕士")
+    stats = cube.get_program_stats(program_id)
+    program_cases = [case for case in cases if case.university == "香港大学"]
+    gpa_values = sorted(float(case.gpa_scale_4) for case in program_cases if case.gpa_scale_4)
+
+    assert stats["case_count"] == len(program_cases)
+    assert sum(stats["tier_mix"].values()) == len(program_cases)
+    assert stats["gpa"]["count"] == len(gpa_values)
+    assert stats["gpa"]["percentiles"]["p50"] == percentile(gpa_values, 50)
+    assert sum(stats["gpa"]["histogram"].values()) == len(gpa_values)
+    assert stats["university_stats"]["program_count"] == 1
+    assert cube.get_program_stats(10 ** 6) is None
+
+    # 项目ID不随其他项目的增删变化（新增一个排序靠前的项目）
+    extra = Case(id=len(cases) + 1, original_id=len(cases) + 1, university="Aalto University",
+                 program="理学硕士", degree_level="硕士")
+    rebuilt = install_case_snapshot(cases + [extra]).program_stats
+    assert rebuilt.get_program_id("香港大学", "理学硕士") == program_id
+    assert rebuilt.get_program_stats(program_id)["case_count"] == len(program_cases)
+    assert [p["program_id"] for p in rebuilt.list_programs()][1:] == [p["program_id"] for p in cube.list_programs()]
+
+    assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.5
+    assert percentile([3.2], 90) == 3.2
+
+    print(f"✅ 项目统计: {len(cube.list_programs())} 个项目，中位GPA {stats['gpa']['percentiles']['p50']}")
+
+
+def test_program_positioning():
+    """测试用户成绩在项目录取者中的百分位定位"""
+    print("\n🧪 测试项目成绩百分位定位...")
+
+    cases = build_sample_cases()
+    cube = install_case_snapshot(cases).program_stats
+    program_id = cube.get_program_id("新加坡国立大学", "理学硕士")
+    program_cases = [case for case in cases if case.university == "新加坡国立大学"]
+
+    position = cube.get_positioning(program_id, 3.5, "雅思", 7.0, None)
+    gpa_values = [float(case.gpa_scale_4) for case in program_cases if case.gpa_scale_4]
+    expected = round(sum(1 for value in gpa_values if value <= 3.5) * 100 / len(gpa_values), 1)
+
+    assert position["gpa"]["percentile"] == expected
+    assert position["gpa"]["sample_size"] == len(gpa_values)
+    assert position["gre"]["percentile"] is None
+    assert cube.get_positioning(program_id, 4.0, "雅思", 9.0, 340)["language"]["percentile"] == 100.0
+    assert cube.get_positioning(10 ** 6, 3.5, "雅思", 7.0, None) is None
+
+    print(f"✅ GPA 3.5 位于第 {expected} 百分位")
+
+
+def test_autocomplete_index():
+    """测试服务端自动补全索引"""
+    print("\n🧪 测试自动补全索引...")
+
+    schools = ['北京大学'] * 5 + ['北京邮电大学'] * 3 + ['北京理工大学'] * 4 + ['上海交通大学'] * 2 + \
+        ['天津大学'] * 2 + ['同济大学'] * 3
+    cases = [
+        Case(id=i, original_id=i, university="香港大学", program="理学硕士", degree_level="硕士",
+             undergrad_school=school, undergrad_major="软件工程")
+        for i, school in enumerate(schools, 1)
+    ]
+    index = AutocompleteIndex(cases)
+
+    values = [item["value"] for item in index.search('universities', '北京')]
+    assert values == ['北京大学', '北京理工大学', '北京邮电大学']  # 按案例频次排序
+    assert index.search('universities', 'PKU')[0] == {"value": "北京大学", "count": 5}
+    assert index.search('universities', 'sjtu')[0]["value"] == '上海交通大学'
+    assert index.search('universities', 'bjyd')[0]["value"] == '北京邮电大学'
+    assert index.search('universities', '交通')[0]["value"] == '上海交通大学'  # 子串模糊匹配
+    assert len(index.search('universities', '北京', limit=2)) == 2
+    assert index.search('majors', 'rjgc')[0]["value"] == '软件工程'
+    assert index.search('universities', '不存在的学校') == []
+
+    # 英文缩写只归属一所院校，重名的拼音首字母返回全部院校
+    assert [item["value"] for item in index.search('universities', 'TJU')] == ['天津大学']
+    assert [item["value"] for item in index.search('universities', 'tjdx')] == ['同济大学', '天津大学']
+
+    # 子串匹配经 n-gram 倒排索引筛选候选，结果与逐个扫描一致
+    university_index = index.indexes['universities']
+    for query in ['大', '大学', '京大', '理工大学', '交通大', '学院']:
+        expected = [value for value in university_index.normalized if query in value]
+        assert [item["value"] for item in university_index.search(query, limit=50)] == expected
+    assert index.search('unknown', '北京') is None
+
+    print(f"✅ 自动补全检索结果: {values}")
+
+
+def test_matching_benchmark():
+    """测试匹配基准的结果结构与回归判定"""
+    print("\n🧪 测试匹配基准...")
+
+    results = run_benchmark([300], ['985_cs'], repeat=2, verbose=False)
+    assert set(results['results']) == {
+        'calculate_similarity_score/300/985_cs', 'find_similar_cases/300/985_cs', 'categorize_recommendations/300/985_cs',
+        'categorize_recommendations_wide/300/985_cs'
+    }
+    for metrics in results['results'].values():
+        assert metrics['ops_per_sec'] > 0 and metrics['p50_us'] <= metrics['p99_us']
+
+    baseline = {'results': {
+        'find_similar_cases/300/985_cs': {'ops_per_sec': 100.0, 'p50_us': 100.0, 'p99_us': 200.0, 'peak_alloc_kib': 10.0},
+        'categorize_recommendations/300/985_cs': {'ops_per_sec': 1000.0, 'p99_us': 0.5},
+    }}
+    current = {'results': {
+        'find_similar_cases/300/985_cs': {'ops_per_sec': 70.0, 'p50_us': 110.0, 'p99_us': 300.0, 'peak_alloc_kib': 10.5},
+        'categorize_recommendations/300/985_cs': {'ops_per_sec': 1500.0, 'p99_us': 0.9},
+        'find_similar_cases/1000/985_cs': {'ops_per_sec': 1.0},
+    }}
+    regressions = compare_results(current, baseline, threshold=0.2)
+    # 吞吐量下降 30%、p99 上升 50% 为回归；p50 +10% 未超阈值，极小的绝对变化与基线中没有的项不比较
+    assert [item.split(':')[0] for item in regressions] == [
+        'find_similar_cases/300/985_cs ops_per_sec', 'find_similar_cases/300/985_cs p99_us'
+    ]
+    assert compare_results(baseline, baseline, threshold=0.2) == []
+
+    print("✅ 匹配基准测试通过")
+
+
+def main():
+    """主测试函数"""
+    print("=" * 60)
+    print("案例快照与分区匹配测试")
+    print("=" * 60)
+
+    test_partition_counts()
+    test_snapshot_refresh()
+    test_partitioned_matching_matches_full_scan()
+    test_target_filter()
+    test_target_filter_fallback_order()
+    test_school_planning_returns_target_filter()
+    test_categorize_recommendations_matches_legacy()
+    test_program_stats_cube()
+    test_program_positioning()
+    test_autocomplete_index()
+    test_matching_benchmark()
+
+    print("\n" + "=" * 60)
+    print("测试完成")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+数据库连接池配置与只读副本路由测试脚本（使用临时 SQLite 文件）
+"""
+import sys
+import os
+import tempfile
+import time
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+import backend.services.case_store as case_store
+from backend.models.case import Case
+from backend.utils.database import (
+    ReadSession, ReplicaRouter, create_db_engine, get_pool_diagnostics, get_pool_stats
+)
+from config.settings import DB_POOL_CONFIG
+
+
+def create_case_database(path: str, count: int):
+    """创建含 count 个案例的 SQLite 数据库"""
+    engine = create_db_engine(f"sqlite:///{path}")
+    Case.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as db:
+        db.add_all([
+            Case(id=i, original_id=i, university='香港大学', program='计算机科学', degree_level='硕士')
+            for i in range(1, count + 1)
+        ])
+        db.commit()
+    return engine
+
+
+def test_pool_config():
+    """测试引擎按连接池配置创建，连接池状态可统计"""
+    print("🧪 测试连接池配置...")
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_db_engine(f"sqlite:///{os.path.join(directory, 'pool.db')}")
+        assert engine.pool.size() == DB_POOL_CONFIG['pool_size']
+        assert engine.pool._max_overflow == DB_POOL_CONFIG['max_overflow']
+        assert engine.pool._pre_ping == DB_POOL_CONFIG['pool_pre_ping']
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT 1")).scalar() == 1
+            assert engine.pool.checkedout() == 1
+        engine.dispose()
+
+    # 内存 SQLite 使用单连接池，不做池配置
+    assert create_db_engine('sqlite://').pool.__class__.__name__ == 'SingletonThreadPool'
+
+    stats = get_pool_stats()
+    assert set(stats['primary']) == {'size', 'checked_out', 'checked_in', 'overflow'}
+    diagnostics = get_pool_diagnostics()['primary']
+    assert diagnostics['healthy'] is True
+    # 只输出数据库类型与库名，不含主机与账号
+    assert set(diagnostics) == {'backend', 'database', 'healthy', 'pool'}
+    assert '@' not in diagnostics['database'] and '/' not in diagnostics['database']
+
+    print("✅ 连接池配置测试通过")
+
+
+def test_replica_router():
+    """测试副本轮询、出错后暂停使用与到期恢复"""
+    print("\n🧪 测试只读副本路由...")
+
+    assert ReplicaRouter([]).choose() is None
+
+    with tempfile.TemporaryDirectory() as directory:
+        good = [create_db_engine(f"sqlite:///{os.path.join(directory, f'replica{index}.db')}") for index in range(2)]
+        # 目录不存在，无法连接
+        broken = create_db_engine(f"sqlite:///{os.path.join(directory, 'missing', 'replica.db')}")
+        router = ReplicaRouter([good[0], broken, good[1]], retry_interval=0.2)
+
+        assert [router.choose() for _ in range(6)] == [good[0], broken, good[1]] * 2
+
+        try:
+            with broken.connect():
+                pass
+            assert False, "应无法连接"
+        except OperationalError:
+            pass
+        assert not router.is_healthy(broken)
+        chosen = [router.choose() for _ in range(6)]
+        assert broken not in chosen and set(chosen) == set(good)
+
+        time.sleep(0.25)
+        assert router.is_healthy(broken)
+
+        for engine in good + [broken]:
+            engine.dispose()
+
+    print("✅ 只读副本路由测试通过")
+
+
+def test_read_session_failover():
+    """测试只读会话在副本查询出错时改在主库重试一次，主库出错时照常抛出"""
+    print("\n🧪 测试只读会话主库重试...")
+
+    with tempfile.TemporaryDirectory() as directory:
+        primary = create_case_database(os.path.join(directory, 'primary.db'), 3)
+        # 目录不存在，无法连接
+        broken = create_db_engine(f"sqlite:///{os.path.join(directory, 'missing', 'replica.db')}")
+        ReadSessionLocal = sessionmaker(class_=ReadSession, info={'primary_bind': primary})
+
+        with ReadSessionLocal(bind=broken) as db:
+            assert db.query(Case).count() == 3
+            assert db.get_bind() is primary
+
+        with ReadSessionLocal(bind=primary) as db:
+            try:
+                db.execute(text("SELECT * FROM missing_table"))
+                assert False, "主库出错应抛出"
+            except OperationalError:
+                pass
+
+        primary.dispose()
+        broken.dispose()
+
+    print("✅ 只读会话主库重试测试通过")
+
+
+def test_snapshot_replica_lag():
+    """测试副本数据落后于主库时案例快照从主库加载"""
+    print("\n🧪 测试副本复制延迟...")
+
+    with tempfile.TemporaryDirectory() as directory:
+        primary = create_case_database(os.path.join(directory, 'primary.db'), 5)
+        lagging = create_case_database(os.path.join(directory, 'replica.db'), 3)
+        ReadSessionLocal = sessionmaker(class_=ReadSession, info={'primary_bind': primary})
+
+        case_store._snapshot = None
+        try:
+            with ReadSessionLocal(bind=lagging) as db:
+                snapshot = case_store.load_case_snapshot(db)
+            assert snapshot.total_cases == 5
+        finally:
+            case_store._snapshot = None
+
+        primary.dispose()
+        lagging.dispose()
+
+    print("✅ 副本复制延迟测试通过")
+
+
+def main():
+    """主测试函数"""
+    print("=" * 60)
+    print("数据库连接池与只读副本测试")
+    print("=" * 60)
+
+    test_pool_config()
+    test_replica_router()
+    test_read_session_failover()
+    test_snapshot_replica_lag()
+
+    print("\n" + "=" * 60)
+    print("测试完成")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+压测工具测试脚本（桩服务与压测调度，无需数据库与外部网络）
+"""
+import sys
+import os
+import json
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from openai import OpenAI, APIStatusError
+
+from scripts.stub_llm_server import REPORT_TEXT, StubLLMServer, sample_latency
+from scripts.load_test import LoadRunner, build_schedule, parse_stages
+
+
+def start_server(server):
+    """在后台线程中运行 HTTP 服务"""
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_stub_llm_server():
+    """测试桩服务的非流式、流式与错误响应"""
+    print("🧪 测试 OpenAI 兼容桩服务...")
+
+    rng = random.Random(1)
+    assert sample_latency(rng, 'fixed', 200, 50) == 0.2
+    assert all(0.15 <= sample_latency(rng, 'uniform', 200, 50) <= 0.25 for _ in range(100))
+    assert all(sample_latency(rng, 'lognormal', 200, 100) > 0 for _ in range(100))
+
+    server = start_server(StubLLMServer(('127.0.0.1', 0), latency_ms=5, stream_chunks=7, seed=1))
+    try:
+        client = OpenAI(base_url=server.base_url, api_key='stub', max_retries=0)
+        messages = [{'role': 'user', 'content': '测试'}]
+
+        response = client.chat.completions.create(model='stub-model', messages=messages)
+        assert response.choices[0].message.content == REPORT_TEXT
+
+        stream = client.chat.completions.create(model='stub-model', messages=messages, stream=True)
+        assert ''.join(chunk.choices[0].delta.content or '' for chunk in stream) == REPORT_TEXT
+
+        server.error_rate, server.error_status = 1.0, 429
+        try:
+            client.chat.completions.create(model='stub-model', messages=messages)
+            assert False, "应返回错误"
+        except APIStatusError as e:
+            assert e.status_code == 429
+
+        assert server.stats == {'requests': 3, 'errors': 1, 'streamed': 1}
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    print("✅ 桩服务测试通过")
+
+
+def test_load_schedule():
+    """测试分阶段发送计划（阶段内线性爬升）"""
+    print("\n🧪 测试压测发送计划...")
+
+    stages = parse_stages("2x10, 10x10,10x5")
+    assert stages == [(2.0, 10.0), (10.0, 10.0), (10.0, 5.0)]
+
+    schedule = build_schedule(stages)
+    counts = [sum(1 for _, stage in schedule if stage == index) for index in range(len(stages))]
+    # 0→2 RPS 爬升 10 秒约 10 个，2→10 RPS 约 60 个，恒定 10 RPS 5 秒约 50 个
+    assert counts == [9, 59, 49]
+    offsets = [offset for offset, _ in schedule]
+    assert offsets == sorted(offsets) and offsets[-1] < 25
+
+    constant = build_schedule([(4, 5)], ramp=False)
+    assert [round(offset, 2) for offset, _ in constant[:3]] == [0.25, 0.5, 0.75]
+
+    print("✅ 发送计划测试通过")
+
+
+class PlanningHandler(BaseHTTPRequestHandler):
+    """模拟选校规划接口：GPA 为百分制的档案返回 500"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        status = 500 if payload['gpa'].endswith('/100') else 200
+        body = b'{}'
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def test_load_runner():
+    """测试压测执行与汇总"""
+    print("\n🧪 测试压测执行...")
+
+    server = start_server(ThreadingHTTPServer(('127.0.0.1', 0), PlanningHandler))
+    try:
+        host, port = server.server_address[:2]
+        report = LoadRunner(f"http://{host}:{port}", concurrency=4).run([(40, 0.5), (40, 0.5)], verbose=False)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    total = report['total']
+    assert [stage['requests'] for stage in report['stages']] == [9, 19]
+    # 四类档案轮流发送，其中一类返回 500
+    assert total['requests'] == 28 and total['errors'] == {'500': 7} and total['success'] == 21
+    assert total['latency_ms']['p50'] <= total['latency_ms']['p99'] <= total['latency_ms']['max']
+    assert total['throughput_rps'] > 0
+
+    print("✅ 压测执行测试通过")
+
+
+def main():
+    """主测试函数"""
+    print("=" * 60)
+    print("压测工具测试")
+    print("=" * 60)
+
+    test_stub_llm_server()
+    test_load_schedule()
+    test_load_runner()
+
+    print("\n" + "=" * 60)
+    print("测试完成")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Prometheus 指标测试脚本（按线程分片的计数器/直方图、文本格式、匹配与LLM服务的埋点）
+"""
+import sys
+import os
+import threading
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from openai import OpenAI
+
+from backend.utils.metrics import REGISTRY, CallbackMetric, Counter, Gauge, Histogram, Registry
+from scripts.stub_llm_server import StubLLMServer
+
+
+def parse_samples(text):
+    """解析文本格式为 {样本名+标签: 值}"""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith('#'):
+            key, value = line.rsplit(' ', 1)
+            samples[key] = float(value)
+    return samples
+
+
+def test_thread_sharded_metrics():
+    """测试多线程写入后汇总结果正确，输出符合 Prometheus 文本格式"""
+    print("🧪 测试按线程分片的指标...")
+
+    registry = Registry()
+    requests = Counter('requests_total', '请求数', ('endpoint',), registry=registry)
+    latency = Histogram('latency_seconds', '耗时', buckets=(0.1, 1.0), registry=registry)
+    Gauge('ready', '就绪', registry=registry).set(1)
+    CallbackMetric('queue_size', '队列长度', lambda: {('a',): 3, ('b',): None}, ('queue',), registry=registry)
+    CallbackMetric('broken', '回调失败时不输出', lambda: 1 / 0, registry=registry)
+
+    def work():
+        for index in range(1000):
+            requests.inc(labels=('/api/a' if index % 2 else '/api/"b"',))
+            latency.observe(0.05 if index % 4 else 2.0)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    text = registry.render()
+    assert '# TYPE latency_seconds histogram' in text and '# TYPE requests_total counter' in text
+    samples = parse_samples(text)
+    assert samples['requests_total{endpoint="/api/a"}'] == 4000
+    assert samples['requests_total{endpoint="/api/\\"b\\""}'] == 4000
+    assert samples['latency_seconds_bucket{le="0.1"}'] == 6000
+    assert samples['latency_seconds_bucket{le="1"}'] == 6000
+    assert samples['latency_seconds_bucket{le="+Inf"}'] == samples['latency_seconds_count'] == 8000
+    assert abs(samples['latency_seconds_sum'] - (6000 * 0.05 + 2000 * 2.0)) < 1e-6
+    assert samples['ready'] == 1 and samples['queue_size{queue="a"}'] == 3
+    assert not any(key.startswith(('queue_size{queue="b"}', 'broken')) for key in samples)
+
+    try:
+        Counter('requests_total', '重复注册', registry=registry)
+        assert False, "重复注册应报错"
+    except ValueError:
+        pass
+
+    print("✅ 按线程分片的指标测试通过")
+
+
+def test_dead_thread_shards_are_retired():
+    """测试已结束线程的分片并入汇总分片，分片数不随线程数增长且总数不变"""
+    print("\n🧪 测试已结束线程的分片回收...")
+
+    registry = Registry()
+    requests = Counter('requests_total', '请求数', registry=registry)
+    latency = Histogram('latency_seconds', '耗时', buckets=(0.1,), registry=registry)
+
+    def work():
+        requests.inc()
+        latency.observe(0.05)
+
+    for _ in range(50):
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+        # 新线程登记时回收之前的分片
+        assert len(requests._shards) <= 1 and len(latency._shards) <= 1
+
+    samples = parse_samples(registry.render())
+    assert samples['requests_total'] == 50
+    assert samples['latency_seconds_bucket{le="0.1"}'] == samples['latency_seconds_count'] == 50
+    assert requests._shards == [] and latency._shards == []
+
+    # 回收后继续写入与抓取仍然一致
+    work()
+    samples = parse_samples(registry.render())
+    assert samples['requests_total'] == 51 and samples['latency_seconds_count'] == 51
+
+    print("✅ 已结束线程的分片回收测试通过")
+
+
+def test_service_metrics():
+    """测试匹配服务与LLM服务的埋点（LLM 调用失败时计入备用报告）"""
+    print("\n🧪 测试服务埋点...")
+
+    from backend.models.case import UserProfile
+    from backend.services.case_store import install_case_snapshot
+    from backend.services.llm_service import LLMService
+    from backend.services.matching_service import MatchingService
+    from scripts.benchmark_matching import PROFILES, build_cases
+    from scripts.generate_synthetic_cases import CaseGenerator
+
+    install_case_snapshot(build_cases(CaseGenerator(seed=3), [], 500))
+    profile = UserProfile(**PROFILES['985_cs'])
+    before = parse_samples(REGISTRY.render())
+
+    cases = MatchingService(db=None).find_similar_cases(profile)
+
+    server = StubLLMServer(('127.0.0.1', 0), latency_ms=1)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        service = LLMService.__new__(LLMService)  # 不读取 API 密钥配置，直接连接桩服务
+        service.client = OpenAI(base_url=server.base_url, api_key='stub', max_retries=0)
+        service.model = 'stub-model'
+        service.generate_analysis_report(profile, cases)
+        server.error_rate = 1.0  # 调用失败，使用备用报告
+        service.generate_analysis_report(profile, cases)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    after = parse_samples(REGISTRY.render())
+
+    def delta(key):
+        return after.get(key, 0) - before.get(key, 0)
+
+    assert delta('matching_scan_size_count') == 1 and delta('matching_scoring_duration_seconds_count') == 1
+    assert 0 < delta('matching_scan_size_sum') <= 500
+    assert delta('llm_request_duration_seconds_count{outcome="success"}') == 1
+    assert delta('llm_request_duration_seconds_count{outcome="error"}') == 1
+    assert delta('llm_tokens_count{type="completion"}') == 1 and delta('llm_tokens_sum{type="prompt"}') > 0
+    assert delta('llm_fallback_reports_total{reason="llm_error"}') == 1
+    assert after['case_snapshot_cases'] == 500 and after['case_snapshot_age_seconds'] >= 0
+    assert any(key.startswith('parser_cache_requests_total{cache="parse_user_gpa"') for key in after)
+
+    print("✅ 服务埋点测试通过")
+
+
+def main():
+    """主测试函数"""
+    print("=" * 60)
+    print("Prometheus 指标测试")
+    print("=" * 60)
+
+    test_thread_sharded_metrics()
+    test_dead_thread_shards_are_retired()
+    test_service_metrics()
+
+    print("\n" + "=" * 60)
+    print("测试完成")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
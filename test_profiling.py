@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+在线性能剖析测试脚本（调用栈采样、tracemalloc 内存分配剖析）
+"""
+import sys
+import os
+import threading
+import tracemalloc
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from backend.utils.profiling import AllocationSampler, StackSampler
+
+
+def busy_loop(stop):
+    """占用CPU直到 stop 被设置"""
+    total = 0
+    while not stop.is_set():
+        total += sum(range(1000))
+    return total
+
+
+def allocate_blocks(count):
+    """分配 count 个 1KB 的对象并返回"""
+    return [bytearray(1024) for _ in range(count)]
+
+
+def test_stack_sampler():
+    """测试采样到忙碌线程的调用栈，空闲等待不计入热点函数"""
+    print("🧪 测试调用栈采样...")
+
+    stop = threading.Event()
+    busy = threading.Thread(target=busy_loop, args=(stop,), name='busy-worker')
+    idle = threading.Thread(target=stop.wait, name='idle-worker')
+    sampler = StackSampler(interval=0.002)
+    busy.start()
+    idle.start()
+    sampler.start()
+    threading.Event().wait(0.3)  # 主线程同样处于空闲等待
+    sampler.stop()
+    stop.set()
+    busy.join()
+    idle.join()
+
+    assert sampler.samples > 0
+    lines = sampler.collapsed().splitlines()
+    assert any(line.startswith('thread (busy-worker);') and 'busy_loop (test_profiling.py:' in line for line in lines)
+    assert any(line.startswith('thread (idle-worker);') for line in lines)
+    assert all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+    # 其他测试遗留的线程也会被采样，只检查忙碌线程的函数在热点中
+    hot = sampler.hot_functions(20)
+    assert any(entry['function'].startswith('busy_loop') for entry in hot)
+    assert not any('threading.py' in entry['function'] for entry in hot)
+
+    print("✅ 调用栈采样测试通过")
+
+
+def test_allocation_sampler():
+    """测试内存分配剖析：统计期间的分配位置，结束后停止由其开启的跟踪"""
+    print("\n🧪 测试内存分配剖析...")
+
+    assert not tracemalloc.is_tracing()
+    sampler = AllocationSampler()
+    sampler.start()
+    blocks = allocate_blocks(500)
+    sampler.stop()
+    assert not tracemalloc.is_tracing()
+
+    top = sampler.top_allocations(3)
+    assert top[0]['location'].startswith('test_profiling.py:') and top[0]['size_diff_kb'] >= 500
+    assert sampler.peak_bytes >= 500 * 1024
+    stacks = sampler.collapsed().splitlines()
+    allocating = [line for line in stacks if line.rsplit(' ', 1)[0].endswith(top[0]['location'])]
+    assert allocating and int(allocating[0].rsplit(' ', 1)[1]) >= 500 * 1024
+    assert len(blocks) == 500
+
+    print("✅ 内存分配剖析测试通过")
+
+
+def main():
+    """主测试函数"""
+    print("=" * 60)
+    print("在线性能剖析测试")
+    print("=" * 60)
+
+    test_stack_sampler()
+    test_allocation_sampler()
+
+    print("\n" + "=" * 60)
+    print("测试完成")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
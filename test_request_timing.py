@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+请求阶段计时（Server-Timing / 慢请求日志）测试脚本
+"""
+import sys
+import os
+import json
+import logging
+import tempfile
+import time
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.utils.request_timing import RequestTimingMiddleware, SlowRequestLog, get_current_timing, timed
+
+
+def build_app(slow_log):
+    """构建带计时中间件的测试应用"""
+    app = FastAPI()
+    app.add_middleware(RequestTimingMiddleware, slow_log=slow_log, paths=["/api/"])
+
+    @app.get("/api/async")
+    async def async_endpoint():
+        with timed("scoring"):
+            time.sleep(0.01)
+        with timed("scoring"):
+            pass
+        with timed("llm"):
+            time.sleep(0.02)
+        return {"ok": True}
+
+    @app.get("/api/sync")
+    def sync_endpoint():
+        # 同步接口在线程池中运行，计时上下文随之复制
+        with timed("db"):
+            pass
+        return {"ok": True}
+
+    @app.get("/health")
+    async def health():
+        return {"timing": get_current_timing() is not None}
+
+    return app
+
+
+def test_server_timing_header():
+    """测试 Server-Timing 头、同名阶段累加与路径过滤"""
+    print("🧪 测试 Server-Timing 响应头...")
+
+    client = TestClient(build_app(SlowRequestLog(threshold_ms=10000, path=None)))
+
+    header = client.get("/api/async").headers["server-timing"]
+    spans = dict(item.split(";dur=") for item in header.split(", "))
+    assert list(spans) == ["scoring", "llm", "total"]
+    assert float(spans["scoring"]) >= 10 and float(spans["llm"]) >= 20
+    assert float(spans["total"]) >= float(spans["scoring"]) + float(spans["llm"])
+
+    assert client.get("/api/sync").headers["server-timing"].startswith("db;dur=")
+
+    response = client.get("/health")
+    assert "server-timing" not in response.headers and response.json() == {"timing": False}
+
+    # 请求之外 timed 不做任何事
+    with timed("noop"):
+        assert get_current_timing() is None
+
+    print("✅ Server-Timing 响应头测试通过")
+
+
+def test_slow_request_log():
+    """测试慢请求按阈值与采样率记录，日志带结构化耗时字段"""
+    print("\n🧪 测试慢请求日志...")
+
+    records = []
+
+    class Collect(logging.Handler):
+        def emit(self, record):
+            records.append(record)
+
+    handler = Collect()
+    timing_logger = logging.getLogger("backend.utils.request_timing")
+    timing_logger.addHandler(handler)
+    timing_logger.setLevel(logging.INFO)
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "slow.jsonl")
+            slow_log = SlowRequestLog(threshold_ms=15, sample_rate=1.0, path=path)
+            client = TestClient(build_app(slow_log))
+            client.get("/api/sync")
+            client.get("/api/async")
+
+            with open(path, encoding="utf-8") as f:
+                entries = [json.loads(line) for line in f]
+            assert [entry["path"] for entry in entries] == ["/api/async"]
+            assert entries[0]["status"] == 200 and set(entries[0]["spans"]) == {"scoring", "llm"}
+
+            diagnostics = slow_log.get_diagnostics()
+            assert diagnostics["slow_count"] == diagnostics["logged_count"] == 1
+            assert diagnostics["recent"] == entries
+
+            slow_log.sample_rate = 0.0
+            client.get("/api/async")
+            assert (slow_log.slow_count, slow_log.logged_count) == (2, 1)
+    finally:
+        timing_logger.removeHandler(handler)
+
+    timings = [record.request_timing for record in records if hasattr(record, "request_timing")]
+    assert [entry["path"] for entry in timings] == ["/api/sync", "/api/async", "/api/async"]
+    assert timings[1]["duration_ms"] >= 30
+
+    print("✅ 慢请求日志测试通过")
+
+
+def main():
+    """主测试函数"""
+    print("=" * 60)
+    print("请求阶段计时测试")
+    print("=" * 60)
+
+    test_server_timing_header()
+    test_slow_request_log()
+
+    print("\n" + "=" * 60)
+    print("测试完成")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+响应缓存（ETag / 304 / 预压缩）测试脚本
+"""
+import sys
+import os
+import gzip
+import json
+import threading
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from starlette.requests import Request
+from backend.utils.response_cache import ResponseCache
+
+
+def build_request(headers=None):
+    """构建测试请求"""
+    raw_headers = [(key.lower().encode(), value.encode()) for key, value in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw_headers})
+
+
+def test_cached_build_and_version():
+    """测试缓存命中与按版本失效"""
+    print("🧪 测试缓存命中与版本失效...")
+
+    cache = ResponseCache()
+    calls = []
+
+    def build():
+        calls.append(1)
+        return {"total_cases": len(calls)}
+
+    first = cache.respond_json(build_request(), "count", 1, build)
+    second = cache.respond_json(build_request(), "count", 1, build)
+    assert len(calls) == 1
+    assert first.body == second.body
+    assert json.loads(first.body) == {"total_cases": 1}
+
+    third = cache.respond_json(build_request(), "count", 2, build)
+    assert len(calls) == 2
+    assert third.headers["etag"] != first.headers["etag"]
+
+    print(f"✅ 命中 {cache.hits} 次，未命中 {cache.misses} 次")
+
+
+def test_etag_not_modified():
+    """测试 If-None-Match 返回 304"""
+    print("\n🧪 测试 ETag 协商...")
+
+    cache = ResponseCache()
+    build = lambda: {"options": ["雅思", "托福"]}
+    response = cache.respond_json(build_request(), "options", 0, build, "public, max-age=3600")
+    etag = response.headers["etag"]
+
+    assert response.headers["cache-control"] == "public, max-age=3600"
+    assert cache.respond_json(build_request({"If-None-Match": etag}), "options", 0, build).status_code == 304
+    assert cache.respond_json(build_request({"If-None-Match": f"W/{etag}"}), "options", 0, build).status_code == 304
+    assert cache.respond_json(build_request({"If-None-Match": '"other"'}), "options", 0, build).status_code == 200
+
+    print("✅ ETag 协商测试通过")
+
+
+def test_unchanged_body_keeps_etag():
+    """测试版本变化但响应体不变时 ETag 不变、沿用已压缩的条目，并发访问时命中计数准确"""
+    print("\n🧪 测试响应体不变时的 ETag...")
+
+    cache = ResponseCache()
+    build = lambda: {"options": ["雅思", "托福"] * 100}
+    first = cache.respond_json(build_request({"Accept-Encoding": "gzip"}), "options", 1, build)
+    entry = cache.get("options", 1, build)
+
+    second = cache.respond_json(build_request({"If-None-Match": first.headers["etag"]}), "options", 2, build)
+    assert second.status_code == 304
+    assert cache.get("options", 2, build) is entry and entry.version == 2
+
+    def work():
+        for _ in range(500):
+            cache.get("options", 2, build)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert (cache.hits, cache.misses) == (4002, 2)
+
+    print("✅ 响应体不变时 ETag 不变")
+
+
+def test_precompressed_bodies():
+    """测试按 Accept-Encoding 返回预压缩响应体"""
+    print("\n🧪 测试预压缩响应体...")
+
+    cache = ResponseCache()
+    html = ("<html>" + "智能留学选校规划系统" * 200 + "</html>").encode("utf-8")
+    build = lambda: (html, "text/html; charset=utf-8")
+
+    plain = cache.respond(build_request(), "index", 0, build)
+    compressed = cache.respond(build_request({"Accept-Encoding": "gzip, deflate"}), "index", 0, build)
+    refused = cache.respond(build_request({"Accept-Encoding": "gzip;q=0"}), "index", 0, build)
+
+    assert "content-encoding" not in plain.headers
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(compressed.body) == plain.body
+    assert len(compressed.body) < len(plain.body)
+    assert "content-encoding" not in refused.headers
+    assert compressed.headers["etag"] != plain.headers["etag"]
+    revalidated = cache.respond(build_request({"If-None-Match": compressed.headers["etag"]}), "index", 0, build)
+    assert revalidated.status_code == 304
+
+    print(f"✅ gzip 压缩: {len(plain.body)} -> {len(compressed.body)} 字节")
+
+
+def main():
+    """主测试函数"""
+    print("=" * 60)
+    print("响应缓存测试")
+    print("=" * 60)
+
+    test_cached_build_and_version()
+    test_etag_not_modified()
+    test_unchanged_body_keeps_etag()
+    test_precompressed_bodies()
+
+    print("\n" + "=" * 60)
+    print("测试完成")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()